@@ -1,26 +1,15 @@
 import ipaddress
 import customtkinter as ctk
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
 
 import session
-from database import get_connection, get_user_id
-
-def enregistrer_historique(type_test: str, entree: str, resultat: str, est_valide: bool, id_utilisateur: int | None):
-    """
-    Enregistre un test dans la table historique_tests
-    """
-    try:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO historique_tests (type_test, entree, resultat, est_valide, id_utilisateur)
-            VALUES (?, ?, ?, ?, ?)
-        """, (type_test, entree, resultat, est_valide, id_utilisateur))
-        conn.commit()
-    except Exception as e:
-        messagebox.showwarning("Historique", f"Erreur lors de l'enregistrement dans l'historique : {e}")
-    finally:
-        conn.close()
+from database import ajouter_test_historique, enregistrer_decoupe
+from analyse_conflits import conflits_nouveaux, intervalles_plan, resumer_conflits, MAX_CONFLITS_AFFICHES
+from export_decoupe import exporter_plan
+from mesures import mesure, ANALYSE, CALCUL, AFFICHAGE, ENREGISTREMENT, CONFLITS
+from plan_decoupe import calculer_sous_reseaux, reseau_classful
+from tableau_virtuel import TableauVirtuel
+from tache_fond import TacheDeFond
 
 def ouvrir_fenetre_decoupe():
     ctk.set_appearance_mode("system")
@@ -33,139 +22,6 @@ def ouvrir_fenetre_decoupe():
     app.transient()
     app.grab_set()
 
-    # =========================
-    #   LOGIQUE & UTILITAIRES
-    # =========================
-    def _parse_network(reseau_de_base: str, masque_str: str | None):
-        """
-        Accepte :
-          - '192.168.1.0/24' (CIDR)
-          - '192.168.1.0' + masque '/24' ou '255.255.255.0'
-        Retourne un IPv4Network (strict=False pour tolérer une IP d'hôte).
-        """
-        if not reseau_de_base or not reseau_de_base.strip():  # strip supprime les espaces
-            raise ValueError("Réseau de base manquant.")
-
-        reseau_de_base = reseau_de_base.strip()
-
-        # Si CIDR déjà fourni
-        if "/" in reseau_de_base:
-            net = ipaddress.ip_network(reseau_de_base, strict=False)
-        else:
-            if masque_str is None or not masque_str.strip():
-                raise ValueError("Masque manquant. Fournis un masque (ex: 255.255.255.0 ou /24).")
-            masque_str = masque_str.strip()
-
-            if masque_str.startswith("/"):
-                try:
-                    prefix = int(masque_str[1:])
-                except ValueError:
-                    raise ValueError("Préfixe invalide. Exemple : /24")
-            else:
-                # Convertir un masque pointé en préfixe
-                try:
-                    prefix = ipaddress.IPv4Network(f"0.0.0.0/{masque_str}").prefixlen
-                except Exception:
-                    raise ValueError("Masque invalide. Exemples valides : 255.255.255.0 ou /24")
-
-            if not (0 <= prefix <= 32):
-                raise ValueError("Préfixe invalide : doit être entre /0 et /32.")
-
-            net = ipaddress.ip_network(f"{reseau_de_base}/{prefix}", strict=False)
-
-        if net.version != 4:
-            raise NotImplementedError("Seul IPv4 est géré dans cette version.")
-        return net
-
-    def _tabuler_sous_reseaux(sous_reseaux: list[ipaddress.IPv4Network]):
-        """
-        Transforme la liste de sous-réseaux en lignes :
-        [Nom, Adresse réseau, Broadcast, Plage utilisable, Nb hôtes]
-        (Sans générer la liste de tous les hôtes.)
-        """
-        resultats = []
-        for i, sr in enumerate(sous_reseaux, start=1):
-            network = sr.network_address
-            broadcast = sr.broadcast_address
-            total = sr.num_addresses
-
-            if total >= 4:
-                first_host = ipaddress.IPv4Address(int(network) + 1)
-                last_host = ipaddress.IPv4Address(int(broadcast) - 1)
-                nb_hotes = total - 2
-                plage = f"{first_host} - {last_host}"
-            else:
-                nb_hotes = max(total - 2, 0)
-                plage = "Aucun"
-
-            resultats.append([
-                f"Sous-réseau {i}",
-                str(network),
-                str(broadcast),
-                plage,
-                str(nb_hotes),
-            ])
-        return resultats
-
-    def calculer_sous_reseaux(
-            reseau_de_base: str,
-            nb_sous_reseaux: int | None = None,
-            masque: str | None = None,
-            nb_ips_utilisables: int | None = None
-    ):
-        """
-        Calcule des sous-réseaux en respectant :
-          - nb_sous_reseaux (optionnel)
-          - nb_ips_utilisables par SR (optionnel)
-        Retourne des lignes prêtes pour l'affichage.
-        """
-        net = _parse_network(reseau_de_base, masque if "/" not in reseau_de_base else None)
-        p = net.prefixlen
-
-        # Normaliser les entrées
-        s_bits = 0
-        if nb_sous_reseaux is not None:
-            if nb_sous_reseaux <= 0:
-                raise ValueError("Le nombre de sous-réseaux doit être strictement positif.")
-            s_bits = (nb_sous_reseaux - 1).bit_length()  # ceil(log2(n))
-        prefix_from_subnets = p + s_bits  # borne inférieure sur le /xx
-
-        prefix_from_hosts_max = 32  # pas de contrainte par défaut
-        if nb_ips_utilisables is not None:
-            if nb_ips_utilisables <= 0:
-                raise ValueError("Le nombre d'IP utilisables / SR doit être strictement positif.")
-            required_total = nb_ips_utilisables + 2  # règle IPv4 classique
-            if required_total < 4:
-                required_total = 4
-            h = (required_total - 1).bit_length()  # ceil(log2(required_total))
-            prefix_from_hosts_max = 32 - h  # /xx max autorisé pour respecter le nb d'IP
-
-            if prefix_from_hosts_max < p:
-                raise ValueError(
-                    f"Incompatible : {net.with_prefixlen} ne peut pas fournir {nb_ips_utilisables} IP utilisables "
-                    f"par sous-réseau."
-                )
-
-        if nb_sous_reseaux is not None and nb_ips_utilisables is not None:
-            if prefix_from_subnets > prefix_from_hosts_max:
-                raise ValueError(
-                    f"Incompatible : impossible de créer {nb_sous_reseaux} sous-réseau(x) avec "
-                    f"{nb_ips_utilisables} IP utilisables chacun dans {net.with_prefixlen}."
-                )
-
-        if nb_sous_reseaux is not None:
-            new_prefix = prefix_from_subnets
-        elif nb_ips_utilisables is not None:
-            new_prefix = max(p, prefix_from_hosts_max)
-        else:
-            new_prefix = p  # pas de découpe
-
-        sous_reseaux = list(net.subnets(new_prefix=new_prefix))
-        if nb_sous_reseaux is not None:
-            sous_reseaux = sous_reseaux[:nb_sous_reseaux]
-
-        return _tabuler_sous_reseaux(sous_reseaux), new_prefix, net
-
     # =========================
     #   UI (compatible ton main)
     # =========================
@@ -311,15 +167,93 @@ def ouvrir_fenetre_decoupe():
         bouton.grid(row=2, column=0, columnspan=4, padx=20, pady=10, sticky="w")
 
     def creer_tableau(frame):
-        table_container = ctk.CTkScrollableFrame(frame, corner_radius=15)
+        table_container = ctk.CTkFrame(frame, corner_radius=15)
         table_container.pack(fill="both", expand=True, padx=30, pady=20)
+
+        # Bandeau info + saut direct vers un sous-réseau
+        barre = ctk.CTkFrame(table_container, fg_color="transparent")
+        barre.pack(fill="x", padx=8, pady=(4, 4))
+
+        info = ctk.CTkLabel(barre, text="", font=("Arial", 14, "bold"), text_color=("#1f538d", "#8ab4f8"))
+        info.pack(side="left")
+
+        # Enregistrement en arrière-plan : progression et annulation (affichées seulement pendant la tâche)
+        progression = ctk.CTkProgressBar(barre, width=180)
+        bouton_annuler = ctk.CTkButton(barre, text="Annuler", width=90, height=32, font=("Arial", 14, "bold"),
+                                       corner_radius=10, fg_color="#B3261E", hover_color="#8C1D18",
+                                       command=lambda: table_container.tache and table_container.tache.annuler())
+        etat = ctk.CTkLabel(barre, text="", font=("Arial", 13))
+        etat.pack(side="left", padx=(16, 0))
+
+        entry_aller = ctk.CTkEntry(barre, placeholder_text="N° de SR ou IP", width=200, height=32,
+                                   font=("Arial", 14))
+        bouton_aller = ctk.CTkButton(barre, text="Aller à", width=100, height=32, font=("Arial", 14, "bold"),
+                                     corner_radius=10, command=lambda: aller_a_sous_reseau(table_container))
+        bouton_aller.pack(side="right", padx=(8, 0))
+        bouton_exporter = ctk.CTkButton(barre, text="Exporter", width=100, height=32, font=("Arial", 14, "bold"),
+                                        corner_radius=10, command=lambda: exporter_resultats(table_container))
+        bouton_exporter.pack(side="right", padx=(0, 16))
+        entry_aller.pack(side="right")
+        entry_aller.bind("<Return>", lambda _: aller_a_sous_reseau(table_container))
+
+        tableau = TableauVirtuel(
+            table_container,
+            colonnes=["Sous-réseau", "Adresse réseau", "Broadcast", "Plage utilisable", "Nb hôtes"],
+            police_entete=("Arial", 18, "bold"),
+            police=("Arial", 15),
+            couleur_entete=("#3b8ed0", "#1f538d"),
+            couleurs_lignes=(("#e6e6e6", "#333333"), ("#d9d9d9", "#2b2b2b")),
+            couleur_texte=("gray10", "#DCE4EE"),
+            fg_color="transparent"
+        )
+        tableau.pack(fill="both", expand=True)
+
+        table_container.info = info
+        table_container.entry_aller = entry_aller
+        table_container.tableau = tableau
+        table_container.plan = None
+        table_container.progression = progression
+        table_container.bouton_annuler = bouton_annuler
+        table_container.etat = etat
+        table_container.tache = None
         return table_container
 
+    def aller_a_sous_reseau(table_container):
+        """Saute au SR n° X ou au SR contenant une IP, sans parcourir la découpe"""
+        plan = table_container.plan
+        cible = table_container.entry_aller.get().strip()
+        if plan is None or not cible:
+            return
+        try:
+            k = int(cible) - 1 if cible.isdigit() else plan.index_de(cible)
+        except ValueError as e:
+            messagebox.showerror("Erreur", str(e), parent=app)
+            return
+        table_container.tableau.aller_a(k)
+
+    def exporter_resultats(table_container):
+        """Exporte le plan affiché en CSV / JSON Lines, calculé par blocs (rien n'est lu dans la base)"""
+        plan = table_container.plan
+        if plan is None:
+            messagebox.showerror("Erreur", "Calculez d'abord une découpe.", parent=app)
+            return
+        chemin = filedialog.asksaveasfilename(parent=app, title="Exporter la découpe", defaultextension=".csv",
+                                              filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")])
+        if not chemin:
+            return
+        try:
+            nombre = exporter_plan(plan, chemin)
+        except OSError as e:
+            messagebox.showerror("Erreur", f"Export impossible : {e}", parent=app)
+            return
+        messagebox.showinfo("Export", f"{nombre} sous-réseau(x) exporté(s) dans {chemin}", parent=app)
+
     def afficher_resultats(entry_reseau, entry_nb, table_container):
         """Compatible avec ton main : lit aussi les nouveaux inputs via entry_reseau.master."""
         # Efface l'ancien tableau
-        for widget in table_container.winfo_children():
-            widget.destroy()
+        table_container.plan = None
+        table_container.info.configure(text="")
+        table_container.tableau.definir_source(None)
 
         reseau_txt = entry_reseau.get().strip()
         nb_sr_txt = entry_nb.get().strip()
@@ -334,89 +268,53 @@ def ouvrir_fenetre_decoupe():
             return
         mode = input_frame.mode_var.get() if hasattr(input_frame, "mode_var") else "classless"
 
-        # Parse nombres optionnels
-        nb_sr = None
-        nb_ip = None
-        try:
-            if nb_sr_txt:
-                nb_sr = int(nb_sr_txt)
-            if nb_ip_txt:
-                nb_ip = int(nb_ip_txt)
-        except ValueError:
-            messagebox.showerror("Erreur de saisie", "Les champs numériques doivent contenir des entiers valides.", parent=app)
-            return
-
-        # Adapter l'IP si mode classful
-        if mode == "classful":
+        # Les messages d'erreur sont affichés après la mesure (la boîte de dialogue n'est pas comptée)
+        erreur_saisie = None
+        with mesure("decoupe", ANALYSE):
+            # Parse nombres optionnels
+            nb_sr = None
+            nb_ip = None
             try:
-                ip_str = reseau_txt.split("/")[0]
-                ip_obj = ipaddress.IPv4Address(ip_str)
-                if ip_obj >= ipaddress.IPv4Address("1.0.0.0") and ip_obj <= ipaddress.IPv4Address("126.255.255.255"):
-                    prefix = 8
-                elif ip_obj >= ipaddress.IPv4Address("128.0.0.0") and ip_obj <= ipaddress.IPv4Address(
-                        "191.255.255.255"):
-                    prefix = 16
-                elif ip_obj >= ipaddress.IPv4Address("192.0.0.0") and ip_obj <= ipaddress.IPv4Address(
-                        "223.255.255.255"):
-                    prefix = 24
-                else:
-                    raise ValueError("IP non classée dans A/B/C.")
-                reseau_txt = f"{ip_obj}/{prefix}"
-                masque_txt = None  # masque ignoré
-            except Exception as e:
-                messagebox.showerror("Erreur", f"IP classful invalide : {e}", parent=app)
-                return
+                if nb_sr_txt:
+                    nb_sr = int(nb_sr_txt)
+                if nb_ip_txt:
+                    nb_ip = int(nb_ip_txt)
+            except ValueError:
+                erreur_saisie = ("Erreur de saisie", "Les champs numériques doivent contenir des entiers valides.")
+
+            # Adapter l'IP si mode classful
+            if erreur_saisie is None and mode == "classful":
+                try:
+                    reseau_txt = reseau_classful(reseau_txt)
+                    masque_txt = None  # masque ignoré
+                except Exception as e:
+                    erreur_saisie = ("Erreur", f"IP classful invalide : {e}")
+        if erreur_saisie:
+            messagebox.showerror(*erreur_saisie, parent=app)
+            return
 
         try:
-            donnees, prefix, net = calculer_sous_reseaux(
-                reseau_de_base=reseau_txt,
-                nb_sous_reseaux=nb_sr,
-                masque=masque_txt if "/" not in reseau_txt else None,
-                nb_ips_utilisables=nb_ip
-            )
+            with mesure("decoupe", CALCUL) as m:
+                plan, prefix, net = calculer_sous_reseaux(
+                    reseau_de_base=reseau_txt,
+                    nb_sous_reseaux=nb_sr,
+                    masque=masque_txt if "/" not in reseau_txt else None,
+                    nb_ips_utilisables=nb_ip
+                )
+                m.taille = len(plan)
 
-            # Bandeau info
-            info = ctk.CTkLabel(
-                table_container,
-                text=f"Découpe '{nom_decoupe}' de {net.with_prefixlen} en /{prefix}  (SR générés: {len(donnees)})",
-                font=("Arial", 14, "bold"),
-                text_color=("#1f538d", "#8ab4f8")
-            )
-            info.grid(row=0, column=0, columnspan=5, padx=8, pady=(4, 4), sticky="w")
-
-            # Décaler entêtes et données d'une ligne
-            offset = 1
-            colonnes = ["Sous-réseau", "Adresse réseau", "Broadcast", "Plage utilisable", "Nb hôtes"]
-            for j, col in enumerate(colonnes):
-                header = ctk.CTkLabel(
-                    table_container,
-                    text=col,
-                    font=("Arial", 18, "bold"),
-                    width=220,
-                    anchor="center",
-                    fg_color=("#3b8ed0", "#1f538d"),
-                    text_color="white",
-                    corner_radius=10
+            with mesure("decoupe", AFFICHAGE, len(plan)):
+                # Bandeau info
+                table_container.info.configure(
+                    text=f"Découpe '{nom_decoupe}' de {net.with_prefixlen} en /{prefix}  (SR générés: {len(plan)})"
                 )
-                header.grid(row=offset, column=j, padx=8, pady=12, sticky="ew")
-
-            # Afficher données sous les entêtes (avec offset)
-            for i, ligne in enumerate(donnees, start=1):
-                bg_color = ("#d9d9d9", "#2b2b2b") if i % 2 == 0 else ("#e6e6e6", "#333333")
-                for j, valeur in enumerate(ligne):
-                    cell = ctk.CTkLabel(
-                        table_container,
-                        text=valeur,
-                        font=("Arial", 15),
-                        width=220,
-                        anchor="center",
-                        fg_color=bg_color,
-                        corner_radius=8
-                    )
-                    cell.grid(row=i + offset, column=j, padx=8, pady=6, sticky="ew")
+
+                # Seules les lignes visibles sont calculées, à la demande, depuis le plan
+                table_container.plan = plan
+                table_container.tableau.definir_source(plan)
 
         except ValueError as ve:
-            enregistrer_historique(
+            ajouter_test_historique(
                 type_test="Découpe réseau IP",
                 entree=f"Réseau: {reseau_txt}, Masque: {masque_txt}, Nb SR: {nb_sr}, Nb IP: {nb_ip}, Nom: {nom_decoupe}, Mode: {mode}",
                 resultat=str(ve),  # ou str(nie), ou str(e) selon l'exception
@@ -424,8 +322,9 @@ def ouvrir_fenetre_decoupe():
                 id_utilisateur=session.utilisateur_connecte_id
             )
             messagebox.showerror("Erreur", str(ve), parent=app)
+            return
         except NotImplementedError as nie:
-            enregistrer_historique(
+            ajouter_test_historique(
                 type_test="Découpe réseau IP",
                 entree=f"Réseau: {reseau_txt}, Masque: {masque_txt}, Nb SR: {nb_sr}, Nb IP: {nb_ip}, Nom: {nom_decoupe}, Mode: {mode}",
                 resultat=str(nie),  # ou str(nie), ou str(e) selon l'exception
@@ -433,8 +332,9 @@ def ouvrir_fenetre_decoupe():
                 id_utilisateur=session.utilisateur_connecte_id
             )
             messagebox.showwarning("Fonction non disponible", str(nie), parent=app)
+            return
         except Exception as e:
-            enregistrer_historique(
+            ajouter_test_historique(
                 type_test="Découpe réseau IP",
                 entree=f"Réseau: {reseau_txt}, Masque: {masque_txt}, Nb SR: {nb_sr}, Nb IP: {nb_ip}, Nom: {nom_decoupe}, Mode: {mode}",
                 resultat=str(e),  # ou str(nie), ou str(e) selon l'exception
@@ -442,45 +342,104 @@ def ouvrir_fenetre_decoupe():
                 id_utilisateur=session.utilisateur_connecte_id
             )
             messagebox.showerror("Erreur", f"Une erreur est survenue : {e}", parent=app)
-        # Enregistrement dans la base
-        try:
-            id_utilisateur = session.utilisateur_connecte_id
-            if id_utilisateur is not None:
-                enregistrer_decoupe(
+            return
+        # Enregistrement dans la base et recherche de chevauchements dans un thread de fond :
+        # le tableau (calculé à la demande) est déjà affiché et la fenêtre reste utilisable
+        id_utilisateur = session.utilisateur_connecte_id
+        if id_utilisateur is None:
+            messagebox.showwarning("Utilisateur", "Utilisateur non trouvé. La découpe n'a pas été enregistrée.", parent=app)
+            return
+        entree_test = f"Réseau: {reseau_txt}, Masque: {masque_txt}, Nb SR: {nb_sr}, Nb IP: {nb_ip}, Nom: {nom_decoupe}, Mode: {mode}"
+
+        def enregistrer(tache):
+            with mesure("decoupe", ENREGISTREMENT, len(plan)):
+                id_decoupe = enregistrer_decoupe(
                     nom_decoupe=nom_decoupe,
                     mode=mode,
                     ip_reseau=str(net.network_address),
                     masque=str(net.netmask),
-                    nb_sous_reseaux=len(donnees),
                     nb_ips_par_sr=nb_ip if nb_ip else None,
                     type_decoupe="classique",
                     id_utilisateur=id_utilisateur,
-                    sous_reseaux=donnees
-                )
-                # Préparer l'entrée et le résultat pour l'historique
-                entree_test = f"Réseau: {reseau_txt}, Masque: {masque_txt}, Nb SR: {nb_sr}, Nb IP: {nb_ip}, Nom: {nom_decoupe}, Mode: {mode}"
-                resultat_test = f"/{prefix} généré, SR créés: {len(donnees)}"
-
-                enregistrer_historique(
-                    type_test="Découpe réseau IP",
-                    entree=entree_test,
-                    resultat=resultat_test,
-                    est_valide=True,
-                    id_utilisateur=session.utilisateur_connecte_id
+                    plan=plan,
+                    progression=tache.progression
                 )
-            else:
+            # Vérification incrémentale : seul le nouveau plan est confronté aux découpes existantes
+            tache.publier("Recherche de chevauchements…")
+            conflits = []
+            with mesure("decoupe", CONFLITS, len(plan)):
+                for ligne in conflits_nouveaux(intervalles_plan(plan, nom_decoupe), exclure=id_decoupe):
+                    tache.verifier()
+                    conflits.append(ligne)
+                    if len(conflits) > MAX_CONFLITS_AFFICHES:
+                        break
+            return conflits
+
+        def fin(conflits):
+            ajouter_test_historique(
+                type_test="Découpe réseau IP",
+                entree=entree_test,
+                resultat=f"/{prefix} généré, SR créés: {len(plan)}",
+                est_valide=True,
+                id_utilisateur=id_utilisateur
+            )
+            if conflits:
+                messagebox.showwarning("Chevauchements",
+                                       f"La découpe recouvre des découpes enregistrées :\n{resumer_conflits(conflits)}",
+                                       parent=app)
 
-                messagebox.showwarning("Utilisateur", "Utilisateur non trouvé. La découpe n'a pas été enregistrée.", parent=app)
-        except Exception as e:
-            enregistrer_historique(
+        def erreur(e):
+            ajouter_test_historique(
                 type_test="Découpe réseau IP",
-                entree=f"Réseau: {reseau_txt}, Masque: {masque_txt}, Nb SR: {nb_sr}, Nb IP: {nb_ip}, Nom: {nom_decoupe}, Mode: {mode}",
-                resultat=str(ve),  # ou str(nie), ou str(e) selon l'exception
+                entree=entree_test,
+                resultat=str(e),
                 est_valide=False,
-                id_utilisateur=session.utilisateur_connecte_id
+                id_utilisateur=id_utilisateur
             )
             messagebox.showwarning("Base de données", f"Erreur lors de l'enregistrement : {e}", parent=app)
 
+        lancer_tache(table_container, enregistrer, fin, erreur, f"Découpe '{nom_decoupe}' enregistrée.")
+
+    def lancer_tache(table_container, fonction, sur_fin, sur_erreur, texte_fin):
+        """Démarre fonction dans un thread de fond, avec barre de progression et bouton Annuler"""
+        if table_container.tache is not None and not table_container.tache.terminee:
+            table_container.tache.annuler()
+
+        def courante(rappel):
+            """Mise à jour ignorée si une autre tâche a été lancée entre-temps"""
+            return lambda *valeurs: table_container.tache is tache and rappel(*valeurs)
+
+        def finale(texte, rappel=None):
+            """Fin de tâche : masque la progression (si la tâche est toujours la courante) puis appelle rappel"""
+            def appel(valeur):
+                if table_container.tache is tache:
+                    terminer_tache(table_container, texte)
+                if rappel is not None:
+                    rappel(valeur)
+            return appel
+
+        def progression(fait, total):
+            table_container.progression.set(fait / total if total else 1)
+            table_container.etat.configure(text=f"Enregistrement : {fait}/{total} SR")
+
+        tache = TacheDeFond(app, fonction,
+                            sur_progression=courante(progression),
+                            sur_resultat=courante(lambda texte: table_container.etat.configure(text=texte)),
+                            sur_fin=finale(texte_fin, sur_fin),
+                            sur_erreur=finale("", sur_erreur),
+                            sur_annulation=finale("Enregistrement annulé."))
+        table_container.tache = tache
+        table_container.progression.set(0)
+        table_container.etat.configure(text="Enregistrement…")
+        table_container.progression.pack(side="left", padx=(16, 8))
+        table_container.bouton_annuler.pack(side="left")
+        tache.demarrer()
+
+    def terminer_tache(table_container, texte):
+        table_container.progression.pack_forget()
+        table_container.bouton_annuler.pack_forget()
+        table_container.etat.configure(text=texte)
+
     def creer_bouton_quitter(frame, app):
         bouton = ctk.CTkButton(
             frame,
@@ -493,49 +452,6 @@ def ouvrir_fenetre_decoupe():
         )
         bouton.pack(pady=10)
 
-    def enregistrer_decoupe(nom_decoupe, mode, ip_reseau, masque, nb_sous_reseaux, nb_ips_par_sr, type_decoupe,
-                            id_utilisateur, sous_reseaux):
-        conn = get_connection()
-        cur = conn.cursor()
-
-        # Insérer la découpe
-        cur.execute("""
-                    INSERT INTO decoupe (nom_decoupe, mode, ip_reseau, masque, nombre_sous_reseaux, nombre_ips_par_sr,
-                                         type_decoupe, id_responsable)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        nom_decoupe,
-                        mode,
-                        ip_reseau,
-                        masque,
-                        nb_sous_reseaux,
-                        nb_ips_par_sr,
-                        "classique",  # pour l'instant, on ne gère que le mode classique
-                        id_utilisateur
-                    ))
-
-        id_decoupe = cur.lastrowid
-
-        # Insérer les sous-réseaux
-        for ligne in sous_reseaux:
-            _, ip_reseau_sr, ip_broadcast, plage, nb_ips = ligne
-            ip_debut, ip_fin = plage.split(" - ") if " - " in plage else ("", "")
-            cur.execute("""
-                        INSERT INTO sous_reseau (id_decoupe, ip_reseau, masque, ip_debut, ip_fin, ip_broadcast, nb_ips)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                        """, (
-                            id_decoupe,
-                            ip_reseau_sr,
-                            masque,
-                            ip_debut,
-                            ip_fin,
-                            ip_broadcast,
-                            int(nb_ips)
-                        ))
-
-        conn.commit()
-        conn.close()
-
     configurer_fenetre(app)
     frame = creer_frame_principale(app)
     creer_titre(frame)
@@ -0,0 +1,201 @@
+import heapq
+import ipaddress
+
+from database import (get_connection, materialiser_decoupe, REQ_AJOUTER_BLOC_LIBRE, REQ_BASE_DECOUPE,
+                      REQ_BLOC_LIBRE_PLUS_BAS, REQ_ESPACE_LIBRE_SUIVI, REQ_ESPACE_LIBRE_TOTAL, REQ_INTERVALLES_DECOUPE,
+                      REQ_RETIRER_BLOC_LIBRE, REQ_SUIVRE_ESPACE_LIBRE)
+from plan_decoupe import enregistrement_sous_reseau
+
+
+class AllocateurBuddy:
+    """
+    Espace libre d'une découpe, en blocs alignés rangés par préfixe (allocateur « buddy »).
+    Allouer ou libérer un sous-réseau coûte O(32) découpages / fusions de blocs, sans
+    jamais relire les sous-réseaux déjà alloués.
+    """
+
+    def __init__(self, debut: int, prefixe: int):
+        self.debut = debut
+        self.prefixe = prefixe
+        # Pour chaque préfixe : ensemble des débuts de blocs libres + tas pour trouver le plus bas
+        self._libres = {p: set() for p in range(prefixe, 33)}
+        self._tas = {p: [] for p in range(prefixe, 33)}
+
+    @classmethod
+    def depuis_occupes(cls, net: ipaddress.IPv4Network, occupes):
+        """
+        Construit l'espace libre d'un réseau à partir de ses sous-réseaux occupés,
+        donnés triés par adresse sous forme (debut, fin). Utilisé une seule fois par découpe.
+        """
+        allocateur = cls(int(net.network_address), net.prefixlen)
+        allocateur._ajouter_hors(occupes)
+        return allocateur
+
+    def _ajouter_hors(self, occupes):
+        """Ajoute tout le réseau sauf les plages occupées (debut, fin), triées par adresse"""
+        curseur = self.debut
+        for debut, fin in occupes:
+            self._ajouter_plage(curseur, debut - 1)
+            curseur = max(curseur, fin + 1)
+        self._ajouter_plage(curseur, self.debut + (1 << (32 - self.prefixe)) - 1)
+
+    def _ajouter_plage(self, debut: int, fin: int):
+        """Découpe [debut, fin] en blocs alignés les plus grands possible"""
+        while debut <= fin:
+            taille = debut & -debut if debut else 1 << (32 - self.prefixe)
+            while taille > fin - debut + 1:
+                taille >>= 1
+            self._ajouter_bloc(debut, 33 - taille.bit_length())
+            debut += taille
+
+    # --- Blocs libres : les seules opérations qui dépendent du stockage ---
+    def _ajouter_bloc(self, debut: int, prefixe: int):
+        self._libres[prefixe].add(debut)
+        heapq.heappush(self._tas[prefixe], debut)
+
+    def _retirer_plus_bas(self, prefixe: int):
+        """Retire et retourne le bloc libre le plus bas de ce préfixe (None s'il n'y en a pas)"""
+        tas, libres = self._tas[prefixe], self._libres[prefixe]
+        while tas:
+            debut = heapq.heappop(tas)
+            if debut in libres:
+                libres.remove(debut)
+                return debut
+        return None
+
+    def _retirer_bloc(self, debut: int, prefixe: int) -> bool:
+        """Retire ce bloc s'il est libre ; retourne False sinon"""
+        if debut not in self._libres[prefixe]:
+            return False
+        self._libres[prefixe].remove(debut)
+        return True
+
+    def allouer(self, prefixe: int) -> int:
+        """Alloue un bloc /prefixe (le plus bas disponible) et retourne son adresse de début"""
+        if not self.prefixe <= prefixe <= 32:
+            raise ValueError(f"Préfixe /{prefixe} impossible dans un /{self.prefixe}.")
+
+        # Plus petit bloc libre assez grand, puis découpage en deux jusqu'à la bonne taille
+        for p in range(prefixe, self.prefixe - 1, -1):
+            debut = self._retirer_plus_bas(p)
+            if debut is not None:
+                while p < prefixe:
+                    p += 1
+                    self._ajouter_bloc(debut + (1 << (32 - p)), p)
+                return debut
+        raise ValueError(f"Plus d'espace libre pour un /{prefixe}.")
+
+    def liberer(self, debut: int, prefixe: int):
+        """Rend un bloc à l'espace libre en le refusionnant avec ses voisins (buddies) libres"""
+        while prefixe > self.prefixe:
+            voisin = debut ^ (1 << (32 - prefixe))
+            if not self._retirer_bloc(voisin, prefixe):
+                break
+            debut = min(debut, voisin)
+            prefixe -= 1
+        self._ajouter_bloc(debut, prefixe)
+
+    def espace_libre(self) -> int:
+        """Nombre total d'adresses libres"""
+        return sum(len(libres) << (32 - p) for p, libres in self._libres.items())
+
+
+class EspaceLibreDecoupe(AllocateurBuddy):
+    """
+    Espace libre d'une découpe enregistrée : un bloc libre par ligne de bloc_libre.
+    Allouer ou libérer n'écrit que les blocs découpés ou fusionnés, dans la transaction du curseur.
+    """
+
+    def __init__(self, cur, id_decoupe: int, debut: int, prefixe: int):
+        super().__init__(debut, prefixe)
+        self.cur = cur
+        self.id_decoupe = id_decoupe
+
+    @classmethod
+    def ouvrir(cls, cur, id_decoupe: int):
+        """Espace libre de la découpe, construit à partir de ses sous-réseaux à la première allocation"""
+        row = cur.execute(REQ_BASE_DECOUPE, (id_decoupe,)).fetchone()
+        if not row:
+            raise ValueError("Découpe introuvable.")
+        net = ipaddress.ip_network(f"{row[1]}/{row[2]}", strict=False)
+        espace = cls(cur, id_decoupe, int(net.network_address), net.prefixlen)
+
+        cur.execute(REQ_ESPACE_LIBRE_SUIVI, (id_decoupe,))
+        if cur.fetchone() is None:
+            espace._ajouter_hors(cur.execute(REQ_INTERVALLES_DECOUPE, (id_decoupe,)).fetchall())
+            cur.execute(REQ_SUIVRE_ESPACE_LIBRE, (id_decoupe,))
+        return espace
+
+    def _ajouter_bloc(self, debut: int, prefixe: int):
+        self.cur.execute(REQ_AJOUTER_BLOC_LIBRE, (self.id_decoupe, prefixe, debut))
+
+    def _retirer_plus_bas(self, prefixe: int):
+        debut = self.cur.execute(REQ_BLOC_LIBRE_PLUS_BAS, (self.id_decoupe, prefixe)).fetchone()[0]
+        if debut is not None:
+            self._retirer_bloc(debut, prefixe)
+        return debut
+
+    def _retirer_bloc(self, debut: int, prefixe: int) -> bool:
+        return self.cur.execute(REQ_RETIRER_BLOC_LIBRE, (self.id_decoupe, prefixe, debut)).rowcount > 0
+
+    def espace_libre(self) -> int:
+        return self.cur.execute(REQ_ESPACE_LIBRE_TOTAL, (self.id_decoupe,)).fetchone()[0] or 0
+
+
+def _compter_sous_reseaux(cur, id_decoupe, delta):
+    cur.execute(
+        "UPDATE decoupe SET nombre_sous_reseaux = nombre_sous_reseaux + ? WHERE id_decoupe = ?",
+        (delta, id_decoupe),
+    )
+
+
+def allouer_sous_reseau(id_decoupe: int, prefixe: int) -> ipaddress.IPv4Network:
+    """Ajoute un sous-réseau /prefixe à une découpe enregistrée (une seule transaction)"""
+    # Une découpe enregistrée par ses paramètres reçoit d'abord ses lignes sous_reseau
+    materialiser_decoupe(id_decoupe)
+
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        debut = EspaceLibreDecoupe.ouvrir(cur, id_decoupe).allouer(prefixe)
+        cur.execute(
+            """
+            INSERT INTO sous_reseau (id_decoupe, ip_reseau, masque, ip_debut, ip_fin, ip_broadcast, nb_ips,
+                                     debut, fin, prefixe)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (id_decoupe, *enregistrement_sous_reseau(debut, prefixe)),
+        )
+        _compter_sous_reseaux(cur, id_decoupe, 1)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return ipaddress.IPv4Network((debut, prefixe))
+
+
+def liberer_sous_reseau(id_decoupe: int, reseau: str):
+    """Retire un sous-réseau (ex: '10.0.0.32/27') d'une découpe enregistrée et rend son espace"""
+    net = ipaddress.ip_network(reseau, strict=False)
+    debut = int(net.network_address)
+    # Une découpe enregistrée par ses paramètres reçoit d'abord ses lignes sous_reseau
+    materialiser_decoupe(id_decoupe)
+
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        espace = EspaceLibreDecoupe.ouvrir(cur, id_decoupe)
+        cur.execute(
+            "DELETE FROM sous_reseau WHERE id_decoupe = ? AND debut = ? AND prefixe = ?",
+            (id_decoupe, debut, net.prefixlen),
+        )
+        if cur.rowcount == 0:
+            raise ValueError(f"{net.with_prefixlen} n'est pas un sous-réseau de cette découpe.")
+        espace.liberer(debut, net.prefixlen)
+        _compter_sous_reseaux(cur, id_decoupe, -1)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
@@ -0,0 +1,255 @@
+import heapq
+import ipaddress
+import itertools
+from operator import itemgetter
+
+from database import (get_connection, debuts_alignes, lister_plans_parametriques, plan_parametrique,
+                      plans_parametriques_recouvrant, REQ_BASE_DECOUPE, REQ_BASES_DECOUPES, REQ_INTERVALLES_DECOUPE,
+                      REQ_INTERVALLES_ENGLOBANT, REQ_INTERVALLES_PLAGE, REQ_INTERVALLES_TOUS, REQ_NOM_DECOUPE)
+from plan_decoupe import PlanDecoupe, entier_vers_ip, parser_reseau
+
+# Types de conflits
+CHEVAUCHEMENT = "chevauchement"
+TROU = "trou"
+HORS_BORNES = "hors bornes"
+
+# Colonnes d'une ligne de conflit (tableau de la recherche et export en ligne de commande)
+COLONNES_CONFLITS = ["type", "decoupe", "reseau", "autre_decoupe", "autre_reseau"]
+
+MAX_CONFLITS_AFFICHES = 10
+
+# Un intervalle est un tuple (debut, fin, source, plan) :
+#   source : id_decoupe (base) ou nom (plan non enregistré, fichier) ;
+#   plan   : PlanDecoupe quand l'intervalle couvre tous les sous-réseaux d'une découpe paramétrique, sinon None.
+_debut = itemgetter(0)
+
+
+def texte_plage(debut: int, fin: int) -> str:
+    """'a.b.c.d/p' si [debut, fin] est un bloc aligné, sinon 'a.b.c.d - e.f.g.h'"""
+    taille = fin - debut + 1
+    if taille & (taille - 1) == 0 and debut % taille == 0:
+        return f"{entier_vers_ip(debut)}/{33 - taille.bit_length()}"
+    return f"{entier_vers_ip(debut)} - {entier_vers_ip(fin)}"
+
+
+def _texte_intervalle(intervalle, autre) -> str:
+    """Libellé d'un intervalle ; pour un plan paramétrique, seulement ses sous-réseaux touchés par l'autre"""
+    debut, fin, _, plan = intervalle[:4]
+    if plan is None:
+        return texte_plage(debut, fin)
+    premier = plan.index_de(max(debut, autre[0]))
+    dernier = plan.index_de(min(fin, autre[1]))
+    if premier == dernier:
+        return texte_plage(*plan.bornes(premier))
+    return (f"{texte_plage(*plan.bornes(premier))} … {texte_plage(*plan.bornes(dernier))} "
+            f"({dernier - premier + 1} sous-réseaux)")
+
+
+def intervalles_plan(plan, source):
+    """Intervalles d'un plan calculé, triés : une seule plage pour un PlanDecoupe, un par sous-réseau sinon"""
+    if isinstance(plan, PlanDecoupe):
+        if len(plan):
+            yield plan.debut, plan.bornes(len(plan) - 1)[1], source, plan
+        return
+    for k in range(len(plan)):
+        yield (*plan.bornes(k), source, None)
+
+
+def intervalles_cidr(lignes, source):
+    """Intervalles d'une liste de réseaux CIDR (une par ligne, lignes vides et # ignorées)"""
+    for numero, ligne in enumerate(lignes, start=1):
+        ligne = ligne.strip()
+        if not ligne or ligne.startswith("#"):
+            continue
+        try:
+            net = parser_reseau(ligne, None)
+        except (ValueError, NotImplementedError) as e:
+            raise ValueError(f"Ligne {numero} : {e}")
+        yield int(net.network_address), int(net.broadcast_address), source, None
+
+
+def chevauchements(intervalles):
+    """
+    Balayage des intervalles triés par début : génère (a, b) pour chaque paire qui se chevauche.
+    Seuls les intervalles encore ouverts (fin >= début courant) sont gardés, si bien que le coût
+    est celui du tri, O(n log n), plus le nombre de paires signalées.
+    """
+    ouverts = []
+    for intervalle in intervalles:
+        ouverts = [ouvert for ouvert in ouverts if ouvert[1] >= intervalle[0]]
+        for ouvert in ouverts:
+            yield ouvert, intervalle
+        ouverts.append(intervalle)
+
+
+def trous_et_debordements(intervalles, debut_bornes: int, fin_bornes: int):
+    """Génère (type, debut, fin) des intervalles triés hors de [debut_bornes, fin_bornes] et des plages non couvertes"""
+    couvert = debut_bornes - 1
+    for debut, fin, *_ in intervalles:
+        if debut < debut_bornes or fin > fin_bornes:
+            yield HORS_BORNES, debut, fin
+        if debut > couvert + 1 and couvert < fin_bornes:
+            yield TROU, couvert + 1, min(debut - 1, fin_bornes)
+        couvert = max(couvert, fin)
+    if couvert < fin_bornes:
+        yield TROU, couvert + 1, fin_bornes
+
+
+def _ligne_chevauchement(a, b, noms):
+    return [CHEVAUCHEMENT, noms.get(a[2], a[2]), _texte_intervalle(a, b),
+            noms.get(b[2], b[2]), _texte_intervalle(b, a)]
+
+
+def _lignes_bornes(intervalles, net, source):
+    debut, fin = int(net.network_address), int(net.broadcast_address)
+    for type_conflit, d, f in trous_et_debordements(intervalles, debut, fin):
+        if type_conflit == HORS_BORNES:
+            yield [HORS_BORNES, source, texte_plage(d, f), source, net.with_prefixlen]
+        else:
+            yield [TROU, source, texte_plage(d, f), "", ""]
+
+
+def analyser_intervalles(intervalles, net: ipaddress.IPv4Network | None = None, noms=None):
+    """
+    Conflits d'une liste d'intervalles quelconque (triée ici) : chevauchements, puis,
+    si un réseau de base est donné, sous-réseaux hors de ce réseau et plages non couvertes.
+    """
+    noms = noms or {}
+    intervalles = sorted(intervalles, key=_debut)
+    for a, b in chevauchements(intervalles):
+        yield _ligne_chevauchement(a, b, noms)
+    if net is not None and intervalles:
+        yield from _lignes_bornes(intervalles, net, noms.get(intervalles[0][2], intervalles[0][2]))
+
+
+def _bases_decoupes(conn):
+    """(noms, bases) : nom de chaque découpe et liste (id_decoupe, nom, réseau de base)"""
+    noms, bases = {}, []
+    for id_decoupe, nom, ip_reseau, masque in conn.execute(REQ_BASES_DECOUPES):
+        noms[id_decoupe] = nom
+        bases.append((id_decoupe, nom, ipaddress.ip_network(f"{ip_reseau}/{masque}", strict=False)))
+    return noms, bases
+
+
+class _NomsDecoupes(dict):
+    """Noms des découpes lus à la demande (par clé primaire), sans charger toute la table decoupe"""
+
+    def __init__(self, conn, noms=None):
+        super().__init__(noms or {})
+        self._conn = conn
+
+    def get(self, cle, defaut=None):
+        if cle not in self and isinstance(cle, int):
+            row = self._conn.execute(REQ_NOM_DECOUPE, (cle,)).fetchone()
+            if row is None:
+                return defaut
+            self[cle] = row[0]
+        return super().get(cle, defaut)
+
+
+def _stockes(curseur, parametriques, exclure=None):
+    """Intervalles lus en base, sans la découpe exclue ni les lignes d'une matérialisation en cours"""
+    return ((debut, fin, id_decoupe, None) for debut, fin, id_decoupe in curseur
+            if id_decoupe != exclure and id_decoupe not in parametriques)
+
+
+def analyser_base():
+    """
+    Analyse complète de la base : chevauchements entre tous les sous-réseaux enregistrés
+    (un seul parcours de l'index (debut, fin)), puis, découpe par découpe, sous-réseaux
+    hors du réseau de base et plages non couvertes.
+    """
+    conn = get_connection()
+    noms, bases = _bases_decoupes(conn)
+    parametriques = {id_decoupe: plan for id_decoupe, _, plan in lister_plans_parametriques()}
+
+    plages = sorted(itertools.chain.from_iterable(intervalles_plan(plan, id_decoupe)
+                                                  for id_decoupe, plan in parametriques.items()), key=_debut)
+    stockes = _stockes(conn.execute(REQ_INTERVALLES_TOUS), parametriques)
+    for a, b in chevauchements(heapq.merge(stockes, plages, key=_debut)):
+        yield _ligne_chevauchement(a, b, noms)
+
+    for id_decoupe, nom, net in bases:
+        if id_decoupe in parametriques:
+            intervalles = intervalles_plan(parametriques[id_decoupe], id_decoupe)
+        else:
+            intervalles = conn.execute(REQ_INTERVALLES_DECOUPE, (id_decoupe,))
+        yield from _lignes_bornes(intervalles, net, nom)
+
+
+def _groupes_contigus(intervalles):
+    """Regroupe des intervalles triés en (debut, fin, intervalles) de plages d'adresses contiguës"""
+    groupe = []
+    for intervalle in intervalles:
+        if groupe and intervalle[0] > fin + 1:
+            yield groupe[0][0], fin, groupe
+            groupe = []
+        fin = max(fin, intervalle[1]) if groupe else intervalle[1]
+        groupe.append(intervalle)
+    if groupe:
+        yield groupe[0][0], fin, groupe
+
+
+def conflits_nouveaux(intervalles, exclure=None, noms=None):
+    """
+    Vérification incrémentale d'un nouveau plan (ou d'une liste de CIDR) contre les découpes enregistrées,
+    sans relire toute la base : pour chaque plage contiguë du plan, seuls les sous-réseaux et les découpes
+    paramétriques qui commencent dans la plage ou qui englobent son début sont lus, dans les index
+    (debut, fin) de sous_reseau et (debut_plage, fin_plage) de decoupe.
+    exclure : id_decoupe à ignorer (la découpe elle-même si elle vient d'être enregistrée).
+    """
+    conn = get_connection()
+    noms = _NomsDecoupes(conn, noms)
+
+    for debut, fin, groupe in _groupes_contigus(sorted(intervalles, key=_debut)):
+        parametriques = {id_decoupe: plan for id_decoupe, _, plan in plans_parametriques_recouvrant(debut, fin)}
+        plages = sorted(itertools.chain.from_iterable(intervalles_plan(plan, id_decoupe)
+                                                      for id_decoupe, plan in parametriques.items()
+                                                      if id_decoupe != exclure), key=_debut)
+        # Blocs alignés commençant avant la plage et la recouvrant : ils contiennent forcément son début
+        debuts = [d for d in debuts_alignes(debut) if d < debut]
+        englobants = conn.execute(REQ_INTERVALLES_ENGLOBANT.format(marques=",".join("?" * len(debuts))),
+                                  (*debuts, debut))
+        existants = heapq.merge(
+            sorted(itertools.chain(_stockes(englobants, parametriques, exclure), plages), key=_debut),
+            _stockes(conn.execute(REQ_INTERVALLES_PLAGE, (debut, fin)), parametriques, exclure),
+            key=_debut,
+        )
+        # Le dernier élément indique l'origine : on ne signale que les paires nouveau / existant
+        marques = heapq.merge(((*i, True) for i in groupe), ((*i, False) for i in existants), key=_debut)
+        for a, b in chevauchements(marques):
+            if a[4] != b[4]:
+                nouveau, existant = (a, b) if a[4] else (b, a)
+                yield _ligne_chevauchement(nouveau, existant, noms)
+
+
+def conflits_decoupe(id_decoupe):
+    """Conflits d'une découpe enregistrée : chevauchements avec les autres découpes, puis trous et hors bornes"""
+    conn = get_connection()
+    row = conn.execute(REQ_BASE_DECOUPE, (id_decoupe,)).fetchone()
+    if row is None:
+        raise ValueError(f"Découpe {id_decoupe} introuvable.")
+    nom, ip_reseau, masque = row
+    net = ipaddress.ip_network(f"{ip_reseau}/{masque}", strict=False)
+    noms = {id_decoupe: nom}
+
+    plan = plan_parametrique(id_decoupe)
+    if plan is not None:
+        yield from conflits_nouveaux(intervalles_plan(plan, id_decoupe), exclure=id_decoupe, noms=noms)
+        yield from _lignes_bornes(intervalles_plan(plan, id_decoupe), net, nom)
+        return
+
+    stockes = ((debut, fin, id_decoupe, None) for debut, fin in conn.execute(REQ_INTERVALLES_DECOUPE, (id_decoupe,)))
+    yield from conflits_nouveaux(stockes, exclure=id_decoupe, noms=noms)
+    yield from _lignes_bornes(conn.execute(REQ_INTERVALLES_DECOUPE, (id_decoupe,)), net, nom)
+
+
+def resumer_conflits(lignes, limite=MAX_CONFLITS_AFFICHES) -> str:
+    """Texte des premières lignes de conflit pour un avertissement ; chaîne vide s'il n'y en a aucune"""
+    lignes = list(itertools.islice(lignes, limite + 1))
+    texte = "\n".join(f"{reseau} chevauche {autre_reseau} ({autre})" if type_conflit == CHEVAUCHEMENT
+                      else f"{type_conflit} : {reseau}" for type_conflit, _, reseau, autre, autre_reseau
+                      in lignes[:limite])
+    if len(lignes) > limite:
+        texte += "\n..."
+    return texte
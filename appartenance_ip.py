@@ -0,0 +1,235 @@
+import ipaddress
+from array import array
+
+from database import (get_connection, lister_plans_parametriques, plan_parametrique, REQ_DECOUPES_MODIFIEES,
+                      REQ_NOM_DECOUPE, REQ_SOUS_RESEAUX_JUSQUA, REQ_VERSION_DECOUPES)
+
+
+class _Noeud:
+    __slots__ = ("cle", "longueur", "enfants", "decoupes")
+
+    def __init__(self, cle, longueur):
+        self.cle = cle              # préfixe du nœud, aligné à gauche sur 32 bits
+        self.longueur = longueur    # nombre de bits significatifs de cle
+        self.enfants = [None, None]
+        self.decoupes = []          # id des découpes ayant un sous-réseau exactement sur ce préfixe
+
+
+def _masquer(valeur, longueur):
+    return valeur & ((0xFFFFFFFF << (32 - longueur)) & 0xFFFFFFFF)
+
+
+class TrieAppartenance:
+    """
+    Trie radix compressé (Patricia) sur les sous-réseaux enregistrés.
+    Une recherche descend au plus 32 niveaux et retourne tous les sous-réseaux
+    contenant l'IP, du plus spécifique au plus large.
+    """
+
+    def __init__(self):
+        self.racine = _Noeud(0, 0)
+        self.nombre = 0
+
+    def inserer(self, debut: int, prefixe: int, id_decoupe: int):
+        debut = _masquer(debut, prefixe)
+        noeud = self.racine
+        while True:
+            if noeud.longueur == prefixe:
+                noeud.decoupes.append(id_decoupe)
+                break
+
+            bit = (debut >> (31 - noeud.longueur)) & 1
+            enfant = noeud.enfants[bit]
+            if enfant is None:
+                feuille = _Noeud(debut, prefixe)
+                feuille.decoupes.append(id_decoupe)
+                noeud.enfants[bit] = feuille
+                break
+
+            # Longueur du préfixe commun entre le nouveau sous-réseau et l'enfant
+            limite = min(prefixe, enfant.longueur)
+            difference = debut ^ enfant.cle
+            commun = min(32 - difference.bit_length(), limite) if difference else limite
+            if commun == enfant.longueur:
+                noeud = enfant
+                continue
+
+            # Sinon on insère un nœud intermédiaire au point de divergence
+            intermediaire = _Noeud(_masquer(debut, commun), commun)
+            noeud.enfants[bit] = intermediaire
+            intermediaire.enfants[(enfant.cle >> (31 - commun)) & 1] = enfant
+            if commun == prefixe:
+                intermediaire.decoupes.append(id_decoupe)
+            else:
+                feuille = _Noeud(debut, prefixe)
+                feuille.decoupes.append(id_decoupe)
+                intermediaire.enfants[(debut >> (31 - commun)) & 1] = feuille
+            break
+        self.nombre += 1
+
+    def retirer(self, debut: int, prefixe: int, id_decoupe: int):
+        """Retire une entrée insérée par inserer (le nœud reste, sans cette découpe)"""
+        debut = _masquer(debut, prefixe)
+        noeud = self.racine
+        while noeud is not None and noeud.longueur < prefixe:
+            noeud = noeud.enfants[(debut >> (31 - noeud.longueur)) & 1]
+        if noeud is not None and noeud.longueur == prefixe and noeud.cle == debut and id_decoupe in noeud.decoupes:
+            noeud.decoupes.remove(id_decoupe)
+            self.nombre -= 1
+
+    def chercher(self, ip: int) -> list[tuple[int, int, int]]:
+        """Retourne les (id_decoupe, debut, prefixe) contenant ip, du plus spécifique au plus large"""
+        trouves = []
+        noeud = self.racine
+        while noeud is not None:
+            if noeud.longueur and (ip ^ noeud.cle) >> (32 - noeud.longueur):
+                break
+            for id_decoupe in noeud.decoupes:
+                trouves.append((id_decoupe, noeud.cle, noeud.longueur))
+            if noeud.longueur == 32:
+                break
+            noeud = noeud.enfants[(ip >> (31 - noeud.longueur)) & 1]
+        trouves.reverse()
+        return trouves
+
+
+class MoteurAppartenance:
+    """
+    Répond à « à quelle découpe / quel sous-réseau appartient cette IP » à partir de sous_reseau.
+    Le trie est construit une fois puis tenu à jour par rafraichir(), qui ne lit que les
+    sous-réseaux enregistrés depuis le dernier chargement (id_sous_reseau croissant) et recharge
+    les découpes modifiées entre-temps (sous-réseaux retirés, matérialisation : voir modification_decoupe).
+    Une découpe paramétrique (sans lignes sous_reseau) occupe un seul nœud, celui de son réseau
+    de base : le sous-réseau contenant l'IP s'en déduit par plan.index_de.
+    """
+
+    def __init__(self):
+        self.trie = TrieAppartenance()
+        self.noms_decoupes = {}
+        self.plans_parametriques = {}   # id_decoupe -> (nom, PlanDecoupe)
+        self._entrees = {}              # id_decoupe -> entrées du trie (debut << 8 | prefixe), pour les retirer
+        self._dernier_sous_reseau = 0
+        self._derniere_decoupe = 0      # plus grand id des découpes paramétriques chargées
+        self._version = None            # version de modification_decoupe au dernier rafraîchissement
+
+    def _inserer(self, debut, prefixe, id_decoupe):
+        self.trie.inserer(debut, prefixe, id_decoupe)
+        self._entrees.setdefault(id_decoupe, array("Q")).append(debut << 8 | prefixe)
+
+    def _recharger(self, cur, id_decoupe) -> int:
+        """Retire les entrées d'une découpe modifiée puis relit celles qui existent encore (leur nombre)"""
+        for entree in self._entrees.pop(id_decoupe, ()):
+            self.trie.retirer(entree >> 8, entree & 0xFF, id_decoupe)
+        self.plans_parametriques.pop(id_decoupe, None)
+        row = cur.execute(REQ_NOM_DECOUPE, (id_decoupe,)).fetchone()
+        if row is None:
+            self.noms_decoupes.pop(id_decoupe, None)
+            return 0
+
+        self.noms_decoupes[id_decoupe] = nom = row[0]
+        plan = plan_parametrique(id_decoupe)
+        if plan is not None:
+            self.plans_parametriques[id_decoupe] = (nom, plan)
+            self._inserer(plan.debut, plan.net.prefixlen, id_decoupe)
+        # Les lignes plus récentes que le dernier chargement sont lues ensuite avec les autres
+        for debut, prefixe in cur.execute(REQ_SOUS_RESEAUX_JUSQUA, (id_decoupe, self._dernier_sous_reseau)).fetchall():
+            self._inserer(debut, prefixe, id_decoupe)
+        return len(self._entrees.get(id_decoupe, ()))
+
+    def rafraichir(self) -> int:
+        """
+        Ajoute les sous-réseaux et découpes paramétriques ajoutés depuis le dernier appel et recharge
+        les découpes modifiées ; retourne le nombre d'entrées ajoutées ou rechargées.
+        """
+        cur = get_connection().cursor()
+        ajoutes = 0
+        version = cur.execute(REQ_VERSION_DECOUPES).fetchone()[0]
+        if self._version is not None and version > self._version:
+            modifiees = [row[0] for row in cur.execute(REQ_DECOUPES_MODIFIEES, (self._version,)).fetchall()]
+            for id_decoupe in modifiees:
+                ajoutes += self._recharger(cur, id_decoupe)
+        self._version = version
+
+        for id_decoupe, nom, plan in lister_plans_parametriques(self._derniere_decoupe):
+            self._derniere_decoupe = max(self._derniere_decoupe, id_decoupe)
+            if id_decoupe in self.plans_parametriques:
+                continue    # déjà rechargée ci-dessus
+            self.plans_parametriques[id_decoupe] = (nom, plan)
+            self.noms_decoupes[id_decoupe] = nom
+            self._inserer(plan.debut, plan.net.prefixlen, id_decoupe)
+            ajoutes += 1
+
+        cur.execute(
+            "SELECT id_sous_reseau, id_decoupe, debut, prefixe FROM sous_reseau WHERE id_sous_reseau > ?",
+            (self._dernier_sous_reseau,),
+        )
+        decoupes_vues = set()
+        for id_sous_reseau, id_decoupe, debut, prefixe in cur:
+            self._inserer(debut, prefixe, id_decoupe)
+            decoupes_vues.add(id_decoupe)
+            self._dernier_sous_reseau = max(self._dernier_sous_reseau, id_sous_reseau)
+            ajoutes += 1
+
+        nouvelles = decoupes_vues - self.noms_decoupes.keys()
+        if nouvelles:
+            marques = ",".join("?" * len(nouvelles))
+            cur.execute(f"SELECT id_decoupe, nom_decoupe FROM decoupe WHERE id_decoupe IN ({marques})",
+                        tuple(nouvelles))
+            self.noms_decoupes.update(cur.fetchall())
+        return ajoutes
+
+    def reconstruire(self):
+        """Repart de zéro (rafraichir suffit après une modification : voir _recharger)"""
+        self.__init__()
+        self.rafraichir()
+
+    def chercher(self, ip: str | int) -> list[tuple[str, ipaddress.IPv4Network]]:
+        """Retourne (nom_decoupe, sous-réseau) pour chaque sous-réseau enregistré contenant l'IP"""
+        valeur = int(ipaddress.IPv4Address(ip))
+        trouves = []
+        for id_decoupe, debut, prefixe in self.trie.chercher(valeur):
+            nom = self.noms_decoupes.get(id_decoupe, str(id_decoupe))
+            parametrique = self.plans_parametriques.get(id_decoupe)
+            if parametrique is None or prefixe != parametrique[1].net.prefixlen or debut != parametrique[1].debut:
+                trouves.append((prefixe, nom, debut))
+                continue
+            plan = parametrique[1]
+            try:
+                debut, _ = plan.bornes(plan.index_de(valeur))
+            except ValueError:
+                continue    # IP dans le réseau de base mais après le dernier sous-réseau de la découpe
+            trouves.append((plan.new_prefix, nom, debut))
+        # Une découpe matérialisée (ou en cours de matérialisation) a aussi ses lignes dans le trie
+        trouves = sorted(set(trouves), key=lambda t: (-t[0], t[1]))
+        return [(nom, ipaddress.IPv4Network((debut, prefixe))) for prefixe, nom, debut in trouves]
+
+    def verifier_lot(self, ips):
+        """
+        Génère (ip, résultats) pour chaque IP d'un itérable (lignes d'un fichier par ex.).
+        résultats vaut None si l'IP est invalide.
+        """
+        for ip in ips:
+            ip = ip.strip()
+            if not ip:
+                continue
+            try:
+                yield ip, self.chercher(ip)
+            except ValueError:
+                yield ip, None
+
+    def verifier_fichier(self, chemin):
+        """Comme verifier_lot, en lisant une IP par ligne dans un fichier (lecture en flux)"""
+        with open(chemin, encoding="utf-8") as fichier:
+            yield from self.verifier_lot(fichier)
+
+
+_moteur = None
+
+
+def moteur_appartenance() -> MoteurAppartenance:
+    """Moteur partagé, chargé au premier appel puis rafraîchi à chaque appel"""
+    global _moteur
+    if _moteur is None:
+        _moteur = MoteurAppartenance()
+    _moteur.rafraichir()
+    return _moteur
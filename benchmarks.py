@@ -0,0 +1,211 @@
+"""
+Mesures de performance des chemins critiques, comparées à des références enregistrées.
+
+    python benchmarks.py                  # mesure jusqu'à 10^5 lignes et compare aux références
+    python benchmarks.py --complet        # jusqu'à 10^6 lignes
+    python benchmarks.py --enregistrer    # remplace les références par les mesures
+    python benchmarks.py --tolerance 30 --filtre vlsm
+
+Le code de sortie vaut 1 si une mesure dépasse sa référence de plus de --tolerance %.
+Les références dépendent de la machine : les enregistrer sur la machine qui lance les mesures.
+"""
+import argparse
+import ipaddress
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+FICHIER_REFERENCES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks_reference.json")
+TOLERANCE_DEFAUT = 20       # ralentissement accepté par rapport à la référence, en %
+REPETITIONS = 5             # on garde le meilleur temps : le moins sensible au bruit de la machine
+TAILLES = (10**3, 10**4, 10**5, 10**6)
+TAILLE_MAX_RAPIDE = 10**5
+
+
+def mesurer(fonction, repetitions=REPETITIONS) -> float:
+    """Meilleur temps (en secondes) de repetitions appels de fonction()"""
+    meilleur = float("inf")
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur
+
+
+# =========================
+#   CAS MESURÉS
+# =========================
+# Chaque générateur produit des (nom, fonction, répétitions) ; la préparation (données,
+# base) est faite avant le yield et n'est donc pas mesurée.
+def cas_decoupe(taille_max):
+    from plan_decoupe import calculer_sous_reseaux
+
+    yield ("calculer_sous_reseaux /24 en 4 (+ lignes)",
+           lambda: list(calculer_sous_reseaux("192.168.1.0/24", nb_sous_reseaux=4)[0].lignes()), 200)
+
+    def page_au_hasard():
+        plan, _, _ = calculer_sous_reseaux("10.0.0.0/8", nb_ips_utilisables=2)
+        plan.page(plan.index_de("10.123.45.67") // 100)
+
+    yield "calculer_sous_reseaux /8 en /30 (+ page au hasard)", page_au_hasard, 200
+
+    plan, _, _ = calculer_sous_reseaux("10.0.0.0/8", nb_ips_utilisables=2)
+    for taille in TAILLES:
+        if taille <= taille_max:
+            yield (f"lignes_par_blocs /8 en /30, {taille} lignes",
+                   lambda taille=taille: sum(len(bloc) for bloc in plan.lignes_par_blocs(0, taille)), 3)
+
+
+def cas_classe(taille_max):
+    from verifier_classe import verifie_classfull, classifier_en_masse
+
+    aleatoire = random.Random(1)
+    nombre = min(taille_max, 10**5)
+    reseaux = [ipaddress.IPv4Network((aleatoire.getrandbits(32), aleatoire.randint(8, 30)), strict=False)
+               for _ in range(nombre)]
+    textes = [r.with_prefixlen for r in reseaux]
+    yield f"verifie_classfull x{nombre}", lambda: [verifie_classfull(r) for r in reseaux], 3
+    yield f"classifier_en_masse x{nombre}", lambda: classifier_en_masse(textes), 3
+
+
+def cas_vlsm(taille_max):
+    from verification_vlsm import verifier_possibilite_vlsm, allouer_vlsm
+
+    aleatoire = random.Random(2)
+    for taille in TAILLES:
+        if taille <= taille_max:
+            besoins = [aleatoire.choice((2, 6, 14, 30, 62)) for _ in range(taille)]
+            yield (f"verifier_possibilite_vlsm {taille} besoins",
+                   lambda b=besoins: verifier_possibilite_vlsm("10.0.0.0/8", None, b), 3)
+            yield f"allouer_vlsm {taille} besoins", lambda b=besoins: allouer_vlsm("10.0.0.0/8", None, b), 3
+
+
+def cas_base(taille_max):
+    """Enregistrement puis recherche dans une base temporaire (jamais reseau.db)"""
+    import database
+    from plan_decoupe import PlanDecoupe
+
+    base_application = database.DB_NAME
+    dossier = tempfile.TemporaryDirectory()
+    database.configurer_connexion(db_name=os.path.join(dossier.name, "benchmarks.db"))
+    try:
+        database.init_db()
+        conn = database.get_connection()
+        id_utilisateur = database.ajouter_utilisateur("benchmarks", "benchmarks")
+        net = ipaddress.ip_network("10.0.0.0/8")
+        essais = iter(range(10**9))
+
+        for taille in TAILLES:
+            if taille > taille_max:
+                continue
+            # taille /30 consécutifs, enregistrés ligne par ligne (pas en découpe paramétrique)
+            plan = PlanDecoupe(net, 30, taille)
+
+            def enregistrer(plan=plan, taille=taille):
+                database.enregistrer_decoupe(f"essai-{taille}-{next(essais)}", "classless",
+                                             str(net.network_address), str(net.netmask), 2, "classique",
+                                             id_utilisateur, plan, parametrique=False)
+
+            yield f"enregistrer_decoupe {taille} lignes", enregistrer, 1 if taille >= 10**6 else 3
+
+            # Les essais sont retirés : seule la découpe recherchée reste en base
+            conn.execute("DELETE FROM sous_reseau WHERE id_decoupe IN "
+                         "(SELECT id_decoupe FROM decoupe WHERE nom_decoupe LIKE 'essai-%')")
+            conn.execute("DELETE FROM decoupe WHERE nom_decoupe LIKE 'essai-%'")
+            conn.commit()
+
+            nom = f"recherche-{taille}"
+            database.enregistrer_decoupe(nom, "classless", str(net.network_address), str(net.netmask), 2,
+                                         "classique", id_utilisateur, plan, parametrique=False)
+            milieu = plan.bornes(taille // 2)[0]
+
+            def rechercher(nom=nom, milieu=milieu):
+                id_decoupe = database.rechercher_decoupe(nom, id_utilisateur)
+                database.page_sous_reseaux(id_decoupe, 0)
+                database.page_sous_reseaux(id_decoupe, database.debut_sous_reseau_contenant(id_decoupe, milieu))
+
+            yield f"rechercher_decoupe + 2 pages, découpe de {taille} lignes", rechercher, 200
+    finally:
+        database.configurer_connexion(db_name=base_application)
+        dossier.cleanup()
+
+
+CAS = (cas_decoupe, cas_classe, cas_vlsm, cas_base)
+
+
+# =========================
+#   RÉFÉRENCES
+# =========================
+def machine() -> str:
+    return f"{platform.machine()} {platform.processor() or platform.system()}, Python {platform.python_version()}"
+
+
+def charger_references(chemin=FICHIER_REFERENCES) -> dict:
+    if not os.path.exists(chemin):
+        return {"machine": None, "mesures": {}}
+    with open(chemin, encoding="utf-8") as fichier:
+        return json.load(fichier)
+
+
+def enregistrer_references(mesures, chemin=FICHIER_REFERENCES):
+    references = charger_references(chemin)
+    references["machine"] = machine()
+    references["mesures"].update(mesures)
+    with open(chemin, "w", encoding="utf-8") as fichier:
+        json.dump(references, fichier, indent=2, ensure_ascii=False, sort_keys=True)
+
+
+def executer(taille_max=TAILLE_MAX_RAPIDE, filtre=None):
+    """Génère (nom, secondes) pour chaque cas (dont le nom contient filtre)"""
+    for generateur in CAS:
+        for nom, fonction, repetitions in generateur(taille_max):
+            if filtre and filtre.lower() not in nom.lower():
+                continue
+            yield nom, mesurer(fonction, repetitions)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="benchmarks.py", description="Mesures de performance et régressions.")
+    parser.add_argument("--complet", action="store_true", help="jusqu'à 10^6 lignes (10^5 par défaut)")
+    parser.add_argument("--enregistrer", action="store_true", help="enregistre les mesures comme références")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE_DEFAUT,
+                        help=f"ralentissement accepté en %% (défaut : {TOLERANCE_DEFAUT})")
+    parser.add_argument("--filtre", help="seulement les cas dont le nom contient ce texte")
+    parser.add_argument("--references", default=FICHIER_REFERENCES, help="fichier des références (JSON)")
+    args = parser.parse_args(argv)
+
+    references = charger_references(args.references)
+    if references["machine"] and references["machine"] != machine():
+        print(f"Attention : références mesurées sur {references['machine']}, pas sur {machine()}.")
+
+    mesures, regressions = {}, []
+    print(f"{'cas':<58} {'mesure (ms)':>12} {'référence':>10} {'écart':>8}")
+    for nom, secondes in executer(TAILLES[-1] if args.complet else TAILLE_MAX_RAPIDE, args.filtre):
+        mesures[nom] = secondes
+        reference = references["mesures"].get(nom)
+        if reference is None:
+            print(f"{nom:<58} {secondes * 1000:12.2f} {'-':>10} {'nouveau':>8}")
+            continue
+        ecart = (secondes / reference - 1) * 100
+        statut = ""
+        if ecart > args.tolerance:
+            regressions.append(nom)
+            statut = "  RÉGRESSION"
+        print(f"{nom:<58} {secondes * 1000:12.2f} {reference * 1000:10.2f} {ecart:+7.1f}%{statut}")
+
+    if args.enregistrer:
+        enregistrer_references(mesures, args.references)
+        print(f"{len(mesures)} référence(s) enregistrée(s) dans {args.references}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} régression(s) au-delà de {args.tolerance:g} % : {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,422 @@
+"""
+Mode ligne de commande (sans interface graphique, Tk n'est jamais importé).
+
+Exemples :
+    python cli.py classe adresses.txt
+    python cli.py decoupe 10.0.0.0/8 --nb-sr 1024 --format jsonl
+    python cli.py decoupe --lot plans.csv --processus 8
+    python cli.py vlsm 192.168.1.0/24 100,50,30 --allouer
+    python cli.py recherche "Réseau bureau" --base reseau.db
+    cat ips.txt | python cli.py appartenance
+    python cli.py importer plans.csv --utilisateur alice
+    python cli.py sous-reseau "Réseau bureau" --prefixe 26 --utilisateur alice
+    python cli.py conflits --fichier reseaux.txt --dans 10.0.0.0/8
+    python cli.py mesures --jours 7 --operation decoupe
+    python cli.py retention --jours 30
+
+Les résultats sont écrits au fil de l'eau en CSV (par défaut) ou en JSON Lines.
+"""
+import argparse
+import csv
+import itertools
+import sys
+
+# Seuls des modules sans base ni calcul sont importés ici : chaque commande importe ce dont elle a besoin
+from export_decoupe import Sortie, COLONNES_EXPORT
+
+
+def _lire_lignes(chemin):
+    """Lignes non vides d'un fichier, ou de l'entrée standard si chemin vaut '-' ou None"""
+    fichier = sys.stdin if chemin in (None, "-") else open(chemin, encoding="utf-8")
+    try:
+        for ligne in fichier:
+            ligne = ligne.strip()
+            if ligne:
+                yield ligne
+    finally:
+        if fichier is not sys.stdin:
+            fichier.close()
+
+
+def _ouvrir_base(args):
+    """Ouvre la base (seulement pour les commandes qui en ont besoin)"""
+    import database
+
+    if args.base:
+        database.configurer_connexion(db_name=args.base)
+    database.init_db()
+    return database
+
+
+def _id_utilisateur(database, nom):
+    id_utilisateur = database.get_user_id(nom)
+    if id_utilisateur is None:
+        raise ValueError(f"Utilisateur '{nom}' introuvable.")
+    return id_utilisateur
+
+
+def _avertir_conflits(plan, id_decoupe, nom):
+    """Après un enregistrement : signale (sur stderr) les chevauchements avec les autres découpes"""
+    from analyse_conflits import conflits_nouveaux, intervalles_plan, resumer_conflits
+
+    texte = resumer_conflits(conflits_nouveaux(intervalles_plan(plan, nom), exclure=id_decoupe))
+    if texte:
+        print(f"Attention : la découpe '{nom}' chevauche des découpes enregistrées :\n{texte}", file=sys.stderr)
+
+
+# =========================
+#   COMMANDES
+# =========================
+def commande_classe(args, sortie_flux):
+    from verifier_classe import classifier_en_masse
+
+    sortie = Sortie(sortie_flux, args.format, ["entree", "classe"])
+    entrees = args.entrees or _lire_lignes(args.fichier)
+    bloc = []
+    for entree in entrees:
+        bloc.append(entree)
+        if len(bloc) >= 65536:
+            sortie.ecrire_tout((e, c.value) for e, c in zip(bloc, classifier_en_masse(bloc)))
+            bloc = []
+    sortie.ecrire_tout((e, c.value) for e, c in zip(bloc, classifier_en_masse(bloc)))
+    return 0
+
+
+def _plan_depuis_args(reseau, masque, nb_sr, nb_ip, classful):
+    from plan_decoupe import calculer_sous_reseaux, reseau_classful
+
+    if classful:
+        reseau, masque = reseau_classful(reseau), None
+    return calculer_sous_reseaux(reseau_de_base=reseau, nb_sous_reseaux=nb_sr,
+                                 masque=masque if "/" not in reseau else None, nb_ips_utilisables=nb_ip)
+
+
+def _entier_ou_none(texte):
+    texte = texte.strip() if texte else ""
+    return int(texte) if texte else None
+
+
+def commande_decoupe(args, sortie_flux):
+    if args.lot:
+        return _decoupe_lot(args, sortie_flux)
+    if not args.reseau:
+        raise ValueError("Réseau de base manquant (ou --lot FICHIER).")
+
+    plan, prefix, net = _plan_depuis_args(args.reseau, args.masque, args.nb_sr, args.nb_ip, args.classful)
+
+    if args.enregistrer:
+        database = _ouvrir_base(args)
+        id_decoupe = database.enregistrer_decoupe(
+            nom_decoupe=args.enregistrer,
+            mode="classful" if args.classful else "classless",
+            ip_reseau=str(net.network_address),
+            masque=str(net.netmask),
+            nb_ips_par_sr=args.nb_ip,
+            type_decoupe="classique",
+            id_utilisateur=_id_utilisateur(database, args.utilisateur),
+            plan=plan,
+        )
+        _avertir_conflits(plan, id_decoupe, args.enregistrer)
+
+    if args.resume:
+        sortie = Sortie(sortie_flux, args.format, ["reseau", "prefixe", "nombre_sous_reseaux"])
+        sortie.ecrire([net.with_prefixlen, prefix, len(plan)])
+        return 0
+
+    fin = len(plan) if args.limite is None else min(args.limite, len(plan))
+    _ecrire_plan(plan, fin, args, sortie_flux)
+    return 0
+
+
+def _ecrire_plan(plan, fin, args, sortie_flux):
+    """Écrit les fin premiers sous-réseaux ; un grand plan est mis en forme par plusieurs processus"""
+    from moteur_parallele import PlanParallele, nombre_processus
+
+    colonnes = ["sous_reseau", "reseau", "broadcast", "plage", "nb_hotes"]
+    sortie = Sortie(sortie_flux, args.format, colonnes)
+    processus = nombre_processus(fin, args.processus)
+    if processus == 1:
+        for bloc in plan.lignes_par_blocs(0, fin):
+            sortie.ecrire_tout(bloc)
+        return
+    for texte, nombre in PlanParallele(plan, processus).blocs_texte("lignes", args.format, colonnes, 0, fin):
+        sortie.ecrire_texte(texte, nombre)
+
+
+def _resume_lot(entree, classful):
+    """Ligne de résumé d'une découpe du lot (éventuellement calculée dans un autre processus)"""
+    champs = next(csv.reader([entree])) + [""] * 3
+    try:
+        plan, prefix, net = _plan_depuis_args(champs[0].strip(), champs[1].strip() or None,
+                                              _entier_ou_none(champs[2]), _entier_ou_none(champs[3]), classful)
+        return [entree, net.with_prefixlen, prefix, len(plan), ""]
+    except (ValueError, NotImplementedError) as e:
+        return [entree, "", "", "", str(e)]
+
+
+def _decoupe_lot(args, sortie_flux):
+    """Une découpe par ligne 'reseau[,masque[,nb_sr[,nb_ip]]]' : une ligne de résumé par plan"""
+    sortie = Sortie(sortie_flux, args.format, ["entree", "reseau", "prefixe", "nombre_sous_reseaux", "erreur"])
+    taches = ((entree, args.classful) for entree in _lire_lignes(args.lot))
+    if args.processus and args.processus > 1:
+        from moteur_parallele import executer_taches
+
+        resumes = executer_taches(_resume_lot, taches, args.processus)
+    else:
+        resumes = (_resume_lot(*tache) for tache in taches)
+    echecs = 0
+    for resume in resumes:
+        sortie.ecrire(resume)
+        echecs += bool(resume[4])
+    return 1 if echecs else 0
+
+
+def _besoins(valeurs):
+    besoins = []
+    for valeur in valeurs:
+        besoins.extend(int(b) for b in valeur.replace(";", ",").split(",") if b.strip())
+    return besoins
+
+
+def commande_vlsm(args, sortie_flux):
+    from verification_vlsm import verifier_possibilite_vlsm, allouer_vlsm, enregistrer_vlsm, calculer_bloc_ip
+
+    besoins = _besoins(args.besoins)
+    if not args.allouer:
+        possible, _ = verifier_possibilite_vlsm(args.reseau, args.masque, besoins)
+        sortie = Sortie(sortie_flux, args.format, ["besoins", "ips_requises", "possible"])
+        sortie.ecrire([len(besoins), sum(calculer_bloc_ip(b) for b in besoins), possible])
+        return 0 if possible else 1
+
+    plan = allouer_vlsm(args.reseau, args.masque, besoins)
+    if args.enregistrer:
+        database = _ouvrir_base(args)
+        id_decoupe = enregistrer_vlsm(args.enregistrer, plan, _id_utilisateur(database, args.utilisateur),
+                                      processus=args.processus)
+        _avertir_conflits(plan, id_decoupe, args.enregistrer)
+
+    _ecrire_plan(plan, len(plan), args, sortie_flux)
+    return 0
+
+
+def commande_recherche(args, sortie_flux):
+    from export_decoupe import blocs_decoupe
+
+    database = _ouvrir_base(args)
+    id_utilisateur = _id_utilisateur(database, args.utilisateur) if args.utilisateur else None
+    sortie = Sortie(sortie_flux, args.format, COLONNES_EXPORT)
+    for bloc in blocs_decoupe(args.nom, id_utilisateur):
+        sortie.ecrire_tout(bloc)
+    return 0
+
+
+def commande_sous_reseau(args, sortie_flux):
+    from allocateur_buddy import allouer_sous_reseau, liberer_sous_reseau
+
+    database = _ouvrir_base(args)
+    row = database.get_connection().execute(
+        database.REQ_DECOUPE_RESPONSABLE, (args.nom, _id_utilisateur(database, args.utilisateur))).fetchone()
+    if row is None:
+        raise ValueError(f"Aucune découpe nommée '{args.nom}' pour l'utilisateur '{args.utilisateur}'.")
+
+    # En cas d'échec (plus d'espace libre...), rien n'est écrit sur la sortie, pas même l'en-tête
+    if args.liberer:
+        liberer_sous_reseau(row[0], args.liberer)
+        ligne = [args.nom, args.liberer, "libéré"]
+    else:
+        ligne = [args.nom, allouer_sous_reseau(row[0], args.prefixe).with_prefixlen, "alloué"]
+    Sortie(sortie_flux, args.format, ["decoupe", "sous_reseau", "action"]).ecrire(ligne)
+    return 0
+
+
+def commande_appartenance(args, sortie_flux):
+    _ouvrir_base(args)
+    from appartenance_ip import moteur_appartenance
+
+    sortie = Sortie(sortie_flux, args.format, ["ip", "decoupe", "sous_reseau"])
+    for ip, appartenances in moteur_appartenance().verifier_lot(args.ips or _lire_lignes(args.fichier)):
+        if appartenances is None:
+            sortie.ecrire([ip, "", "IP invalide"])
+        elif not appartenances:
+            sortie.ecrire([ip, "", ""])
+        else:
+            for nom_decoupe, sous_reseau in appartenances:
+                sortie.ecrire([ip, nom_decoupe, sous_reseau.with_prefixlen])
+    return 0
+
+
+def commande_importer(args, sortie_flux):
+    from import_decoupe import importer_decoupes
+
+    database = _ouvrir_base(args)
+    resume = importer_decoupes(args.fichier, _id_utilisateur(database, args.utilisateur))
+    resume.afficher()
+    if args.rejets:
+        with open(args.rejets, "w", encoding="utf-8", newline="") as flux:
+            Sortie(flux, args.format, ["ligne", "raison"]).ecrire_tout(resume.rejets)
+    return 1 if resume.rejets else 0
+
+
+def commande_conflits(args, sortie_flux):
+    import analyse_conflits
+    from plan_decoupe import parser_reseau
+
+    database = _ouvrir_base(args)
+    if args.fichier:
+        # Liste de CIDR : chevauchements internes (et bornes avec --dans), puis contre les découpes enregistrées
+        intervalles = list(analyse_conflits.intervalles_cidr(_lire_lignes(args.fichier), args.fichier))
+        net = parser_reseau(args.dans, None) if args.dans else None
+        lignes = itertools.chain(analyse_conflits.analyser_intervalles(intervalles, net),
+                                 analyse_conflits.conflits_nouveaux(intervalles))
+    elif args.nom:
+        row = database.get_connection().execute(database.REQ_DECOUPE_PAR_NOM, (args.nom,)).fetchone()
+        if row is None:
+            raise ValueError(f"Aucune découpe nommée '{args.nom}'.")
+        lignes = analyse_conflits.conflits_decoupe(row[0])
+    else:
+        lignes = analyse_conflits.analyser_base()
+
+    sortie = Sortie(sortie_flux, args.format, analyse_conflits.COLONNES_CONFLITS)
+    types = args.types.split(",") if args.types else None
+    for ligne in lignes:
+        if types is None or ligne[0] in types:
+            sortie.ecrire(ligne)
+    return 1 if sortie.nombre else 0
+
+
+def commande_mesures(args, sortie_flux):
+    import mesures
+
+    _ouvrir_base(args)
+    if args.purger is not None:
+        print(f"{mesures.purger(args.purger)} mesure(s) supprimée(s).", file=sys.stderr)
+    sortie = Sortie(sortie_flux, args.format, mesures.COLONNES_RAPPORT)
+    sortie.ecrire_tout(mesures.rapport(args.jours, args.operation))
+    return 0
+
+
+def commande_retention(args, sortie_flux):
+    import retention_historique
+
+    _ouvrir_base(args)
+    archivees = retention_historique.appliquer_retention(args.jours, args.archive, args.lot)
+    sortie = Sortie(sortie_flux, args.format, ["table", "lignes_archivees"])
+    sortie.ecrire_tout(archivees.items())
+    return 0
+
+
+# =========================
+#   ARGUMENTS
+# =========================
+def creer_parser():
+    commun = argparse.ArgumentParser(add_help=False)
+    commun.add_argument("--format", choices=["csv", "jsonl"], default="csv", help="format de sortie (csv par défaut)")
+    commun.add_argument("--sortie", help="fichier de sortie (sortie standard par défaut)")
+    commun.add_argument("--base", help="fichier SQLite (reseau.db par défaut)")
+    commun.add_argument("--processus", type=int,
+                        help="processus de calcul (par défaut : tous les cœurs au-delà d'un million de sous-réseaux)")
+
+    parser = argparse.ArgumentParser(prog="cli.py", description="Outils réseau IPv4 en ligne de commande.")
+    commandes = parser.add_subparsers(dest="commande", required=True)
+
+    p = commandes.add_parser("classe", parents=[commun], help="classe (A/B/C, réservé, classless) de réseaux")
+    p.add_argument("entrees", nargs="*", help="réseaux (ex: 10.0.0.0/8) ; sinon lus dans --fichier ou stdin")
+    p.add_argument("--fichier", help="un réseau par ligne ('-' = entrée standard)")
+    p.set_defaults(fonction=commande_classe)
+
+    p = commandes.add_parser("decoupe", parents=[commun], help="découpe classique d'un réseau")
+    p.add_argument("reseau", nargs="?", help="réseau de base (ex: 192.168.1.0/24)")
+    p.add_argument("--masque", help="masque si le réseau n'est pas en CIDR (ex: 255.255.255.0 ou /24)")
+    p.add_argument("--nb-sr", type=int, help="nombre de sous-réseaux")
+    p.add_argument("--nb-ip", type=int, help="nombre d'IP utilisables par sous-réseau")
+    p.add_argument("--classful", action="store_true", help="masque déduit de la classe de l'IP")
+    p.add_argument("--limite", type=int, help="nombre maximal de sous-réseaux écrits")
+    p.add_argument("--resume", action="store_true", help="une seule ligne de résumé au lieu des sous-réseaux")
+    p.add_argument("--lot", help="une découpe 'reseau,masque,nb_sr,nb_ip' par ligne ('-' = entrée standard)")
+    p.add_argument("--enregistrer", metavar="NOM", help="enregistre la découpe sous ce nom")
+    p.add_argument("--utilisateur", help="propriétaire de la découpe enregistrée")
+    p.set_defaults(fonction=commande_decoupe)
+
+    p = commandes.add_parser("vlsm", parents=[commun], help="faisabilité ou allocation VLSM")
+    p.add_argument("reseau", help="réseau de base")
+    p.add_argument("besoins", nargs="+", help="nombres d'IP utilisables (ex: 100,50,30)")
+    p.add_argument("--masque", help="masque si le réseau n'est pas en CIDR")
+    p.add_argument("--allouer", action="store_true", help="écrit les sous-réseaux alloués")
+    p.add_argument("--enregistrer", metavar="NOM", help="enregistre l'allocation sous ce nom (avec --allouer)")
+    p.add_argument("--utilisateur", help="propriétaire de la découpe enregistrée")
+    p.set_defaults(fonction=commande_vlsm)
+
+    p = commandes.add_parser("recherche", parents=[commun], help="sous-réseaux d'une découpe enregistrée")
+    p.add_argument("nom", help="nom de la découpe")
+    p.add_argument("--utilisateur", help="vérifie que la découpe appartient à cet utilisateur")
+    p.set_defaults(fonction=commande_recherche)
+
+    p = commandes.add_parser("sous-reseau", parents=[commun],
+                             help="ajoute ou retire un sous-réseau d'une découpe enregistrée")
+    p.add_argument("nom", help="nom de la découpe")
+    action = p.add_mutually_exclusive_group(required=True)
+    action.add_argument("--prefixe", type=int, help="alloue le plus bas /PREFIXE libre")
+    action.add_argument("--liberer", metavar="RESEAU", help="retire ce sous-réseau (ex: 10.0.0.64/26)")
+    p.add_argument("--utilisateur", required=True, help="propriétaire de la découpe")
+    p.set_defaults(fonction=commande_sous_reseau)
+
+    p = commandes.add_parser("appartenance", parents=[commun], help="découpes contenant des IP")
+    p.add_argument("ips", nargs="*", help="adresses IP ; sinon lues dans --fichier ou stdin")
+    p.add_argument("--fichier", help="une IP par ligne ('-' = entrée standard)")
+    p.set_defaults(fonction=commande_appartenance)
+
+    p = commandes.add_parser("importer", parents=[commun], help="importe des plans d'adressage depuis un CSV")
+    p.add_argument("fichier", help="CSV : nom_decoupe, reseau, sous_reseau (+ masque, mode facultatifs)")
+    p.add_argument("--utilisateur", required=True, help="propriétaire des découpes importées")
+    p.add_argument("--rejets", help="écrit les lignes rejetées (n° de ligne, raison) dans ce fichier")
+    p.set_defaults(fonction=commande_importer)
+
+    p = commandes.add_parser("conflits", parents=[commun],
+                             help="chevauchements, trous et sous-réseaux hors bornes des découpes")
+    p.add_argument("--nom", help="seulement cette découpe (contre toutes les autres)")
+    p.add_argument("--fichier", help="liste de CIDR à vérifier, un par ligne ('-' = entrée standard)")
+    p.add_argument("--dans", metavar="RESEAU", help="réseau de base de la liste (trous et hors bornes)")
+    p.add_argument("--types", help="types gardés, séparés par des virgules (ex: chevauchement,hors bornes)")
+    p.set_defaults(fonction=commande_conflits)
+
+    p = commandes.add_parser("mesures", parents=[commun],
+                             help="durées p50/p95/p99 par étape et par taille de plan (RESEAU_MESURES=1)")
+    p.add_argument("--jours", type=int, help="seulement les mesures des N derniers jours")
+    p.add_argument("--operation", help="seulement cette opération (ex: decoupe, vlsm)")
+    p.add_argument("--purger", type=int, metavar="JOURS", help="supprime d'abord les mesures de plus de JOURS jours")
+    p.set_defaults(fonction=commande_mesures)
+
+    p = commandes.add_parser("retention", parents=[commun],
+                             help="agrège et archive l'historique et le journal des connexions anciens")
+    p.add_argument("--jours", type=int, default=90, help="lignes détaillées gardées (90 derniers jours par défaut)")
+    p.add_argument("--archive", help="base d'archive (par défaut : <base>_archive.db)")
+    p.add_argument("--lot", type=int, default=500, help="lignes archivées par transaction (500 par défaut)")
+    p.set_defaults(fonction=commande_retention)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = creer_parser()
+    args = parser.parse_args(argv)
+    if args.commande == "vlsm" and args.enregistrer and not args.allouer:
+        parser.error("--enregistrer nécessite --allouer (seule une allocation peut être enregistrée).")
+    if getattr(args, "enregistrer", None) and not args.utilisateur:
+        print("Erreur : --enregistrer nécessite --utilisateur.", file=sys.stderr)
+        return 2
+
+    sortie_flux = open(args.sortie, "w", encoding="utf-8", newline="") if args.sortie else sys.stdout
+    try:
+        return args.fonction(args, sortie_flux)
+    except BrokenPipeError:
+        return 0
+    except (ValueError, NotImplementedError, OSError) as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        return 1
+    finally:
+        if sortie_flux is not sys.stdout:
+            sortie_flux.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
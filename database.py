@@ -1,77 +1,234 @@
 import sqlite3
 import hashlib
+import ipaddress
+import itertools
+import threading
 import session
+from migrations import appliquer_migrations
+from plan_decoupe import PlanDecoupe, enregistrement_sous_reseau
 
 DB_NAME = "reseau.db"
 
+# Réglages de la connexion partagée (voir configurer_connexion)
+CACHE_SIZE_KIO = 64 * 1024          # cache de pages SQLite, en Kio
+MMAP_SIZE = 256 * 1024 * 1024       # taille de la projection mémoire du fichier
+CACHED_STATEMENTS = 256             # requêtes préparées gardées en cache par connexion
+
+# Nombre de sous-réseaux insérés (et validés) par transaction
+TAILLE_LOT_DEFAUT = 5000
+
+# Requêtes partagées (leurs plans d'exécution sont vérifiés par migrations.verifier_plans_requetes)
+REQ_UTILISATEUR_PAR_NOM = "SELECT id_utilisateur, mot_de_passe_hash FROM utilisateur WHERE nom_utilisateur = ?"
+REQ_DECOUPE_PAR_NOM = "SELECT id_decoupe, id_responsable FROM decoupe WHERE nom_decoupe = ?"
+REQ_SOUS_RESEAUX_DECOUPE = """
+    SELECT ip_reseau, masque, ip_debut, ip_fin, ip_broadcast, nb_ips
+    FROM sous_reseau
+    WHERE id_decoupe = ?
+"""
+# Pagination par clé des sous-réseaux d'une découpe, dans l'ordre des adresses : la clé est (debut, id_sous_reseau),
+# debut seul n'étant pas unique dans une découpe (index (id_decoupe, debut, id_sous_reseau))
+REQ_SOUS_RESEAUX_PAGE = """
+    SELECT ip_reseau, masque, ip_debut, ip_fin, ip_broadcast, nb_ips, debut, id_sous_reseau
+    FROM sous_reseau
+    WHERE id_decoupe = ? AND (debut, id_sous_reseau) > (?, ?)
+    ORDER BY debut, id_sous_reseau
+    LIMIT ?
+"""
+REQ_SOUS_RESEAUX_PAGE_PRECEDENTE = """
+    SELECT ip_reseau, masque, ip_debut, ip_fin, ip_broadcast, nb_ips, debut, id_sous_reseau
+    FROM sous_reseau
+    WHERE id_decoupe = ? AND (debut, id_sous_reseau) < (?, ?)
+    ORDER BY debut DESC, id_sous_reseau DESC
+    LIMIT ?
+"""
+REQ_SOUS_RESEAU_DEBUT_AVANT = "SELECT MAX(debut) FROM sous_reseau WHERE id_decoupe = ? AND debut <= ?"
+REQ_DECOUPES_RESPONSABLE = """
+    SELECT id_decoupe, nom_decoupe, ip_reseau, masque, type_decoupe, date_creation
+    FROM decoupe
+    WHERE id_responsable = ?
+"""
+REQ_HISTORIQUE_UTILISATEUR = """
+    SELECT type_test, entree, resultat, est_valide, date_test
+    FROM historique_tests
+    WHERE id_utilisateur = ?
+    ORDER BY date_test DESC
+"""
+REQ_SOUS_RESEAUX_CONTENANT = """
+    SELECT d.nom_decoupe, s.ip_reseau, s.prefixe
+    FROM sous_reseau s JOIN decoupe d ON d.id_decoupe = s.id_decoupe
+    WHERE s.debut IN ({marques}) AND s.fin >= ?
+    ORDER BY s.prefixe DESC
+"""
+REQ_SOUS_RESEAUX_DANS = """
+    SELECT d.nom_decoupe, s.ip_reseau, s.prefixe
+    FROM sous_reseau s JOIN decoupe d ON d.id_decoupe = s.id_decoupe
+    WHERE s.debut BETWEEN ? AND ? AND s.fin <= ?
+    ORDER BY s.debut
+"""
+# Recherche paginée des découpes d'un responsable (pagination par clé : on repart après la dernière ligne vue)
+COLONNES_RECHERCHE = "id_decoupe, nom_decoupe, ip_reseau, masque, type_decoupe, nombre_sous_reseaux"
+REQ_DECOUPES_PREFIXE_NOM = f"""
+    SELECT {COLONNES_RECHERCHE}
+    FROM decoupe
+    WHERE id_responsable = ?
+      AND nom_decoupe >= ? COLLATE NOCASE AND nom_decoupe < ? COLLATE NOCASE
+      AND (nom_decoupe > ? COLLATE NOCASE OR (nom_decoupe = ? COLLATE NOCASE AND id_decoupe > ?))
+    ORDER BY nom_decoupe COLLATE NOCASE, id_decoupe
+    LIMIT ?
+"""
+REQ_DECOUPES_PREFIXE_IP = f"""
+    SELECT {COLONNES_RECHERCHE}
+    FROM decoupe
+    WHERE id_responsable = ? AND ip_reseau >= ? AND ip_reseau < ? AND (ip_reseau, id_decoupe) > (?, ?)
+    ORDER BY ip_reseau, id_decoupe
+    LIMIT ?
+"""
+REQ_DECOUPES_PLEIN_TEXTE = f"""
+    SELECT {", ".join("d." + c for c in COLONNES_RECHERCHE.split(", "))}
+    FROM (SELECT rowid FROM decoupe_fts WHERE decoupe_fts MATCH ?) f
+    CROSS JOIN decoupe d ON d.id_decoupe = f.rowid
+    WHERE d.id_responsable = ?
+      AND (d.nom_decoupe > ? COLLATE NOCASE OR (d.nom_decoupe = ? COLLATE NOCASE AND d.id_decoupe > ?))
+    ORDER BY d.nom_decoupe COLLATE NOCASE, d.id_decoupe
+    LIMIT ?
+"""
+REQ_DECOUPE_RESPONSABLE = "SELECT id_decoupe FROM decoupe WHERE nom_decoupe = ? AND id_responsable = ?"
+# Découpe du même nom dont l'enregistrement a pu être interrompu (comparée au plan à enregistrer)
+REQ_DECOUPE_A_REPRENDRE = """
+    SELECT id_decoupe, id_responsable, ip_reseau, masque, nombre_sous_reseaux, nombre_ips_par_sr, type_decoupe,
+           nouveau_prefixe, empreinte
+    FROM decoupe WHERE nom_decoupe = ?
+"""
+
+# Découpes paramétriques (nouveau_prefixe non NULL) : leurs sous-réseaux ne sont pas stockés
+REQ_PARAMETRES_DECOUPE = """
+    SELECT ip_reseau, masque, nouveau_prefixe, nombre_sous_reseaux FROM decoupe WHERE id_decoupe = ?
+"""
+REQ_DECOUPES_PARAMETRIQUES = """
+    SELECT id_decoupe, nom_decoupe, ip_reseau, masque, nouveau_prefixe, nombre_sous_reseaux
+    FROM decoupe
+    WHERE nouveau_prefixe IS NOT NULL
+"""
+REQ_DECOUPES_PARAMETRIQUES_DEPUIS = REQ_DECOUPES_PARAMETRIQUES + "    AND id_decoupe > ?\n"
+# Plage [debut_plage, fin_plage] couverte par une découpe paramétrique (index (debut_plage, fin_plage)) :
+# celles qui commencent dans une plage, et celles dont le réseau de base (bloc aligné) englobe son début
+REQ_PLANS_PLAGE = REQ_DECOUPES_PARAMETRIQUES + "    AND debut_plage BETWEEN ? AND ?\n"
+REQ_PLANS_ENGLOBANT = REQ_DECOUPES_PARAMETRIQUES + "    AND debut_plage IN ({marques}) AND fin_plage >= ?\n"
+REQ_NOM_DECOUPE = "SELECT nom_decoupe FROM decoupe WHERE id_decoupe = ?"
+REQ_BASE_DECOUPE = "SELECT nom_decoupe, ip_reseau, masque FROM decoupe WHERE id_decoupe = ?"
+
+# Découpes modifiées depuis une version (voir migrations._v12_modifications_decoupes et appartenance_ip)
+REQ_VERSION_DECOUPES = "SELECT IFNULL(MAX(version), 0) FROM modification_decoupe"
+REQ_DECOUPES_MODIFIEES = "SELECT id_decoupe FROM modification_decoupe WHERE version > ? ORDER BY version"
+REQ_SOUS_RESEAUX_JUSQUA = "SELECT debut, prefixe FROM sous_reseau WHERE id_decoupe = ? AND id_sous_reseau <= ?"
+
+# Espace libre des découpes (voir allocateur_buddy) : un bloc aligné libre par ligne
+REQ_ESPACE_LIBRE_SUIVI = "SELECT 1 FROM espace_libre WHERE id_decoupe = ?"
+REQ_SUIVRE_ESPACE_LIBRE = "INSERT INTO espace_libre (id_decoupe) VALUES (?)"
+REQ_BLOC_LIBRE_PLUS_BAS = "SELECT MIN(debut) FROM bloc_libre WHERE id_decoupe = ? AND prefixe = ?"
+REQ_AJOUTER_BLOC_LIBRE = "INSERT INTO bloc_libre (id_decoupe, prefixe, debut) VALUES (?, ?, ?)"
+REQ_RETIRER_BLOC_LIBRE = "DELETE FROM bloc_libre WHERE id_decoupe = ? AND prefixe = ? AND debut = ?"
+REQ_ESPACE_LIBRE_TOTAL = "SELECT SUM(1 << (32 - prefixe)) FROM bloc_libre WHERE id_decoupe = ?"
+
+# Intervalles [debut, fin] des sous-réseaux, pour l'analyse des chevauchements (index (debut, fin))
+REQ_INTERVALLES_TOUS = "SELECT debut, fin, id_decoupe FROM sous_reseau ORDER BY debut"
+REQ_INTERVALLES_PLAGE = "SELECT debut, fin, id_decoupe FROM sous_reseau WHERE debut BETWEEN ? AND ? ORDER BY debut"
+REQ_INTERVALLES_ENGLOBANT = "SELECT debut, fin, id_decoupe FROM sous_reseau WHERE debut IN ({marques}) AND fin >= ?"
+REQ_INTERVALLES_DECOUPE = "SELECT debut, fin FROM sous_reseau WHERE id_decoupe = ? ORDER BY debut"
+REQ_BASES_DECOUPES = "SELECT id_decoupe, nom_decoupe, ip_reseau, masque FROM decoupe"
+REQ_INSERT_MESURE = "INSERT INTO mesure_etape (operation, etape, taille, duree_ms, succes) VALUES (?, ?, ?, ?, ?)"
+REQ_MESURES_DEPUIS = """
+SELECT operation, etape, taille, duree_ms FROM mesure_etape
+WHERE date_mesure >= datetime('now', ?)
+"""
+REQ_PURGER_MESURES = "DELETE FROM mesure_etape WHERE date_mesure < datetime('now', ?)"
+
+# Rétention (voir retention_historique) : lignes antérieures au jour date('now', ?), les plus anciennes d'abord
+REQ_HISTORIQUE_ANCIEN = """
+SELECT id_test FROM historique_tests WHERE date_test < date('now', ?) ORDER BY date_test LIMIT ?
+"""
+REQ_CONNEXIONS_ANCIENNES = """
+SELECT id_log FROM connexion_log WHERE date_connexion < date('now', ?) ORDER BY date_connexion LIMIT ?
+"""
+REQ_AGREGER_HISTORIQUE = """
+INSERT INTO historique_quotidien (jour, id_utilisateur, type_test, nombre, nombre_valides)
+SELECT date(date_test), IFNULL(id_utilisateur, 0), type_test, COUNT(*), SUM(est_valide = 1)
+FROM historique_tests WHERE id_test IN ({marques})
+GROUP BY 1, 2, 3
+ON CONFLICT (jour, id_utilisateur, type_test) DO UPDATE SET
+    nombre = nombre + excluded.nombre, nombre_valides = nombre_valides + excluded.nombre_valides
+"""
+REQ_AGREGER_CONNEXIONS = """
+INSERT INTO connexion_quotidienne (jour, id_utilisateur, statut, nombre)
+SELECT date(date_connexion), IFNULL(id_utilisateur, 0), IFNULL(statut, ''), COUNT(*)
+FROM connexion_log WHERE id_log IN ({marques})
+GROUP BY 1, 2, 3
+ON CONFLICT (jour, id_utilisateur, statut) DO UPDATE SET nombre = nombre + excluded.nombre
+"""
+REQ_ARCHIVER_HISTORIQUE = """
+INSERT OR IGNORE INTO archive.historique_tests
+    (id_test, type_test, entree, resultat, est_valide, date_test, id_utilisateur)
+SELECT id_test, type_test, entree, resultat, est_valide, date_test, id_utilisateur
+FROM main.historique_tests WHERE id_test IN ({marques})
+"""
+REQ_ARCHIVER_CONNEXIONS = """
+INSERT OR IGNORE INTO archive.connexion_log (id_log, id_utilisateur, statut, date_connexion, adresse_ip_client)
+SELECT id_log, id_utilisateur, statut, date_connexion, adresse_ip_client
+FROM main.connexion_log WHERE id_log IN ({marques})
+"""
+REQ_SUPPRIMER_HISTORIQUE = "DELETE FROM main.historique_tests WHERE id_test IN ({marques})"
+REQ_SUPPRIMER_CONNEXIONS = "DELETE FROM main.connexion_log WHERE id_log IN ({marques})"
+
+
+_local = threading.local()
+
+
+def configurer_connexion(db_name=None, cache_size_kio=None, mmap_size=None, cached_statements=None):
+    """Modifie les réglages des connexions ; la connexion du thread courant est rouverte au prochain appel"""
+    global DB_NAME, CACHE_SIZE_KIO, MMAP_SIZE, CACHED_STATEMENTS
+    if db_name is not None:
+        DB_NAME = db_name
+    if cache_size_kio is not None:
+        CACHE_SIZE_KIO = cache_size_kio
+    if mmap_size is not None:
+        MMAP_SIZE = mmap_size
+    if cached_statements is not None:
+        CACHED_STATEMENTS = cached_statements
+    fermer_connexion()
+
 
 def get_connection():
-    """Crée la connexion vers la base SQLite"""
-    return sqlite3.connect(DB_NAME)
+    """
+    Retourne la connexion SQLite du thread courant.
+    Elle est ouverte et réglée (WAL, synchronous=NORMAL, cache, mmap) au premier appel
+    puis réutilisée : les appelants ne doivent pas la fermer.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.db_name == DB_NAME:
+        return conn
+    fermer_connexion()
 
+    conn = sqlite3.connect(DB_NAME, cached_statements=CACHED_STATEMENTS)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = {-int(CACHE_SIZE_KIO)}")
+    conn.execute(f"PRAGMA mmap_size = {int(MMAP_SIZE)}")
+    _local.conn = conn
+    _local.db_name = DB_NAME
+    return conn
+
+
+def fermer_connexion():
+    """Ferme la connexion du thread courant (à appeler à l'arrêt de l'application ou d'un thread)"""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
 
-def init_db():
-    """Crée les tables si elles n'existent pas"""
-    conn = get_connection()
-    cur = conn.cursor()
 
-    cur.executescript("""
-    CREATE TABLE IF NOT EXISTS utilisateur (
-        id_utilisateur INTEGER PRIMARY KEY AUTOINCREMENT,
-        nom_utilisateur TEXT UNIQUE NOT NULL,
-        mot_de_passe_hash TEXT NOT NULL,
-        date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
-
-    CREATE TABLE IF NOT EXISTS decoupe (
-        id_decoupe INTEGER PRIMARY KEY AUTOINCREMENT,
-        nom_decoupe TEXT UNIQUE NOT NULL,
-        mode TEXT CHECK(mode IN ('classful','classless')) NOT NULL,
-        ip_reseau TEXT NOT NULL,
-        masque TEXT NOT NULL,
-        nombre_sous_reseaux INTEGER,
-        nombre_ips_par_sr INTEGER,
-        type_decoupe TEXT CHECK(type_decoupe IN ('classique','vlsm')) NOT NULL,
-        date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        id_responsable INTEGER NOT NULL,
-        FOREIGN KEY(id_responsable) REFERENCES utilisateur(id_utilisateur)
-    );
-
-    CREATE TABLE IF NOT EXISTS sous_reseau (
-        id_sous_reseau INTEGER PRIMARY KEY AUTOINCREMENT,
-        id_decoupe INTEGER NOT NULL,
-        ip_reseau TEXT NOT NULL,
-        masque TEXT NOT NULL,
-        ip_debut TEXT NOT NULL,
-        ip_fin TEXT NOT NULL,
-        ip_broadcast TEXT NOT NULL,
-        nb_ips INTEGER,
-        FOREIGN KEY(id_decoupe) REFERENCES decoupe(id_decoupe)
-    );
-
-    CREATE TABLE IF NOT EXISTS historique_tests (
-        id_test INTEGER PRIMARY KEY AUTOINCREMENT,
-        type_test TEXT NOT NULL,
-        entree TEXT NOT NULL,
-        resultat TEXT,
-        est_valide BOOLEAN,
-        date_test TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        id_utilisateur INTEGER,
-        FOREIGN KEY(id_utilisateur) REFERENCES utilisateur(id_utilisateur)
-    );
-
-    CREATE TABLE IF NOT EXISTS connexion_log (
-        id_log INTEGER PRIMARY KEY AUTOINCREMENT,
-        id_utilisateur INTEGER,
-        statut TEXT CHECK(statut IN ('succès','échec')),
-        date_connexion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        adresse_ip_client TEXT,
-        FOREIGN KEY(id_utilisateur) REFERENCES utilisateur(id_utilisateur)
-    );
-    """)
-
-    conn.commit()
-    conn.close()
+def init_db():
+    """Met le schéma à jour (aucune DDL si la base est déjà à la dernière version)"""
+    appliquer_migrations(get_connection())
 
 
 # --- FONCTIONS UTILISATEUR ---
@@ -85,8 +242,8 @@ def hash_password(password: str) -> str:
 
 def ajouter_utilisateur(nom, mot_de_passe):
     """Ajoute un utilisateur à la base et retourne son ID"""
+    conn = get_connection()
     try:
-        conn = get_connection()
         cur = conn.cursor()
         cur.execute(
             "INSERT INTO utilisateur (nom_utilisateur, mot_de_passe_hash) VALUES (?, ?)",
@@ -94,59 +251,404 @@ def ajouter_utilisateur(nom, mot_de_passe):
         )
         conn.commit()
         user_id = cur.lastrowid  # Récupère l'ID généré
-        conn.close()
         return user_id
     except sqlite3.IntegrityError:
+        conn.rollback()
         return None
 
 def get_user_id(nom):
     """Retourne l'ID d'un utilisateur existant"""
     conn = get_connection()
     cur = conn.cursor()
-    cur.execute("SELECT id_utilisateur FROM utilisateur WHERE nom_utilisateur = ?", (nom,))
+    cur.execute(REQ_UTILISATEUR_PAR_NOM, (nom,))
     row = cur.fetchone()
-    conn.close()
     return row[0] if row else None
 
 
 def verifier_identifiants(nom, mot_de_passe):
-    """Vérifie si le nom et mot de passe sont valides"""
+    """Vérifie si le nom et mot de passe sont valides (une seule requête : hash et ID)"""
     conn = get_connection()
     cur = conn.cursor()
-    cur.execute(
-        "SELECT mot_de_passe_hash FROM utilisateur WHERE nom_utilisateur = ?",
-        (nom,),
-    )
+    cur.execute(REQ_UTILISATEUR_PAR_NOM, (nom,))
     row = cur.fetchone()
-    conn.close()
-    if row and row[0] == hash_password(mot_de_passe):
-        session.utilisateur_connecte_id = get_user_id(nom)
+    if row and row[1] == hash_password(mot_de_passe):
+        session.utilisateur_connecte_id = row[0]
         return True
     return False
 
 
 # --- FONCTIONS HISTORIQUE ---
 def ajouter_test_historique(type_test, entree, resultat, est_valide, id_utilisateur):
-    """Ajoute une entrée à l'historique des tests."""
+    """
+    Ajoute une entrée à l'historique des tests.
+    L'écriture est faite en arrière-plan par journal_historique (sans bloquer l'interface).
+    """
 
     # Sécurité : ne rien faire si l'utilisateur n'est pas connecté
     if id_utilisateur is None:
         print("Avertissement: Tentative de log sans id_utilisateur.")
         return
 
+    from journal_historique import journal
+    journal.ajouter(type_test, entree, resultat, est_valide, id_utilisateur)
+
+
+def lister_historique(id_utilisateur, limite=100):
+    """Retourne les derniers tests d'un utilisateur (le plus récent en premier)"""
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(REQ_HISTORIQUE_UTILISATEUR + " LIMIT ?", (id_utilisateur, limite))
+    rows = cur.fetchall()
+    return rows
+
+
+# --- FONCTIONS DECOUPE ---
+def lister_decoupes(id_responsable):
+    """Retourne les découpes d'un utilisateur"""
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(REQ_DECOUPES_RESPONSABLE, (id_responsable,))
+    rows = cur.fetchall()
+    return rows
+
+
+def rechercher_decoupe(nom_decoupe, id_responsable):
+    """Retourne l'id de la découpe de ce responsable portant ce nom (filtré en SQL), ou None"""
+    cur = get_connection().cursor()
+    cur.execute(REQ_DECOUPE_RESPONSABLE, (nom_decoupe, id_responsable))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def _cle_page(valeur):
+    """Clé (debut, id_sous_reseau) ; une adresse seule vaut (adresse, -1) : avant toutes les lignes qui y commencent"""
+    return (valeur, -1) if isinstance(valeur, int) else tuple(valeur)
+
+
+def page_sous_reseaux(id_decoupe, depuis=0, avant=None, limite=100):
+    """
+    Une page de sous-réseaux d'une découpe, triés par adresse (pagination par clé sur (debut, id_sous_reseau)) :
+      - depuis : les limite premiers sous-réseaux après cette clé (une adresse : ceux dont le début est >= depuis)
+      - avant  : les limite derniers sous-réseaux avant cette clé (une adresse : dont le début est < avant)
+    Retourne (lignes, il_y_a_une_suite) ; chaque ligne se termine par debut et id_sous_reseau :
+    ligne[-2:] est sa clé (id_sous_reseau vaut 0 pour une découpe paramétrique, sans lignes stockées).
+    """
+    plan = plan_parametrique(id_decoupe)
+    if plan is not None:
+        return _page_plan(plan, depuis, avant, limite)
+
+    cur = get_connection().cursor()
+    if avant is not None:
+        cur.execute(REQ_SOUS_RESEAUX_PAGE_PRECEDENTE, (id_decoupe, *_cle_page(avant), limite + 1))
+        lignes = cur.fetchall()
+        suite = len(lignes) > limite
+        return lignes[:limite][::-1], suite
+
+    cur.execute(REQ_SOUS_RESEAUX_PAGE, (id_decoupe, *_cle_page(depuis), limite + 1))
+    lignes = cur.fetchall()
+    return lignes[:limite], len(lignes) > limite
+
+
+def _page_plan(plan, depuis, avant, limite):
+    """Même page que page_sous_reseaux, calculée depuis un PlanDecoupe (index = (adresse - début) / taille)"""
+    def index_premier_a_partir_de(adresse):
+        return min(max(0, -(-(adresse - plan.debut) // plan.taille)), len(plan))
+
+    # Les lignes d'un plan ont pour clé (debut, 0)
+    if avant is not None:
+        adresse, id_ligne = _cle_page(avant)
+        fin = index_premier_a_partir_de(adresse + (id_ligne > 0))
+        debut, suite = max(0, fin - limite), fin - limite > 0
+    else:
+        adresse, id_ligne = _cle_page(depuis)
+        debut = index_premier_a_partir_de(adresse + (id_ligne >= 0))
+        fin = min(debut + limite, len(plan))
+        suite = fin < len(plan)
+    lignes = [(*e[:7], 0) for e in itertools.islice(plan.enregistrements(debut), fin - debut)]
+    return lignes, suite
+
+
+def debut_sous_reseau_contenant(id_decoupe, ip):
+    """Début du sous-réseau de la découpe qui contient ip (ou du dernier avant ip) ; ip s'il n'y en a pas"""
+    valeur = int(ipaddress.IPv4Address(ip))
+    plan = plan_parametrique(id_decoupe)
+    if plan is not None:
+        if valeur < plan.debut or not len(plan):
+            return valeur
+        return plan.debut + min((valeur - plan.debut) // plan.taille, len(plan) - 1) * plan.taille
+
+    cur = get_connection().cursor()
+    cur.execute(REQ_SOUS_RESEAU_DEBUT_AVANT, (id_decoupe, valeur))
+    debut = cur.fetchone()[0]
+    return valeur if debut is None else debut
+
+
+def _borne_prefixe(prefixe):
+    """Plus petite chaîne supérieure à toutes celles qui commencent par prefixe"""
+    return prefixe + "\U0010ffff"
+
+
+def _requete_plein_texte(texte):
+    """
+    'bureau lyo' -> '"bureau"* "lyo"*' (chaque mot est un préfixe, tous doivent être présents).
+    Chaîne vide si le texte n'a aucun mot (ex: '"') : FTS5 refuse une requête MATCH vide.
+    """
+    mots = texte.replace('"', " ").split()
+    return " ".join(f'"{mot}"*' for mot in mots)
+
+
+def fts_disponible():
+    conn = get_connection()
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'decoupe_fts'").fetchone() is not None
+
+
+def rechercher_decoupes(id_responsable, texte="", apres=None, limite=20):
+    """
+    Recherche parmi les découpes d'un responsable (filtrées en SQL), par index uniquement :
+      - texte fait de chiffres et de points : préfixe du réseau de base (ex: '192.168.')
+      - sinon : mots du nom (FTS5, chaque mot pris comme préfixe), ou préfixe du nom sans FTS5
+        ou quand le texte n'a aucun mot (ex: '"')
+    apres est la clé renvoyée par l'appel précédent, pour la page suivante.
+    Retourne (lignes, clé de la page suivante ou None).
+    Lignes : (id_decoupe, nom_decoupe, ip_reseau, masque, type_decoupe, nombre_sous_reseaux).
+    """
+    texte = texte.strip()
+    cur = get_connection().cursor()
+
+    if texte and all(c.isdigit() or c == "." for c in texte):
+        cle = apres or ("", 0)
+        cur.execute(REQ_DECOUPES_PREFIXE_IP, (id_responsable, texte, _borne_prefixe(texte), *cle, limite + 1))
+        lignes = cur.fetchall()
+        suivante = (lignes[limite - 1][2], lignes[limite - 1][0]) if len(lignes) > limite else None
+        return lignes[:limite], suivante
+
+    nom, id_decoupe = apres or ("", 0)
+    requete = _requete_plein_texte(texte)
+    if requete and fts_disponible():
+        cur.execute(REQ_DECOUPES_PLEIN_TEXTE, (requete, id_responsable, nom, nom, id_decoupe, limite + 1))
+    else:
+        cur.execute(REQ_DECOUPES_PREFIXE_NOM, (id_responsable, nom or texte,
+                                               _borne_prefixe(texte), nom, nom, id_decoupe, limite + 1))
+    lignes = cur.fetchall()
+    suivante = (lignes[limite - 1][1], lignes[limite - 1][0]) if len(lignes) > limite else None
+    return lignes[:limite], suivante
+
+
+def enregistrer_decoupe(nom_decoupe, mode, ip_reseau, masque, nb_ips_par_sr, type_decoupe, id_utilisateur, plan,
+                        taille_lot=TAILLE_LOT_DEFAUT, progression=None, parametrique=True):
+    """
+    Enregistre une découpe et ses sous-réseaux par lots (executemany, un commit par lot).
+    plan doit fournir len() et enregistrements(debut) (ex: PlanDecoupe).
+    Si une découpe du même nom a été interrompue en cours d'enregistrement, on reprend
+    après le dernier lot validé au lieu de tout recommencer : seulement pour le même plan
+    (mêmes paramètres et même empreinte) et jamais dans une découpe paramétrique.
+    progression(nb_enregistres, total) est appelée après chaque lot.
+    Une découpe classique (PlanDecoupe) est enregistrée par ses seuls paramètres (une ligne,
+    sous-réseaux recalculés à la lecture), sauf si parametrique vaut False.
+    Retourne l'id de la découpe.
+    """
+    conn = get_connection()
     try:
-        conn = get_connection()
         cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO historique_tests (type_test, entree, resultat, est_valide, id_utilisateur)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (type_test, entree, resultat, est_valide, id_utilisateur)
-        )
+        total = len(plan)
+        empreinte = plan.empreinte()
+
+        if parametrique and isinstance(plan, PlanDecoupe):
+            cur.execute("SELECT 1 FROM decoupe WHERE nom_decoupe = ?", (nom_decoupe,))
+            if cur.fetchone():
+                raise ValueError(f"Une découpe nommée '{nom_decoupe}' existe déjà.")
+            cur.execute(
+                """
+                INSERT INTO decoupe (nom_decoupe, mode, ip_reseau, masque, nombre_sous_reseaux, nombre_ips_par_sr,
+                                     type_decoupe, id_responsable, nouveau_prefixe, debut_plage, fin_plage, empreinte)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (nom_decoupe, mode, ip_reseau, masque, total, nb_ips_par_sr, type_decoupe, id_utilisateur,
+                 plan.new_prefix, plan.debut, plan.debut + total * plan.taille - 1, empreinte),
+            )
+            conn.commit()
+            if progression:
+                progression(total, total)
+            return cur.lastrowid
+
+        cur.execute(REQ_DECOUPE_A_REPRENDRE, (nom_decoupe,))
+        row = cur.fetchone()
+        if row:
+            id_decoupe, *existante = row
+            # Une découpe paramétrique (nouveau_prefixe non NULL) n'a aucune ligne sous_reseau : ce n'est
+            # jamais un enregistrement interrompu
+            attendue = [id_utilisateur, ip_reseau, masque, total, nb_ips_par_sr, type_decoupe, None, empreinte]
+            if existante != attendue:
+                raise ValueError(f"Une découpe nommée '{nom_decoupe}' existe déjà.")
+            cur.execute("SELECT COUNT(*) FROM sous_reseau WHERE id_decoupe = ?", (id_decoupe,))
+            deja_enregistres = cur.fetchone()[0]
+            if deja_enregistres >= total:
+                raise ValueError(f"Une découpe nommée '{nom_decoupe}' existe déjà.")
+        else:
+            cur.execute(
+                """
+                INSERT INTO decoupe (nom_decoupe, mode, ip_reseau, masque, nombre_sous_reseaux, nombre_ips_par_sr,
+                                     type_decoupe, id_responsable, empreinte)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (nom_decoupe, mode, ip_reseau, masque, total, nb_ips_par_sr, type_decoupe, id_utilisateur,
+                 empreinte),
+            )
+            id_decoupe = cur.lastrowid
+            # La découpe est validée seule : un enregistrement interrompu pourra être repris
+            conn.commit()
+            deja_enregistres = 0
+
+        lignes = ((id_decoupe, *e) for e in plan.enregistrements(deja_enregistres))
+        while True:
+            lot = list(itertools.islice(lignes, taille_lot))
+            if not lot:
+                break
+            cur.executemany(
+                """
+                INSERT INTO sous_reseau (id_decoupe, ip_reseau, masque, ip_debut, ip_fin, ip_broadcast, nb_ips,
+                                         debut, fin, prefixe)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                lot,
+            )
+            conn.commit()
+            deja_enregistres += len(lot)
+            if progression:
+                progression(deja_enregistres, total)
+
+        return id_decoupe
+    except Exception:
+        # Seul le lot en cours est annulé, les lots déjà validés restent pour une reprise
+        conn.rollback()
+        raise
+
+
+def _plan_depuis_parametres(ip_reseau, masque, nouveau_prefixe, nombre):
+    return PlanDecoupe(ipaddress.ip_network(f"{ip_reseau}/{masque}", strict=False), nouveau_prefixe, nombre)
+
+
+def plan_parametrique(id_decoupe):
+    """PlanDecoupe d'une découpe enregistrée par ses paramètres, ou None si ses sous-réseaux sont stockés"""
+    cur = get_connection().cursor()
+    cur.execute(REQ_PARAMETRES_DECOUPE, (id_decoupe,))
+    row = cur.fetchone()
+    if row is None or row[2] is None:
+        return None
+    return _plan_depuis_parametres(*row)
+
+
+def _plans(cur):
+    return [(id_decoupe, nom, _plan_depuis_parametres(*parametres)) for id_decoupe, nom, *parametres in cur]
+
+
+def lister_plans_parametriques(apres=0):
+    """(id_decoupe, nom_decoupe, PlanDecoupe) des découpes enregistrées par leurs paramètres (id > apres)"""
+    cur = get_connection().cursor()
+    cur.execute(REQ_DECOUPES_PARAMETRIQUES_DEPUIS, (apres,))
+    return _plans(cur)
+
+
+def debuts_alignes(valeur: int) -> list[int]:
+    """Débuts des 33 blocs alignés (un par préfixe) qui contiennent l'adresse valeur"""
+    return sorted({valeur & ((0xFFFFFFFF << (32 - p)) & 0xFFFFFFFF) for p in range(33)})
+
+
+def plans_parametriques_recouvrant(debut: int, fin: int):
+    """
+    (id_decoupe, nom_decoupe, PlanDecoupe) des découpes paramétriques dont la plage recoupe [debut, fin] :
+    une recherche d'intervalle et au plus 33 recherches ponctuelles dans l'index (debut_plage, fin_plage).
+    """
+    conn = get_connection()
+    englobants = [d for d in debuts_alignes(debut) if d < debut]
+    plans = _plans(conn.execute(REQ_PLANS_ENGLOBANT.format(marques=",".join("?" * len(englobants))),
+                                (*englobants, debut)))
+    return plans + _plans(conn.execute(REQ_PLANS_PLAGE, (debut, fin)))
+
+
+def materialiser_decoupe(id_decoupe, taille_lot=TAILLE_LOT_DEFAUT):
+    """
+    Écrit les lignes sous_reseau d'une découpe paramétrique (avant de la modifier sous-réseau par
+    sous-réseau). Par lots validés : une matérialisation interrompue reprend où elle s'était arrêtée,
+    après avoir vérifié que les lignes déjà écrites sont bien celles du plan.
+    """
+    plan = plan_parametrique(id_decoupe)
+    if plan is None:
+        return
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        # Reprise : les lignes déjà écrites doivent être exactement les premiers sous-réseaux du plan
+        deja_ecrites = 0
+        for k, bornes in enumerate(cur.execute(REQ_INTERVALLES_DECOUPE, (id_decoupe,))):
+            if k >= len(plan) or bornes != plan.bornes(k):
+                raise ValueError(f"Les sous-réseaux enregistrés de la découpe {id_decoupe} ne correspondent pas "
+                                 f"à ses paramètres : matérialisation impossible.")
+            deja_ecrites = k + 1
+        lignes = ((id_decoupe, *e) for e in plan.enregistrements(deja_ecrites))
+        while True:
+            lot = list(itertools.islice(lignes, taille_lot))
+            if not lot:
+                break
+            cur.executemany(
+                """
+                INSERT INTO sous_reseau (id_decoupe, ip_reseau, masque, ip_debut, ip_fin, ip_broadcast, nb_ips,
+                                         debut, fin, prefixe)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                lot,
+            )
+            conn.commit()
+        cur.execute("UPDATE decoupe SET nouveau_prefixe = NULL WHERE id_decoupe = ?", (id_decoupe,))
         conn.commit()
-        conn.close()
-    except sqlite3.Error as e:
-        # Dans une vraie application, on pourrait logger cette erreur dans un fichier
-        print(f"Erreur lors de l'enregistrement de l'historique : {e}")
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def trouver_sous_reseaux_contenant(ip):
+    """
+    Retourne (nom_decoupe, ip_reseau, prefixe) des sous-réseaux enregistrés contenant l'IP.
+    Un sous-réseau est un bloc aligné : son début vaut forcément ip & masque pour l'un des
+    33 préfixes possibles, d'où 33 recherches ponctuelles dans l'index (debut, fin).
+    """
+    valeur = int(ipaddress.IPv4Address(ip))
+    debuts = debuts_alignes(valeur)
+
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(REQ_SOUS_RESEAUX_CONTENANT.format(marques=",".join("?" * len(debuts))), (*debuts, valeur))
+    rows = cur.fetchall()
+
+    # Découpes paramétriques : le sous-réseau contenant l'IP se calcule directement
+    for _, nom, plan in plans_parametriques_recouvrant(valeur, valeur):
+        try:
+            reseau, _ = plan.bornes(plan.index_de(valeur))
+        except ValueError:
+            continue
+        rows.append((nom, enregistrement_sous_reseau(reseau, plan.new_prefix)[0], plan.new_prefix))
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows
+
+
+def lister_sous_reseaux_dans(reseau):
+    """Retourne (nom_decoupe, ip_reseau, prefixe) des sous-réseaux enregistrés inclus dans reseau (ex: '10.0.0.0/8')"""
+    net = ipaddress.ip_network(reseau, strict=False)
+    debut, fin = int(net.network_address), int(net.broadcast_address)
+
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(REQ_SOUS_RESEAUX_DANS, (debut, fin, fin))
+    rows = cur.fetchall()
+
+    parametriques = []
+    for _, nom, plan in plans_parametriques_recouvrant(debut, fin):
+        premier = min(max(0, -(-(debut - plan.debut) // plan.taille)), len(plan))
+        dernier = min(max(0, (fin - plan.debut + 1) // plan.taille), len(plan))
+        parametriques.extend((e[6], nom, e[0], plan.new_prefix)
+                             for e in itertools.islice(plan.enregistrements(premier), max(0, dernier - premier)))
+    if parametriques:
+        rows = [row for _, *row in sorted(
+            parametriques + [(int(ipaddress.IPv4Address(row[1])), *row) for row in rows])]
+    return rows
 
@@ -0,0 +1,122 @@
+import csv
+import itertools
+import json
+
+from moteur_parallele import PlanParallele, nombre_processus
+
+# Colonnes exportées (mêmes colonnes que la table sous_reseau, que la découpe vienne de la base ou d'un plan)
+COLONNES_EXPORT = ["ip_reseau", "masque", "ip_debut", "ip_fin", "ip_broadcast", "nb_ips"]
+
+TAILLE_BLOC_EXPORT = 5000           # lignes lues / écrites à la fois
+TAILLE_TAMPON_EXPORT = 1024 * 1024  # tampon du fichier de sortie, en octets
+
+
+class Sortie:
+    """Écrit des lignes (listes de valeurs) en CSV avec en-tête, ou en JSON Lines"""
+
+    def __init__(self, flux, format_sortie, colonnes, entete=True):
+        if format_sortie not in ("csv", "jsonl"):
+            raise ValueError(f"Format d'export inconnu : {format_sortie} (csv ou jsonl).")
+        self.flux = flux
+        self.format = format_sortie
+        self.colonnes = colonnes
+        self.nombre = 0
+        if format_sortie == "csv":
+            self._csv = csv.writer(flux, lineterminator="\n")
+            if entete:
+                self._csv.writerow(colonnes)
+
+    def ecrire(self, ligne):
+        self.ecrire_tout((ligne,))
+
+    def ecrire_tout(self, lignes):
+        if self.format == "csv":
+            lignes = list(lignes)
+            self._csv.writerows(lignes)
+        else:
+            lignes = [json.dumps(dict(zip(self.colonnes, ligne)), ensure_ascii=False) + "\n" for ligne in lignes]
+            self.flux.writelines(lignes)
+        self.nombre += len(lignes)
+
+    def ecrire_texte(self, texte, nombre):
+        """Écrit nombre lignes déjà mises en forme (par exemple par moteur_parallele)"""
+        self.flux.write(texte)
+        self.nombre += nombre
+
+
+def format_depuis_chemin(chemin: str) -> str:
+    """'jsonl' pour un fichier .jsonl / .json, sinon 'csv'"""
+    return "jsonl" if chemin.lower().endswith((".jsonl", ".json")) else "csv"
+
+
+def ecrire_lignes(chemin, lignes_par_blocs, format_sortie=None, colonnes=COLONNES_EXPORT) -> int:
+    """Écrit des blocs de lignes dans un fichier (tampon de TAILLE_TAMPON_EXPORT) ; retourne le nombre de lignes"""
+    format_sortie = format_sortie or format_depuis_chemin(chemin)
+    with open(chemin, "w", encoding="utf-8", newline="", buffering=TAILLE_TAMPON_EXPORT) as flux:
+        sortie = Sortie(flux, format_sortie, colonnes)
+        for bloc in lignes_par_blocs:
+            sortie.ecrire_tout(bloc)
+    return sortie.nombre
+
+
+def blocs_decoupe(nom_decoupe, id_utilisateur=None, taille_bloc=TAILLE_BLOC_EXPORT):
+    """
+    Génère les sous-réseaux d'une découpe enregistrée par blocs (fetchmany) : la mémoire
+    utilisée ne dépend pas de la taille de la découpe.
+    Si id_utilisateur est donné, la découpe doit lui appartenir.
+    """
+    # Importé ici : Sortie sert aussi aux commandes sans base (python cli.py classe...)
+    from database import get_connection, plan_parametrique, REQ_DECOUPE_PAR_NOM, REQ_SOUS_RESEAUX_DECOUPE
+
+    cur = get_connection().cursor()
+    cur.execute(REQ_DECOUPE_PAR_NOM, (nom_decoupe,))
+    row = cur.fetchone()
+    if not row:
+        raise ValueError(f"Aucune découpe nommée '{nom_decoupe}'.")
+    id_decoupe, id_responsable = row
+    if id_utilisateur is not None and id_responsable != id_utilisateur:
+        raise ValueError("Vous n'avez pas les droits pour consulter cette découpe.")
+
+    plan = plan_parametrique(id_decoupe)
+    if plan is not None:
+        yield from blocs_plan(plan, taille_bloc)
+        return
+
+    cur.execute(REQ_SOUS_RESEAUX_DECOUPE, (id_decoupe,))
+    while True:
+        bloc = cur.fetchmany(taille_bloc)
+        if not bloc:
+            break
+        yield bloc
+
+
+def blocs_plan(plan, taille_bloc=TAILLE_BLOC_EXPORT):
+    """Même découpage en blocs, calculé directement depuis un plan (PlanDecoupe, PlanVLSM) sans passer par la base"""
+    enregistrements = (e[:6] for e in plan.enregistrements())
+    while True:
+        bloc = list(itertools.islice(enregistrements, taille_bloc))
+        if not bloc:
+            break
+        yield bloc
+
+
+def exporter_decoupe(nom_decoupe, chemin, format_sortie=None, id_utilisateur=None) -> int:
+    """Exporte une découpe enregistrée en CSV ou JSON Lines ; retourne le nombre de sous-réseaux écrits"""
+    return ecrire_lignes(chemin, blocs_decoupe(nom_decoupe, id_utilisateur), format_sortie)
+
+
+def exporter_plan(plan, chemin, format_sortie=None, processus=None) -> int:
+    """
+    Exporte un plan calculé (non enregistré) en CSV ou JSON Lines ; retourne le nombre de sous-réseaux écrits.
+    Un grand plan est mis en forme sur plusieurs processus (voir moteur_parallele.nombre_processus).
+    """
+    processus = nombre_processus(len(plan), processus)
+    if processus == 1:
+        return ecrire_lignes(chemin, blocs_plan(plan), format_sortie)
+
+    format_sortie = format_sortie or format_depuis_chemin(chemin)
+    with open(chemin, "w", encoding="utf-8", newline="", buffering=TAILLE_TAMPON_EXPORT) as flux:
+        sortie = Sortie(flux, format_sortie, COLONNES_EXPORT)
+        for texte, nombre in PlanParallele(plan, processus).blocs_texte("export", format_sortie, COLONNES_EXPORT):
+            sortie.ecrire_texte(texte, nombre)
+    return sortie.nombre
@@ -0,0 +1,208 @@
+import bisect
+import csv
+import time
+
+from analyse_conflits import conflits_nouveaux, MAX_CONFLITS_AFFICHES
+from database import get_connection, TAILLE_LOT_DEFAUT
+from plan_decoupe import parser_reseau, enregistrement_sous_reseau
+
+# Colonnes attendues dans le fichier (une ligne par sous-réseau, les lignes d'une même découpe à la suite) :
+#   nom_decoupe, reseau, sous_reseau  (obligatoires)
+#   masque, mode                      (facultatives : masque si reseau n'est pas en CIDR, classful/classless)
+COLONNES_OBLIGATOIRES = ("nom_decoupe", "reseau", "sous_reseau")
+
+MAX_REJETS_AFFICHES = 20
+
+
+class ResumeImport:
+    """Compteurs d'un import : lignes lues, sous-réseaux importés, découpes créées, rejets et chevauchements"""
+
+    def __init__(self):
+        self.lignes = 0
+        self.importees = 0
+        self.decoupes = 0
+        self.rejets = []        # (n° de ligne, raison)
+        self.conflits = []      # lignes COLONNES_CONFLITS : chevauchements avec les autres découpes
+        self.duree = 0.0
+
+    @property
+    def debit(self) -> float:
+        """Lignes traitées par seconde"""
+        return self.lignes / self.duree if self.duree else 0.0
+
+    def afficher(self):
+        print(f"Lignes lues : {self.lignes}")
+        print(f"Sous-réseaux importés : {self.importees} ({self.decoupes} découpe(s) créée(s))")
+        print(f"Lignes rejetées : {len(self.rejets)}")
+        print(f"Durée : {self.duree:.2f} s ({self.debit:.0f} lignes/s)")
+        for numero, raison in self.rejets[:MAX_REJETS_AFFICHES]:
+            print(f"  ligne {numero} : {raison}")
+        if len(self.rejets) > MAX_REJETS_AFFICHES:
+            print(f"  ... et {len(self.rejets) - MAX_REJETS_AFFICHES} autre(s) rejet(s)")
+        if self.conflits:
+            print(f"Chevauchements avec d'autres découpes : {len(self.conflits)}")
+            for _, nom, reseau, autre, autre_reseau in self.conflits[:MAX_CONFLITS_AFFICHES]:
+                print(f"  {nom} : {reseau} chevauche {autre_reseau} ({autre})")
+            if len(self.conflits) > MAX_CONFLITS_AFFICHES:
+                print(f"  ... et {len(self.conflits) - MAX_CONFLITS_AFFICHES} autre(s) chevauchement(s)")
+
+
+class _DecoupeEnCours:
+    """Découpe en cours d'import : réseau de base et sous-réseaux déjà acceptés (triés par début)"""
+
+    def __init__(self, nom, net, mode):
+        self.nom = nom
+        self.net = net
+        self.mode = mode
+        self.id_decoupe = None
+        self.base_brute = None  # (reseau, masque) tels que saisis : évite de réanalyser la base à chaque ligne
+        self.debuts = []
+        self.fins = []
+        self.prefixes = set()
+
+    def chevauchement(self, debut, fin):
+        """Retourne l'intervalle déjà accepté qui chevauche [debut, fin], ou None"""
+        # Cas courant : fichier trié par adresse, on compare au dernier sous-réseau seulement
+        if not self.debuts or debut > self.fins[-1]:
+            return None
+        i = bisect.bisect_right(self.debuts, fin)
+        if i and self.fins[i - 1] >= debut:
+            return self.debuts[i - 1], self.fins[i - 1]
+        return None
+
+    def ajouter(self, debut, fin, prefixe):
+        if not self.debuts or debut > self.fins[-1]:
+            self.debuts.append(debut)
+            self.fins.append(fin)
+        else:
+            i = bisect.bisect_right(self.debuts, debut)
+            self.debuts.insert(i, debut)
+            self.fins.insert(i, fin)
+        self.prefixes.add(prefixe)
+
+
+def importer_decoupes(chemin, id_utilisateur, taille_lot=TAILLE_LOT_DEFAUT) -> ResumeImport:
+    """
+    Importe un fichier CSV de plans d'adressage dans decoupe / sous_reseau, en flux.
+    Chaque ligne est validée (même analyse que la fenêtre de découpe, sous-réseau inclus
+    dans le réseau de base, pas de chevauchement dans la découpe) ; les lignes invalides
+    sont rejetées sans arrêter l'import. Les insertions sont validées par lots de taille_lot.
+    Chaque découpe importée est ensuite comparée aux autres découpes enregistrées : ses
+    chevauchements sont signalés dans resume.conflits, sans annuler l'import.
+    """
+    resume = ResumeImport()
+    debut_import = time.perf_counter()
+    conn = get_connection()
+    cur = conn.cursor()
+
+    decoupe = None
+    nom_courant = None
+    terminees = set()   # noms des découpes déjà vues (leurs lignes doivent être consécutives)
+    lot = []
+
+    def vider_lot():
+        if lot:
+            cur.executemany(
+                """
+                INSERT INTO sous_reseau (id_decoupe, ip_reseau, masque, ip_debut, ip_fin, ip_broadcast, nb_ips,
+                                         debut, fin, prefixe)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                lot,
+            )
+            lot.clear()
+
+    def terminer(decoupe):
+        """Met à jour le nombre de sous-réseaux et le type (vlsm si plusieurs tailles) de la découpe"""
+        if decoupe is None or decoupe.id_decoupe is None:
+            return
+        cur.execute(
+            "UPDATE decoupe SET nombre_sous_reseaux = ?, type_decoupe = ? WHERE id_decoupe = ?",
+            (len(decoupe.debuts), "vlsm" if len(decoupe.prefixes) > 1 else "classique", decoupe.id_decoupe),
+        )
+
+    def cloturer(decoupe):
+        """Dernière mise à jour d'une découpe importée, puis recherche de ses chevauchements"""
+        if decoupe is None or decoupe.id_decoupe is None:
+            return
+        vider_lot()
+        terminer(decoupe)
+        intervalles = ((debut, fin, decoupe.id_decoupe, None) for debut, fin in zip(decoupe.debuts, decoupe.fins))
+        resume.conflits.extend(conflits_nouveaux(intervalles, exclure=decoupe.id_decoupe,
+                                                 noms={decoupe.id_decoupe: decoupe.nom}))
+
+    try:
+        with open(chemin, encoding="utf-8", newline="") as fichier:
+            lecteur = csv.DictReader(fichier)
+            manquantes = [c for c in COLONNES_OBLIGATOIRES if c not in (lecteur.fieldnames or [])]
+            if manquantes:
+                raise ValueError(f"Colonnes manquantes dans {chemin} : {', '.join(manquantes)}")
+
+            for numero, ligne in enumerate(lecteur, start=2):
+                resume.lignes += 1
+                nom = (ligne["nom_decoupe"] or "").strip()
+                try:
+                    if not nom:
+                        raise ValueError("Nom de découpe manquant.")
+
+                    if nom != nom_courant:
+                        if nom in terminees:
+                            raise ValueError(f"Les lignes de la découpe '{nom}' doivent être consécutives.")
+                        cloturer(decoupe)
+                        decoupe, nom_courant = None, nom
+                        terminees.add(nom)
+                        cur.execute("SELECT 1 FROM decoupe WHERE nom_decoupe = ?", (nom,))
+                        if cur.fetchone():
+                            raise ValueError(f"Une découpe nommée '{nom}' existe déjà.")
+                        mode = (ligne.get("mode") or "").strip() or "classless"
+                        if mode not in ("classful", "classless"):
+                            raise ValueError(f"Mode invalide : {mode} (classful ou classless).")
+                        decoupe = _DecoupeEnCours(nom, parser_reseau(ligne["reseau"], ligne.get("masque")), mode)
+                        decoupe.base_brute = (ligne["reseau"], ligne.get("masque"))
+                    elif decoupe is None:
+                        raise ValueError(f"Découpe '{nom}' rejetée (voir sa première ligne).")
+                    elif ((ligne["reseau"], ligne.get("masque")) != decoupe.base_brute
+                          and parser_reseau(ligne["reseau"], ligne.get("masque")) != decoupe.net):
+                        raise ValueError("Réseau de base différent des lignes précédentes de la découpe.")
+
+                    sr = parser_reseau(ligne["sous_reseau"] or "", None)
+                    debut, fin = int(sr.network_address), int(sr.broadcast_address)
+                    if not sr.subnet_of(decoupe.net):
+                        raise ValueError(f"{sr.with_prefixlen} est hors du réseau de base {decoupe.net.with_prefixlen}.")
+                    if decoupe.chevauchement(debut, fin):
+                        raise ValueError(f"{sr.with_prefixlen} chevauche un sous-réseau déjà importé.")
+                except (ValueError, NotImplementedError) as e:
+                    resume.rejets.append((numero, str(e)))
+                    continue
+
+                if decoupe.id_decoupe is None:
+                    cur.execute(
+                        """
+                        INSERT INTO decoupe (nom_decoupe, mode, ip_reseau, masque, nombre_sous_reseaux,
+                                             nombre_ips_par_sr, type_decoupe, id_responsable)
+                        VALUES (?, ?, ?, ?, 0, NULL, 'classique', ?)
+                        """,
+                        (nom, decoupe.mode, str(decoupe.net.network_address), str(decoupe.net.netmask),
+                         id_utilisateur),
+                    )
+                    decoupe.id_decoupe = cur.lastrowid
+                    resume.decoupes += 1
+
+                decoupe.ajouter(debut, fin, sr.prefixlen)
+                lot.append((decoupe.id_decoupe, *enregistrement_sous_reseau(debut, sr.prefixlen)))
+                resume.importees += 1
+                if len(lot) >= taille_lot:
+                    vider_lot()
+                    terminer(decoupe)
+                    conn.commit()
+
+        vider_lot()
+        cloturer(decoupe)
+        conn.commit()
+    except Exception:
+        # Les lots déjà validés restent en base ; seul le lot en cours est annulé
+        conn.rollback()
+        raise
+    finally:
+        resume.duree = time.perf_counter() - debut_import
+    return resume
@@ -0,0 +1,109 @@
+import customtkinter as ctk
+from tkinter import messagebox, filedialog
+import session
+from database import ajouter_test_historique
+from appartenance_ip import moteur_appartenance
+from tableau_virtuel import TableauVirtuel
+from mesures import mesure, CALCUL, AFFICHAGE
+
+# === Couleurs et style du thème ===
+THEME_BLUE = "#2D89EF"
+THEME_BLUE_HOVER = "#2563EB"
+THEME_GREY_BUTTON = "#2c2c2e"
+THEME_GREY_HOVER = "#3a3a3c"
+THEME_TEXT_WHITE = "white"
+THEME_BACKGROUND = "#1c1c1e"
+
+
+def _lignes_resultats(resultats):
+    """Transforme les (ip, appartenances) du moteur en lignes [IP, Découpe, Sous-réseau]"""
+    for ip, appartenances in resultats:
+        if appartenances is None:
+            yield [ip, "IP invalide", "-"]
+        elif not appartenances:
+            yield [ip, "Aucune", "-"]
+        else:
+            for nom_decoupe, sous_reseau in appartenances:
+                yield [ip, nom_decoupe, sous_reseau.with_prefixlen]
+
+
+def ouvrir_fenetre_appartenance():
+    ctk.set_appearance_mode("dark")
+    ctk.set_default_color_theme("dark-blue")
+
+    app = ctk.CTk()
+    app.title("📍 Vérifier l'appartenance d'une IP")
+    app.geometry("900x600")
+    app.configure(fg_color=THEME_BACKGROUND)
+
+    # --- Zone de saisie ---
+    frame = ctk.CTkFrame(app, fg_color=THEME_GREY_BUTTON, corner_radius=15)
+    frame.pack(pady=30, padx=30, fill="x")
+
+    ctk.CTkLabel(frame, text="Adresse IP :", text_color=THEME_TEXT_WHITE,
+                 font=("Segoe UI", 16, "bold")).grid(row=0, column=0, padx=20, pady=20, sticky="w")
+
+    entry_ip = ctk.CTkEntry(frame, placeholder_text="Ex: 192.168.1.42",
+                            width=250, height=40, font=("Segoe UI", 14))
+    entry_ip.grid(row=0, column=1, padx=10)
+
+    def verifier_ip():
+        ip = entry_ip.get().strip()
+        if not ip:
+            messagebox.showerror("Erreur", "Veuillez entrer une adresse IP.", parent=app)
+            return
+
+        with mesure("appartenance", CALCUL, 1):
+            resultats = list(moteur_appartenance().verifier_lot([ip]))
+        with mesure("appartenance", AFFICHAGE, 1):
+            tableau.definir_source(list(_lignes_resultats(resultats)))
+
+        _, appartenances = resultats[0]
+        if appartenances is None:
+            messagebox.showerror("Erreur", "Adresse IP invalide.", parent=app)
+            ajouter_test_historique("Appartenance IP", ip, "Adresse IP invalide", False,
+                                    session.utilisateur_connecte_id)
+        else:
+            resultat = ", ".join(f"{nom} ({sr.with_prefixlen})" for nom, sr in appartenances) or "Aucune découpe"
+            ajouter_test_historique("Appartenance IP", ip, resultat, bool(appartenances),
+                                    session.utilisateur_connecte_id)
+
+    def verifier_fichier():
+        chemin = filedialog.askopenfilename(parent=app, title="Fichier d'IP (une par ligne)",
+                                            filetypes=[("Texte", "*.txt *.csv"), ("Tous", "*.*")])
+        if not chemin:
+            return
+        # Le fichier est lu en flux au fil du défilement du tableau : seule la première page est mesurée
+        with mesure("appartenance_fichier", AFFICHAGE):
+            tableau.definir_source(_lignes_resultats(moteur_appartenance().verifier_fichier(chemin)))
+        ajouter_test_historique("Appartenance IP", chemin, "Vérification par fichier", True,
+                                session.utilisateur_connecte_id)
+
+    entry_ip.bind("<Return>", lambda _: verifier_ip())
+
+    btn_verifier = ctk.CTkButton(frame, text="Vérifier", width=150, height=40,
+                                 fg_color=THEME_BLUE, hover_color=THEME_BLUE_HOVER,
+                                 text_color="white", font=("Segoe UI", 14, "bold"),
+                                 command=verifier_ip)
+    btn_verifier.grid(row=0, column=2, padx=20)
+
+    btn_fichier = ctk.CTkButton(frame, text="Depuis un fichier", width=150, height=40,
+                                fg_color=THEME_GREY_HOVER, hover_color=THEME_BLUE_HOVER,
+                                text_color="white", font=("Segoe UI", 14, "bold"),
+                                command=verifier_fichier)
+    btn_fichier.grid(row=0, column=3, padx=(0, 20))
+
+    # --- Tableau des résultats ---
+    tableau = TableauVirtuel(app, colonnes=["IP", "Découpe", "Sous-réseau"],
+                             couleur_entete=THEME_BLUE, couleurs_lignes=(THEME_GREY_BUTTON, THEME_GREY_HOVER),
+                             couleur_texte=THEME_TEXT_WHITE, corner_radius=12, fg_color=THEME_GREY_BUTTON)
+    tableau.pack(padx=30, pady=20, fill="both", expand=True)
+
+    # --- Bouton de fermeture ---
+    btn_quitter = ctk.CTkButton(app, text="Fermer", width=120, height=40,
+                                fg_color=THEME_GREY_BUTTON, hover_color=THEME_GREY_HOVER,
+                                text_color="white", font=("Segoe UI", 14, "bold"),
+                                command=app.destroy)
+    btn_quitter.pack(pady=10)
+
+    app.mainloop()
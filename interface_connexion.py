@@ -1,5 +1,4 @@
 import customtkinter as ctk
-from interface_menu import afficher_menu
 from database import verifier_identifiants
 
 
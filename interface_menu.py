@@ -1,8 +1,25 @@
+import importlib
 import customtkinter as ctk
-import Test
-import recherche_decoupe
-import interface_verification_vlsm
-import interface_verifier_classe
+
+# Fonctionnalités du menu : (texte, module, fonction d'ouverture).
+# Les modules ne sont importés qu'au premier clic, pour que la connexion s'affiche vite.
+FONCTIONNALITES = [
+    ("1 Calcul adresse réseau / broadcast", None, "Ouverture fonction 1"),
+    ("2 Vérifier appartenance IP", "interface_appartenance_ip", "ouvrir_fenetre_appartenance"),
+    ("3 Vérifier découpe classique possible", None, "Ouverture fonction 3"),
+    ("4 Réaliser découpe classique (plan d’adressage)", "Test", "ouvrir_fenetre_decoupe"),
+    ("5 Vérifier découpe VLSM possible", "interface_verification_vlsm", "ouvrir_fenetre_verification_vlsm"),
+    ("6 Vérifier la classe", "interface_verifier_classe", "ouvrir_fenetre"),
+    ("7 Rechercher une découpe", "recherche_decoupe", "ouvrir_fenetre_recherche_decoupe"),
+]
+
+
+def ouvrir_fonctionnalite(module, fonction):
+    """Importe le module de la fenêtre au premier appel (ensuite il est en cache) puis l'ouvre"""
+    if module is None:
+        print(fonction)  # fonctionnalité pas encore disponible
+        return
+    getattr(importlib.import_module(module), fonction)()
 
 
 def afficher_menu(app, cadre_principal):
@@ -28,18 +45,7 @@ def afficher_menu(app, cadre_principal):
     label_sousTitre.pack(pady=(0, 40))
 
 
-    boutons = [
-        ("1 Calcul adresse réseau / broadcast", lambda: print("Ouverture fonction 1")),
-        ("2 Vérifier appartenance IP", lambda: print("Ouverture fonction 2")),
-        ("3 Vérifier découpe classique possible", lambda: print("Ouverture fonction 3")),
-        ("4 Réaliser découpe classique (plan d’adressage)", lambda: Test.ouvrir_fenetre_decoupe() ),
-        # La ligne suivante est corrigée :
-        ("5 Vérifier découpe VLSM possible", lambda: interface_verification_vlsm.ouvrir_fenetre_verification_vlsm()),
-        ("6 Vérifier la classe", lambda: interface_verifier_classe.ouvrir_fenetre()),
-        ("7 Rechercher une découpe", lambda: recherche_decoupe.ouvrir_fenetre_recherche_decoupe() ),
-    ]
-
-    for texte, commande in boutons:
+    for texte, module, fonction in FONCTIONNALITES:
         bouton = ctk.CTkButton(
             cadre_principal,
             text=texte,
@@ -50,7 +56,7 @@ def afficher_menu(app, cadre_principal):
             text_color="white",
             font=("Segoe UI", 15, "bold"),
             corner_radius=12,
-            command=commande
+            command=lambda m=module, f=fonction: ouvrir_fonctionnalite(m, f)
         )
         bouton.pack(pady=10)
 
@@ -2,7 +2,12 @@ import customtkinter as ctk
 from tkinter import messagebox
 import session
 from database import ajouter_test_historique
-from verification_vlsm import verifier_possibilite_vlsm
+from analyse_conflits import conflits_nouveaux, intervalles_plan, resumer_conflits
+from verification_vlsm import verifier_possibilite_vlsm, allouer_vlsm, enregistrer_vlsm
+from mesures import mesure, ANALYSE, CALCUL, AFFICHAGE, ENREGISTREMENT, CONFLITS
+
+# Nombre maximum de sous-réseaux alloués écrits dans la zone résultat
+MAX_LIGNES_AFFICHEES = 500
 
 
 def ouvrir_fenetre_verification_vlsm():
@@ -80,6 +85,14 @@ def ouvrir_fenetre_verification_vlsm():
 
     entry_besoins.grid(row=2, column=1, padx=10, pady=15, sticky="w")
 
+    ctk.CTkLabel(input_frame, text="Nom de la découpe :", font=("Segoe UI", 16),
+                 text_color=white).grid(row=3, column=0, sticky="e", padx=10, pady=15)
+    entry_nom = ctk.CTkEntry(input_frame, placeholder_text="Pour enregistrer l'allocation (optionnel)",
+                             width=350,
+                             height=45,
+                             corner_radius=10)
+    entry_nom.grid(row=3, column=1, padx=10, pady=15, sticky="w")
+
     # zone resultat
     result_textbox = ctk.CTkTextbox(frame, height=200, font=("Courier New", 14),
                                     state="disabled", wrap="word", corner_radius=10,
@@ -106,22 +119,23 @@ def ouvrir_fenetre_verification_vlsm():
             return
 
         try:
-            besoins_list = []
-
-            #coupe la chaîne aux virgules
-            morceaux = besoins_str.split(',')
-            for b in morceaux:
-                # enleve les espace
-                morceau_propre = b.strip()
-
-                if morceau_propre:
-                    # convertit en nombre et on l'ajoute à la liste
-                    nombre = int(morceau_propre)
-                    besoins_list.append(nombre)
-
-            # À la fin, besoins_list contient [100, 50, 20]
-            if not besoins_list:
-                raise ValueError("Liste de besoins vide.")
+            with mesure("vlsm_verification", ANALYSE):
+                besoins_list = []
+
+                #coupe la chaîne aux virgules
+                morceaux = besoins_str.split(',')
+                for b in morceaux:
+                    # enleve les espace
+                    morceau_propre = b.strip()
+
+                    if morceau_propre:
+                        # convertit en nombre et on l'ajoute à la liste
+                        nombre = int(morceau_propre)
+                        besoins_list.append(nombre)
+
+                # À la fin, besoins_list contient [100, 50, 20]
+                if not besoins_list:
+                    raise ValueError("Liste de besoins vide.")
         except ValueError as e:
             msg = "Format des besoins invalide. Utilisez des nombres séparés par des virgules (ex: 100, 50, 20)."
             messagebox.showerror("Erreur", msg, parent=app_vlsm)
@@ -129,18 +143,20 @@ def ouvrir_fenetre_verification_vlsm():
 
         try:
             # appel de la fonction logique importée
-            possible, message = verifier_possibilite_vlsm(reseau, masque, besoins_list)
+            with mesure("vlsm_verification", CALCUL, len(besoins_list)):
+                possible, message = verifier_possibilite_vlsm(reseau, masque, besoins_list)
 
-            result_textbox.configure(state="normal") #rend zone texte modifiable
-            result_textbox.delete("1.0", "end") #Efface le résultat précédent.
-            result_textbox.insert("1.0", message) #ecrit un nv msg
+            with mesure("vlsm_verification", AFFICHAGE, len(besoins_list)):
+                result_textbox.configure(state="normal") #rend zone texte modifiable
+                result_textbox.delete("1.0", "end") #Efface le résultat précédent.
+                result_textbox.insert("1.0", message) #ecrit un nv msg
 
-            if possible:
-                result_textbox.configure(text_color="#4CAF50")
-            else:
-                result_textbox.configure(text_color="#F44336")
+                if possible:
+                    result_textbox.configure(text_color="#4CAF50")
+                else:
+                    result_textbox.configure(text_color="#F44336")
 
-            result_textbox.configure(state="disabled")
+                result_textbox.configure(state="disabled")
 
             # enregistre dans la base de données
             ajouter_test_historique(
@@ -154,6 +170,66 @@ def ouvrir_fenetre_verification_vlsm():
         except Exception as e:
             messagebox.showerror("Erreur de calcul", str(e), parent=app_vlsm)
 
+    def afficher_message(message, couleur):
+        result_textbox.configure(state="normal")
+        result_textbox.delete("1.0", "end")
+        result_textbox.insert("1.0", message)
+        result_textbox.configure(text_color=couleur, state="disabled")
+
+    def on_allouer_click():
+        reseau = entry_reseau.get().strip()
+        masque = entry_masque.get().strip()
+        besoins_str = entry_besoins.get().strip()
+        nom = entry_nom.get().strip()
+        id_user = session.utilisateur_connecte_id
+        entree_log = f"R: {reseau}, M: {masque}, B: {besoins_str}, N: {nom}"
+
+        try:
+            with mesure("vlsm", ANALYSE):
+                besoins_list = [int(b) for b in besoins_str.split(',') if b.strip()]
+        except ValueError:
+            msg = "Format des besoins invalide. Utilisez des nombres séparés par des virgules (ex: 100, 50, 20)."
+            messagebox.showerror("Erreur", msg, parent=app_vlsm)
+            return
+
+        try:
+            with mesure("vlsm", CALCUL, len(besoins_list)):
+                plan = allouer_vlsm(reseau, masque, besoins_list)
+        except ValueError as e:
+            afficher_message(str(e), "#F44336")
+            ajouter_test_historique("Allocation VLSM", entree_log, str(e), False, id_user)
+            return
+
+        lignes = []
+        if nom:
+            if id_user is None:
+                messagebox.showwarning("Utilisateur", "Utilisateur non trouvé. La découpe n'a pas été enregistrée.",
+                                       parent=app_vlsm)
+            else:
+                try:
+                    with mesure("vlsm", ENREGISTREMENT, len(plan)):
+                        id_decoupe = enregistrer_vlsm(nom, plan, id_user)
+                    lignes.append(f"Découpe VLSM '{nom}' enregistrée ({len(plan)} sous-réseaux)\n")
+                    # Vérification incrémentale : seul le nouveau plan est confronté aux découpes existantes
+                    with mesure("vlsm", CONFLITS, len(plan)):
+                        conflits = resumer_conflits(conflits_nouveaux(intervalles_plan(plan, nom),
+                                                                      exclure=id_decoupe))
+                    if conflits:
+                        messagebox.showwarning("Chevauchements",
+                                               f"La découpe recouvre des découpes enregistrées :\n{conflits}",
+                                               parent=app_vlsm)
+                except Exception as e:
+                    messagebox.showwarning("Base de données", f"Erreur lors de l'enregistrement : {e}",
+                                           parent=app_vlsm)
+
+        with mesure("vlsm", AFFICHAGE, len(plan)):
+            lignes.extend(f"{l[0]:<28} {l[1]:>15}/{plan.prefixes[k]:<3} {l[3]}"
+                          for k, l in enumerate(plan.lignes(0, MAX_LIGNES_AFFICHEES)))
+            if len(plan) > MAX_LIGNES_AFFICHEES:
+                lignes.append(f"... ({len(plan) - MAX_LIGNES_AFFICHEES} sous-réseaux de plus)")
+            afficher_message("\n".join(lignes), "#4CAF50")
+        ajouter_test_historique("Allocation VLSM", entree_log, f"SR alloués: {len(plan)}", True, id_user)
+
     # bouton
     btn_verifier = ctk.CTkButton(button_frame, text="Vérifier",
                                  command=on_verifier_click,
@@ -166,6 +242,17 @@ def ouvrir_fenetre_verification_vlsm():
                                  corner_radius=12)
     btn_verifier.pack(side="left", padx=10)
 
+    btn_allouer = ctk.CTkButton(button_frame, text="Allouer les sous-réseaux",
+                                command=on_allouer_click,
+                                fg_color=bleu,
+                                hover_color=bleuHover,
+                                text_color=white,
+                                width=250,
+                                height=45,
+                                font=("Segoe UI", 16, "bold"),
+                                corner_radius=12)
+    btn_allouer.pack(side="left", padx=10)
+
     btn_quitter = ctk.CTkButton(button_frame, text="Fermer",
                                 command=app_vlsm.destroy,
                                 fg_color=quitbg,
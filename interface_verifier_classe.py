@@ -4,6 +4,8 @@ import re
 from ipaddress import IPv4Network, AddressValueError
 from verifier_classe import ipv4_valide, verifie_classfull, ClasseIPV4
 from database import ajouter_test_historique
+from tableau_virtuel import TableauVirtuel
+from mesures import mesure, ANALYSE, CALCUL, AFFICHAGE
 
 
 # --- Thèmes personnalisés ---
@@ -37,21 +39,6 @@ def ouvrir_fenetre():
         user_id = session.utilisateur_connecte_id
         ip_complet = None
 
-        # Nettoyer le tableau avant d'afficher (mais garder historique)
-        for widget in tableau_frame.winfo_children():
-            widget.destroy()
-
-        # Créer les entêtes
-        for j, col in enumerate(colonnes):
-            ctk.CTkLabel(
-                tableau_frame,
-                text=col,
-                font=("Segoe UI", 16, "bold"),
-                fg_color=THEME_BLUE,
-                text_color="white",
-                corner_radius=8
-            ).grid(row=0, column=j, padx=5, pady=8, sticky="nsew")
-
         # Vérification IP
         if not ipv4_valide(ip):
             afficher_popup("Erreur", "Adresse IP invalide")
@@ -78,13 +65,15 @@ def ouvrir_fenetre():
                     ajouter_test_historique("Vérification IP", ip, "CIDR ou masque manquant", False, user_id)
 
                 if ip_complet is not None:
-                    reseau = IPv4Network(ip_complet, strict=False)
+                    with mesure("classe", ANALYSE):
+                        reseau = IPv4Network(ip_complet, strict=False)
                     if not 8 <= reseau.prefixlen <= 30:
                         afficher_popup("Erreur", "Masque invalide")
                         historique_resultats.append([ip, f"/{cidr}" or masque or "-", "-", "❌"])
                         ajouter_test_historique("Vérification IP", ip_complet, "Masque invalide", False, user_id)
                     else:
-                        classe = verifie_classfull(reseau)
+                        with mesure("classe", CALCUL):
+                            classe = verifie_classfull(reseau)
                         if classe is ClasseIPV4.CLASSE_RESERVE:
                             historique_resultats.append([ip, f"/{cidr}" if cidr else masque, classe.value, "❌"])
                             ajouter_test_historique("Vérification IP", ip_complet, f"{classe.value}", False, user_id)
@@ -96,19 +85,8 @@ def ouvrir_fenetre():
                 ajouter_test_historique("Vérification IP", ip, "Adresse IP ou masque invalide", False, user_id)
 
         # Affichage de tout l'historique (dernier en haut)
-        for i, ligne in enumerate(reversed(historique_resultats), start=1):
-            bg_color = THEME_GREY_HOVER if i % 2 == 0 else THEME_GREY_BUTTON
-            for j, val in enumerate(ligne):
-                text_color = "green" if (j == 3 and val == "✅") else ("red" if j == 3 else THEME_TEXT_WHITE)
-
-                ctk.CTkLabel(
-                    tableau_frame,
-                    text=str(val),
-                    font=("Segoe UI", 14),
-                    text_color=text_color,
-                    fg_color=bg_color,
-                    corner_radius=6
-                ).grid(row=i, column=j, padx=5, pady=5, sticky="nsew")
+        with mesure("classe", AFFICHAGE, len(historique_resultats)):
+            tableau.definir_source(historique_resultats[::-1])
 
     # --- Reste du code inchangé ---
     ctk.set_appearance_mode("dark")
@@ -143,24 +121,18 @@ def ouvrir_fenetre():
                                  width=200, height=40, font=("Segoe UI", 14))
     inputMasque.grid(row=0, column=5, padx=10)
 
-    tableau_frame = ctk.CTkScrollableFrame(app, corner_radius=12, fg_color=THEME_GREY_BUTTON)
-    tableau_frame.pack(padx=30, pady=20, fill="both", expand=True)
     # Colonnes
     colonnes = ["IP", "Masque", "Classe", "Disponible"]
 
-    # Configurer les colonnes pour qu'elles s'étendent
-    for j in range(len(colonnes)):
-        tableau_frame.grid_columnconfigure(j, weight=1)
-        # Créer les entêtes
-        for j, col in enumerate(colonnes):
-            ctk.CTkLabel(
-                tableau_frame,
-                text=col,
-                font=("Segoe UI", 16, "bold"),
-                fg_color=THEME_BLUE,
-                text_color="white",
-                corner_radius=8
-            ).grid(row=0, column=j, padx=5, pady=8, sticky="nsew")
+    def couleur_disponible(valeur, colonne):
+        if colonne != 3:
+            return None
+        return "green" if valeur == "✅" else "red"
+
+    tableau = TableauVirtuel(app, colonnes=colonnes, couleur_entete=THEME_BLUE,
+                             couleurs_lignes=(THEME_GREY_BUTTON, THEME_GREY_HOVER), couleur_texte=THEME_TEXT_WHITE,
+                             couleur_cellule=couleur_disponible, corner_radius=12, fg_color=THEME_GREY_BUTTON)
+    tableau.pack(padx=30, pady=20, fill="both", expand=True)
 
     bouton = ctk.CTkButton(frame_inputs, text="Vérifier", width=150, height=40,
                             fg_color=THEME_BLUE, hover_color=THEME_BLUE_HOVER,
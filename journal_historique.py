@@ -0,0 +1,118 @@
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+
+from database import get_connection, fermer_connexion
+
+_ARRET = object()
+
+REQ_INSERT_HISTORIQUE = """
+INSERT INTO historique_tests (type_test, entree, resultat, est_valide, id_utilisateur)
+VALUES (?, ?, ?, ?, ?)
+"""
+
+
+class JournalHistorique:
+    """
+    Écrit historique_tests depuis un thread de fond : le thread Tk ne fait que
+    déposer l'entrée dans une file bornée. Les entrées sont regroupées dans une
+    seule transaction toutes les taille_lot entrées ou tous les delai_ms.
+    requete : INSERT exécuté pour chaque entrée (historique_tests par défaut, voir aussi mesures).
+    """
+
+    def __init__(self, taille_max=10000, taille_lot=100, delai_ms=250, requete=REQ_INSERT_HISTORIQUE,
+                 nom="historique"):
+        self.requete = requete
+        self.nom = nom
+        self.taille_lot = taille_lot
+        self.delai_ms = delai_ms
+        self._file = queue.Queue(maxsize=taille_max)
+        self._thread = None
+        self._verrou = threading.Lock()
+
+        # Compteurs
+        self.ecrits = 0
+        self.perdus = 0
+        self.erreurs = 0
+
+    @property
+    def profondeur(self):
+        """Nombre d'entrées en attente d'écriture"""
+        return self._file.qsize()
+
+    def ajouter(self, *valeurs) -> bool:
+        """Dépose une entrée (les paramètres de requete) sans bloquer ; retourne False si la file est pleine"""
+        self._demarrer()
+        try:
+            self._file.put_nowait(valeurs)
+            return True
+        except queue.Full:
+            self.perdus += 1
+            return False
+
+    def vider(self):
+        """Attend que toutes les entrées déposées soient écrites"""
+        if self._thread is not None:
+            self._file.join()
+
+    def arreter(self, timeout=5.0):
+        """Écrit les entrées restantes puis arrête le thread (appelé aussi à la sortie du programme)"""
+        with self._verrou:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._file.put(_ARRET)
+        thread.join(timeout)
+
+    def _demarrer(self):
+        if self._thread is not None:
+            return
+        with self._verrou:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._boucle, name=f"journal-{self.nom}", daemon=True)
+                self._thread.start()
+
+    def _boucle(self):
+        arret = False
+        while not arret:
+            lot = []
+            element = self._file.get()
+            limite = time.monotonic() + self.delai_ms / 1000
+            while True:
+                if element is _ARRET:
+                    arret = True
+                    self._file.task_done()
+                    break
+                lot.append(element)
+                if len(lot) >= self.taille_lot:
+                    break
+                restant = limite - time.monotonic()
+                if restant <= 0:
+                    break
+                try:
+                    element = self._file.get(timeout=restant)
+                except queue.Empty:
+                    break
+
+            if lot:
+                self._ecrire(lot)
+                for _ in lot:
+                    self._file.task_done()
+        fermer_connexion()
+
+    def _ecrire(self, lot):
+        conn = get_connection()
+        try:
+            conn.executemany(self.requete, lot)
+            conn.commit()
+            self.ecrits += len(lot)
+        except sqlite3.Error as e:
+            conn.rollback()
+            self.erreurs += len(lot)
+            print(f"Erreur lors de l'enregistrement ({self.nom}) : {e}")
+
+
+journal = JournalHistorique()
+atexit.register(journal.arreter)
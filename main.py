@@ -1,11 +1,14 @@
 from interface_connexion import creer_application, creer_cadre_principal, afficher_page_connexion
 from interface_inscription import afficher_page_inscription
-from database import init_db
+from database import init_db, fermer_connexion
+from journal_historique import journal
+import retention_historique
 
 
-init_db()
-
 def main():
+    init_db()
+    # Archivage de l'historique ancien, par petits lots pendant que l'application tourne
+    retention_historique.demarrer_en_fond()
 
     app = creer_application()
     cadre_principal = creer_cadre_principal(app)
@@ -16,7 +19,19 @@ def main():
 
     afficher_page_connexion(app, cadre_principal, ouvrir_page_inscription)
     app.mainloop()
+    retention_historique.arreter()
+    journal.arreter()
+    fermer_connexion()
 
 
 if __name__ == "__main__":
-    main()
+    import sys
+
+    if "--rapport-imports" in sys.argv:
+        from rapport_imports import afficher_rapport
+        afficher_rapport("main")
+    else:
+        if "--mesures" in sys.argv:
+            import mesures
+            mesures.activer()
+        main()
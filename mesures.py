@@ -0,0 +1,132 @@
+"""
+Durée de chaque étape des fenêtres (analyse de la saisie, calcul, affichage, enregistrement...).
+
+Désactivé par défaut : activer avec la variable d'environnement RESEAU_MESURES=1,
+python main.py --mesures, ou activer(). Désactivé, mesure() retourne toujours le même
+objet inerte : il ne reste que le coût d'un appel de fonction, rien n'est importé ni écrit.
+
+    with mesure("decoupe", CALCUL) as m:
+        plan = ...
+        m.taille = len(plan)
+
+Les mesures sont écrites dans la table mesure_etape par un thread de fond (voir
+journal_historique) ; rapport : python cli.py mesures.
+"""
+import math
+import os
+import time
+
+# Étapes
+ANALYSE = "analyse"
+CALCUL = "calcul"
+AFFICHAGE = "affichage"
+ENREGISTREMENT = "enregistrement"
+CONFLITS = "conflits"           # recherche de chevauchements après un enregistrement
+EXPORT = "export"               # écriture d'une découpe dans un fichier
+
+COLONNES_RAPPORT = ["operation", "etape", "taille", "nombre", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+
+_actives = os.environ.get("RESEAU_MESURES", "") not in ("", "0")
+_journal = None
+
+
+class _MesureInerte:
+    """Objet retourné quand les mesures sont désactivées : n'enregistre rien"""
+    taille = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_INERTE = _MesureInerte()
+
+
+class _Mesure:
+    __slots__ = ("operation", "etape", "taille", "_debut")
+
+    def __init__(self, operation, etape, taille):
+        self.operation = operation
+        self.etape = etape
+        self.taille = taille
+
+    def __enter__(self):
+        self._debut = time.perf_counter()
+        return self
+
+    def __exit__(self, type_exc, *_):
+        duree_ms = (time.perf_counter() - self._debut) * 1000
+        journal().ajouter(self.operation, self.etape, self.taille, duree_ms, type_exc is None)
+        return False
+
+
+def activer(actives=True):
+    global _actives
+    _actives = actives
+
+
+def actives() -> bool:
+    return _actives
+
+
+def mesure(operation: str, etape: str, taille: int | None = None):
+    """Gestionnaire de contexte qui mesure le bloc ; taille (nombre de sous-réseaux...) peut être fixée dans le bloc"""
+    if not _actives:
+        return _INERTE
+    return _Mesure(operation, etape, taille)
+
+
+def journal():
+    """Journal d'écriture des mesures, créé à la première mesure"""
+    global _journal
+    if _journal is None:
+        import atexit
+        from database import REQ_INSERT_MESURE
+        from journal_historique import JournalHistorique
+
+        _journal = JournalHistorique(requete=REQ_INSERT_MESURE, nom="mesures")
+        atexit.register(_journal.arreter)
+    return _journal
+
+
+# =========================
+#   RAPPORT
+# =========================
+def ordre_de_grandeur(taille: int | None) -> int:
+    """Classe de taille d'un plan : 3 pour 1000 à 9999 sous-réseaux, -1 si la taille est inconnue ou nulle"""
+    return len(str(int(taille))) - 1 if taille else -1
+
+
+def centile(durees, p: float) -> float:
+    """Centile p (0-100) d'une liste triée, par la méthode du rang le plus proche"""
+    return durees[max(0, math.ceil(p / 100 * len(durees)) - 1)]
+
+
+def rapport(depuis_jours: int | None = None, operation: str | None = None):
+    """Génère une ligne COLONNES_RAPPORT par opération, étape et ordre de grandeur de la taille du plan"""
+    from database import get_connection, REQ_MESURES_DEPUIS
+
+    if _journal is not None:
+        _journal.vider()
+    depuis = f"-{depuis_jours} days" if depuis_jours else "-100 years"
+    classes = {}
+    for op, etape, taille, duree_ms in get_connection().execute(REQ_MESURES_DEPUIS, (depuis,)):
+        if operation is None or op == operation:
+            classes.setdefault((op, etape, ordre_de_grandeur(taille)), []).append(duree_ms)
+
+    for (op, etape, ordre), durees in sorted(classes.items()):
+        durees.sort()
+        yield [op, etape, f"10^{ordre}" if ordre >= 0 else "-", len(durees),
+               *(round(centile(durees, p), 3) for p in (50, 95, 99)), round(durees[-1], 3)]
+
+
+def purger(jours: int) -> int:
+    """Supprime les mesures de plus de jours jours ; retourne le nombre de lignes supprimées"""
+    from database import get_connection, REQ_PURGER_MESURES
+
+    conn = get_connection()
+    supprimees = conn.execute(REQ_PURGER_MESURES, (f"-{jours} days",)).rowcount
+    conn.commit()
+    return supprimees
@@ -0,0 +1,440 @@
+import ipaddress
+import sqlite3
+import sys
+from array import array
+
+# =========================
+#   MIGRATIONS DU SCHÉMA
+# =========================
+# La version du schéma est stockée dans PRAGMA user_version.
+# Chaque migration fait passer la base de la version précédente à la sienne,
+# dans sa propre transaction.
+
+
+def _v1_schema_initial(cur):
+    """Tables de l'application ; sous_reseau stocke aussi début, fin et préfixe en entiers"""
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS utilisateur (
+        id_utilisateur INTEGER PRIMARY KEY AUTOINCREMENT,
+        nom_utilisateur TEXT UNIQUE NOT NULL,
+        mot_de_passe_hash TEXT NOT NULL,
+        date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""")
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS decoupe (
+        id_decoupe INTEGER PRIMARY KEY AUTOINCREMENT,
+        nom_decoupe TEXT UNIQUE NOT NULL,
+        mode TEXT CHECK(mode IN ('classful','classless')) NOT NULL,
+        ip_reseau TEXT NOT NULL,
+        masque TEXT NOT NULL,
+        nombre_sous_reseaux INTEGER,
+        nombre_ips_par_sr INTEGER,
+        type_decoupe TEXT CHECK(type_decoupe IN ('classique','vlsm')) NOT NULL,
+        date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        id_responsable INTEGER NOT NULL,
+        FOREIGN KEY(id_responsable) REFERENCES utilisateur(id_utilisateur)
+    )""")
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS sous_reseau (
+        id_sous_reseau INTEGER PRIMARY KEY AUTOINCREMENT,
+        id_decoupe INTEGER NOT NULL,
+        ip_reseau TEXT NOT NULL,
+        masque TEXT NOT NULL,
+        ip_debut TEXT NOT NULL,
+        ip_fin TEXT NOT NULL,
+        ip_broadcast TEXT NOT NULL,
+        nb_ips INTEGER,
+        debut INTEGER,
+        fin INTEGER,
+        prefixe INTEGER,
+        FOREIGN KEY(id_decoupe) REFERENCES decoupe(id_decoupe)
+    )""")
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS historique_tests (
+        id_test INTEGER PRIMARY KEY AUTOINCREMENT,
+        type_test TEXT NOT NULL,
+        entree TEXT NOT NULL,
+        resultat TEXT,
+        est_valide BOOLEAN,
+        date_test TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        id_utilisateur INTEGER,
+        FOREIGN KEY(id_utilisateur) REFERENCES utilisateur(id_utilisateur)
+    )""")
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS connexion_log (
+        id_log INTEGER PRIMARY KEY AUTOINCREMENT,
+        id_utilisateur INTEGER,
+        statut TEXT CHECK(statut IN ('succès','échec')),
+        date_connexion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        adresse_ip_client TEXT,
+        FOREIGN KEY(id_utilisateur) REFERENCES utilisateur(id_utilisateur)
+    )""")
+
+    # Bases créées avant l'ajout des colonnes entières : conversion sur place
+    colonnes = {row[1] for row in cur.execute("PRAGMA table_info(sous_reseau)")}
+    for colonne in ("debut", "fin", "prefixe"):
+        if colonne not in colonnes:
+            cur.execute(f"ALTER TABLE sous_reseau ADD COLUMN {colonne} INTEGER")
+
+    # Calculé depuis ip_reseau / ip_broadcast : l'ancienne colonne masque contenait parfois le masque de base
+    cur.connection.create_function("ip_vers_entier", 1, lambda ip: int(ipaddress.IPv4Address(ip)),
+                                   deterministic=True)
+    cur.execute("""
+        UPDATE sous_reseau
+        SET debut = ip_vers_entier(ip_reseau), fin = ip_vers_entier(ip_broadcast)
+        WHERE debut IS NULL
+    """)
+    cur.connection.create_function("prefixe_taille", 1, lambda taille: 33 - taille.bit_length(),
+                                   deterministic=True)
+    cur.execute("UPDATE sous_reseau SET prefixe = prefixe_taille(fin - debut + 1) WHERE prefixe IS NULL")
+
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_sous_reseau_decoupe_debut ON sous_reseau(id_decoupe, debut)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_sous_reseau_debut_fin ON sous_reseau(debut, fin)")
+
+
+def _v2_index_cles_etrangeres(cur):
+    """Index sur les clés étrangères lues à chaque recherche / consultation d'historique"""
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_decoupe_responsable ON decoupe(id_responsable)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_historique_utilisateur ON historique_tests(id_utilisateur, date_test)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_connexion_utilisateur ON connexion_log(id_utilisateur, date_connexion)")
+
+
+def _v3_espace_libre(cur):
+    """État sérialisé de l'allocateur buddy de chaque découpe (voir allocateur_buddy)"""
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS espace_libre (
+        id_decoupe INTEGER PRIMARY KEY,
+        etat BLOB NOT NULL,
+        FOREIGN KEY(id_decoupe) REFERENCES decoupe(id_decoupe)
+    )""")
+
+
+def _v4_recherche_decoupes(cur):
+    """
+    Recherche des découpes d'un utilisateur : index (responsable, nom sans casse) et
+    (responsable, réseau) pour les recherches par préfixe, et index plein texte FTS5
+    sur les noms quand SQLite le fournit.
+    """
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_decoupe_responsable_nom "
+                "ON decoupe(id_responsable, nom_decoupe COLLATE NOCASE)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_decoupe_responsable_ip ON decoupe(id_responsable, ip_reseau)")
+
+    try:
+        cur.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS decoupe_fts USING fts5(
+            nom_decoupe, content='decoupe', content_rowid='id_decoupe',
+            tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+        )""")
+    except sqlite3.OperationalError:
+        return  # SQLite sans FTS5 : la recherche se limite aux préfixes
+
+    # Index externe (content='decoupe') tenu à jour par triggers
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS decoupe_fts_ajout AFTER INSERT ON decoupe BEGIN
+        INSERT INTO decoupe_fts(rowid, nom_decoupe) VALUES (new.id_decoupe, new.nom_decoupe);
+    END""")
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS decoupe_fts_suppression AFTER DELETE ON decoupe BEGIN
+        INSERT INTO decoupe_fts(decoupe_fts, rowid, nom_decoupe) VALUES ('delete', old.id_decoupe, old.nom_decoupe);
+    END""")
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS decoupe_fts_renommage AFTER UPDATE OF nom_decoupe ON decoupe BEGIN
+        INSERT INTO decoupe_fts(decoupe_fts, rowid, nom_decoupe) VALUES ('delete', old.id_decoupe, old.nom_decoupe);
+        INSERT INTO decoupe_fts(rowid, nom_decoupe) VALUES (new.id_decoupe, new.nom_decoupe);
+    END""")
+    cur.execute("INSERT INTO decoupe_fts(decoupe_fts) VALUES ('rebuild')")
+
+
+def _v5_decoupes_parametriques(cur):
+    """
+    Découpes classiques enregistrées par leurs seuls paramètres : nouveau_prefixe non NULL
+    signifie qu'aucune ligne sous_reseau n'est stockée, elles sont recalculées à la lecture.
+    """
+    colonnes = {row[1] for row in cur.execute("PRAGMA table_info(decoupe)")}
+    if "nouveau_prefixe" not in colonnes:
+        cur.execute("ALTER TABLE decoupe ADD COLUMN nouveau_prefixe INTEGER")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_decoupe_parametrique ON decoupe(id_decoupe) "
+                "WHERE nouveau_prefixe IS NOT NULL")
+
+
+def _v6_mesures(cur):
+    """Durées des étapes (analyse, calcul, affichage, enregistrement) relevées par le module mesures"""
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS mesure_etape (
+        id_mesure INTEGER PRIMARY KEY AUTOINCREMENT,
+        operation TEXT NOT NULL,
+        etape TEXT NOT NULL,
+        taille INTEGER,
+        duree_ms REAL NOT NULL,
+        succes BOOLEAN NOT NULL,
+        date_mesure TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_mesure_date ON mesure_etape(date_mesure)")
+
+
+def _v7_retention_historique(cur):
+    """
+    Rétention (voir retention_historique) : agrégats quotidiens des lignes archivées et index
+    sur les dates, pour retrouver les lignes les plus anciennes sans parcourir les tables.
+    id_utilisateur vaut 0 (et statut '') quand la ligne d'origine n'en avait pas.
+    """
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS historique_quotidien (
+        jour TEXT NOT NULL,
+        id_utilisateur INTEGER NOT NULL,
+        type_test TEXT NOT NULL,
+        nombre INTEGER NOT NULL,
+        nombre_valides INTEGER NOT NULL,
+        PRIMARY KEY (jour, id_utilisateur, type_test)
+    )""")
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS connexion_quotidienne (
+        jour TEXT NOT NULL,
+        id_utilisateur INTEGER NOT NULL,
+        statut TEXT NOT NULL,
+        nombre INTEGER NOT NULL,
+        PRIMARY KEY (jour, id_utilisateur, statut)
+    )""")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_historique_date ON historique_tests(date_test)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_connexion_date ON connexion_log(date_connexion)")
+
+
+def _v8_plages_parametriques(cur):
+    """
+    Plage d'adresses [debut_plage, fin_plage] de chaque découpe paramétrique, indexée : l'appartenance
+    d'une IP et les chevauchements ne parcourent plus toutes les découpes paramétriques.
+    """
+    colonnes = {row[1] for row in cur.execute("PRAGMA table_info(decoupe)")}
+    for colonne in ("debut_plage", "fin_plage"):
+        if colonne not in colonnes:
+            cur.execute(f"ALTER TABLE decoupe ADD COLUMN {colonne} INTEGER")
+
+    cur.connection.create_function(
+        "debut_reseau", 2, lambda ip, masque: int(ipaddress.ip_network(f"{ip}/{masque}", strict=False).network_address),
+        deterministic=True)
+    cur.execute("""
+        UPDATE decoupe SET debut_plage = debut_reseau(ip_reseau, masque)
+        WHERE nouveau_prefixe IS NOT NULL AND debut_plage IS NULL
+    """)
+    cur.execute("""
+        UPDATE decoupe SET fin_plage = debut_plage + nombre_sous_reseaux * (1 << (32 - nouveau_prefixe)) - 1
+        WHERE nouveau_prefixe IS NOT NULL AND fin_plage IS NULL
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_decoupe_plage ON decoupe(debut_plage, fin_plage) "
+                "WHERE nouveau_prefixe IS NOT NULL")
+
+
+def _v9_blocs_libres(cur):
+    """
+    Espace libre des découpes en lignes bloc_libre (un bloc aligné libre par ligne) au lieu d'un
+    état sérialisé : allouer ou libérer n'écrit plus que les blocs découpés ou fusionnés.
+    espace_libre ne garde que les découpes dont l'espace libre est suivi.
+    """
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS bloc_libre (
+        id_decoupe INTEGER NOT NULL,
+        prefixe INTEGER NOT NULL,
+        debut INTEGER NOT NULL,
+        PRIMARY KEY (id_decoupe, prefixe, debut),
+        FOREIGN KEY(id_decoupe) REFERENCES decoupe(id_decoupe)
+    )""")
+
+    colonnes = {row[1] for row in cur.execute("PRAGMA table_info(espace_libre)")}
+    if "etat" not in colonnes:
+        return
+    # Ancien état : un entier 64 bits (début << 8 | préfixe) par bloc, le premier étant le réseau lui-même
+    for id_decoupe, etat in cur.execute("SELECT id_decoupe, etat FROM espace_libre").fetchall():
+        blocs = array("Q")
+        blocs.frombytes(etat)
+        cur.executemany("INSERT OR IGNORE INTO bloc_libre (id_decoupe, prefixe, debut) VALUES (?, ?, ?)",
+                        ((id_decoupe, bloc & 0xFF, bloc >> 8) for bloc in blocs[1:]))
+    cur.execute("""
+    CREATE TABLE espace_libre_v9 (
+        id_decoupe INTEGER PRIMARY KEY,
+        FOREIGN KEY(id_decoupe) REFERENCES decoupe(id_decoupe)
+    )""")
+    cur.execute("INSERT INTO espace_libre_v9 (id_decoupe) SELECT id_decoupe FROM espace_libre")
+    cur.execute("DROP TABLE espace_libre")
+    cur.execute("ALTER TABLE espace_libre_v9 RENAME TO espace_libre")
+
+
+def _v10_empreinte_decoupe(cur):
+    """
+    Empreinte du plan enregistré (voir PlanDecoupe.empreinte) : un enregistrement interrompu n'est
+    repris que par le même plan, jamais par un autre plan portant le même nom.
+    """
+    colonnes = {row[1] for row in cur.execute("PRAGMA table_info(decoupe)")}
+    if "empreinte" not in colonnes:
+        cur.execute("ALTER TABLE decoupe ADD COLUMN empreinte TEXT")
+
+
+def _v11_pagination_sous_reseaux(cur):
+    """
+    Index (id_decoupe, debut, id_sous_reseau) pour la pagination par clé (debut, id_sous_reseau) : debut
+    seul n'est pas unique dans une découpe. Il remplace l'index (id_decoupe, debut), dont il est un préfixe.
+    """
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_sous_reseau_decoupe_debut_id "
+                "ON sous_reseau(id_decoupe, debut, id_sous_reseau)")
+    cur.execute("DROP INDEX IF EXISTS idx_sous_reseau_decoupe_debut")
+
+
+def _v12_modifications_decoupes(cur):
+    """
+    Dernière modification de chaque découpe (numéro croissant dans toute la base), tenue par des triggers :
+    sous-réseau retiré ou déplacé, découpe matérialisée, renommée ou supprimée. Le moteur d'appartenance
+    (voir appartenance_ip) ne recharge que les découpes modifiées depuis son dernier rafraîchissement.
+    """
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS modification_decoupe (
+        id_decoupe INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL
+    )""")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_modification_decoupe_version ON modification_decoupe(version)")
+
+    noter = """
+        INSERT OR REPLACE INTO modification_decoupe (id_decoupe, version)
+        VALUES ({id}, (SELECT IFNULL(MAX(version), 0) + 1 FROM modification_decoupe));
+    """
+    cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS sous_reseau_modification_suppression AFTER DELETE ON sous_reseau BEGIN
+        {noter.format(id="OLD.id_decoupe")}
+    END""")
+    cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS sous_reseau_modification_mise_a_jour
+    AFTER UPDATE OF id_decoupe, debut, prefixe ON sous_reseau BEGIN
+        {noter.format(id="OLD.id_decoupe")}
+        {noter.format(id="NEW.id_decoupe")}
+    END""")
+    cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS decoupe_modification_mise_a_jour
+    AFTER UPDATE OF nom_decoupe, ip_reseau, masque, nouveau_prefixe ON decoupe BEGIN
+        {noter.format(id="OLD.id_decoupe")}
+    END""")
+    cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS decoupe_modification_suppression AFTER DELETE ON decoupe BEGIN
+        {noter.format(id="OLD.id_decoupe")}
+    END""")
+
+
+MIGRATIONS = [
+    (1, _v1_schema_initial),
+    (2, _v2_index_cles_etrangeres),
+    (3, _v3_espace_libre),
+    (4, _v4_recherche_decoupes),
+    (5, _v5_decoupes_parametriques),
+    (6, _v6_mesures),
+    (7, _v7_retention_historique),
+    (8, _v8_plages_parametriques),
+    (9, _v9_blocs_libres),
+    (10, _v10_empreinte_decoupe),
+    (11, _v11_pagination_sous_reseaux),
+    (12, _v12_modifications_decoupes),
+]
+
+VERSION_SCHEMA = MIGRATIONS[-1][0]
+
+
+def appliquer_migrations(conn):
+    """
+    Met le schéma à jour. Si la base est déjà à VERSION_SCHEMA, aucune DDL n'est
+    exécutée : une seule lecture de PRAGMA user_version.
+    Retourne la liste des versions appliquées.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= VERSION_SCHEMA:
+        return []
+
+    appliquees = []
+    for numero, migration in MIGRATIONS:
+        if numero <= version:
+            continue
+        cur = conn.cursor()
+        cur.execute("BEGIN")
+        try:
+            migration(cur)
+            cur.execute(f"PRAGMA user_version = {numero}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        appliquees.append(numero)
+    return appliquees
+
+
+# =========================
+#   VÉRIFICATION DES PLANS
+# =========================
+def requetes_indexees():
+    """
+    Requêtes de l'application et index que SQLite doit utiliser pour chacune :
+    nom -> (sql, paramètres, index attendu)
+    """
+    import database
+
+    return {
+        "connexion (utilisateur par nom)": (database.REQ_UTILISATEUR_PAR_NOM, ("x",),
+                                            "sqlite_autoindex_utilisateur_1"),
+        "recherche (découpe par nom)": (database.REQ_DECOUPE_PAR_NOM, ("x",), "sqlite_autoindex_decoupe_1"),
+        "recherche (sous-réseaux d'une découpe)": (database.REQ_SOUS_RESEAUX_DECOUPE, (1,),
+                                                   "idx_sous_reseau_decoupe_debut_id"),
+        "page de sous-réseaux": (database.REQ_SOUS_RESEAUX_PAGE, (1, 0, 0, 100), "idx_sous_reseau_decoupe_debut_id"),
+        "page précédente de sous-réseaux": (database.REQ_SOUS_RESEAUX_PAGE_PRECEDENTE, (1, 0, 0, 100),
+                                            "idx_sous_reseau_decoupe_debut_id"),
+        "sous-réseau contenant une IP (saut)": (database.REQ_SOUS_RESEAU_DEBUT_AVANT, (1, 0),
+                                                "idx_sous_reseau_decoupe_debut_id"),
+        "découpes d'un responsable": (database.REQ_DECOUPES_RESPONSABLE, (1,), "idx_decoupe_responsable"),
+        "historique d'un utilisateur": (database.REQ_HISTORIQUE_UTILISATEUR, (1,), "idx_historique_utilisateur"),
+        "sous-réseaux contenant une IP": (database.REQ_SOUS_RESEAUX_CONTENANT.format(marques="?"), (0, 0),
+                                          "idx_sous_reseau_debut_fin"),
+        "sous-réseaux inclus dans un réseau": (database.REQ_SOUS_RESEAUX_DANS, (0, 0, 0),
+                                               "idx_sous_reseau_debut_fin"),
+        "recherche (découpe par nom et responsable)": (database.REQ_DECOUPE_RESPONSABLE, ("x", 1),
+                                                       "sqlite_autoindex_decoupe_1"),
+        "découpes paramétriques": (database.REQ_DECOUPES_PARAMETRIQUES_DEPUIS, (0,), "idx_decoupe_parametrique"),
+        "découpes paramétriques commençant dans une plage": (database.REQ_PLANS_PLAGE, (0, 0), "idx_decoupe_plage"),
+        "découpes paramétriques englobant une adresse": (database.REQ_PLANS_ENGLOBANT.format(marques="?"), (0, 0),
+                                                         "idx_decoupe_plage"),
+        "balayage des sous-réseaux par adresse": (database.REQ_INTERVALLES_TOUS, (), "idx_sous_reseau_debut_fin"),
+        "sous-réseaux commençant dans une plage": (database.REQ_INTERVALLES_PLAGE, (0, 0),
+                                                   "idx_sous_reseau_debut_fin"),
+        "sous-réseaux englobant une plage": (database.REQ_INTERVALLES_ENGLOBANT.format(marques="?"), (0, 0),
+                                             "idx_sous_reseau_debut_fin"),
+        "intervalles d'une découpe": (database.REQ_INTERVALLES_DECOUPE, (1,), "idx_sous_reseau_decoupe_debut_id"),
+        "découpes par préfixe du nom": (database.REQ_DECOUPES_PREFIXE_NOM, (1, "a", "b", "a", "a", 0, 20),
+                                        "idx_decoupe_responsable_nom"),
+        "découpes par préfixe du réseau": (database.REQ_DECOUPES_PREFIXE_IP, (1, "10.", "10/", "", 0, 20),
+                                           "idx_decoupe_responsable_ip"),
+        "mesures récentes": (database.REQ_MESURES_DEPUIS, ("-7 days",), "idx_mesure_date"),
+        "découpes modifiées": (database.REQ_DECOUPES_MODIFIEES, (0,), "idx_modification_decoupe_version"),
+        "bloc libre le plus bas": (database.REQ_BLOC_LIBRE_PLUS_BAS, (1, 24), "sqlite_autoindex_bloc_libre_1"),
+        "historique à archiver": (database.REQ_HISTORIQUE_ANCIEN, ("-90 days", 500), "idx_historique_date"),
+        "connexions à archiver": (database.REQ_CONNEXIONS_ANCIENNES, ("-90 days", 500), "idx_connexion_date"),
+    }
+
+
+def verifier_plans_requetes(conn):
+    """
+    Exécute EXPLAIN QUERY PLAN sur chaque requête de requetes_indexees().
+    Retourne une liste de (nom, index attendu, ok, plan).
+    Un SCAN n'est accepté que sur l'index attendu (index partiel parcouru en entier).
+    """
+    resultats = []
+    for nom, (sql, params, index) in requetes_indexees().items():
+        etapes = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        plan = " | ".join(etapes)
+        ok = f"INDEX {index}" in plan and not any(
+            "SCAN" in etape and f"INDEX {index}" not in etape for etape in etapes
+        )
+        resultats.append((nom, index, ok, plan))
+    return resultats
+
+
+if __name__ == "__main__":
+    import database
+
+    database.init_db()
+    echecs = 0
+    for nom, index, ok, plan in verifier_plans_requetes(database.get_connection()):
+        print(f"{'OK ' if ok else 'KO '} {nom} -> {index}\n      {plan}")
+        echecs += not ok
+    sys.exit(1 if echecs else 0)
@@ -0,0 +1,139 @@
+"""
+Calcul réparti sur plusieurs processus (ProcessPoolExecutor).
+
+Une grande découpe est partagée en tranches d'index (donc de plages d'adresses) calculées
+par les processus ; les résultats reviennent dans l'ordre, au fil de l'eau, vers l'export
+ou l'enregistrement en base. Des tâches indépendantes (découpes par lot) sont réparties
+de la même façon.
+"""
+import io
+import itertools
+import os
+from collections import deque
+
+TAILLE_TRANCHE = 65536              # sous-réseaux calculés par tâche
+SEUIL_PARALLELE = 1_000_000         # en dessous, le démarrage des processus coûte plus qu'il ne rapporte
+TACHES_EN_VOL_PAR_PROCESSUS = 2     # tranches en attente par processus (borne la mémoire)
+
+# Plan du processus de calcul, transmis une seule fois au démarrage de chaque processus
+_plan = None
+
+
+def _pool(processus, **options):
+    """
+    ProcessPoolExecutor en mode "spawn" partout : pas de fork d'un processus qui a déjà des
+    threads, une connexion SQLite ou Tk. Importé ici seulement (plusieurs dizaines de ms).
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    return ProcessPoolExecutor(processus, mp_context=multiprocessing.get_context("spawn"), **options)
+
+
+def _initialiser(plan):
+    global _plan
+    _plan = plan
+
+
+def _lignes_tranche(nature, debut, fin):
+    if nature == "enregistrements":
+        return list(itertools.islice(_plan.enregistrements(debut), fin - debut))
+    if nature == "export":
+        return [e[:6] for e in itertools.islice(_plan.enregistrements(debut), fin - debut)]
+    if nature == "lignes":
+        return [ligne for bloc in _plan.lignes_par_blocs(debut, fin, fin - debut) for ligne in bloc]
+    raise ValueError(f"Nature de tranche inconnue : {nature}")
+
+
+def _tranche(nature, debut, fin, format_sortie=None, colonnes=None):
+    """Calcule les lignes [debut, fin) du plan ; déjà mises en forme (CSV / JSON Lines) si format_sortie est donné"""
+    lignes = _lignes_tranche(nature, debut, fin)
+    if format_sortie is None:
+        return lignes
+    from export_decoupe import Sortie
+
+    flux = io.StringIO()
+    Sortie(flux, format_sortie, colonnes, entete=False).ecrire_tout(lignes)
+    return flux.getvalue(), len(lignes)
+
+
+def nombre_processus(nombre_lignes: int, processus: int | None = None) -> int:
+    """Processus à utiliser : ceux demandés, sinon tous les cœurs pour une grande découpe, sinon 1"""
+    if processus:
+        return max(1, processus)
+    return (os.cpu_count() or 1) if nombre_lignes >= SEUIL_PARALLELE else 1
+
+
+def resultats_ordonnes(executeur, fonction, arguments, en_vol):
+    """Soumet les tâches au fur et à mesure (au plus en_vol en attente) et génère leurs résultats dans l'ordre"""
+    attente = deque()
+    try:
+        for args in arguments:
+            attente.append(executeur.submit(fonction, *args))
+            if len(attente) >= en_vol:
+                yield attente.popleft().result()
+        while attente:
+            yield attente.popleft().result()
+    finally:
+        # Consommateur arrêté avant la fin : les tranches pas encore commencées sont abandonnées
+        for future in attente:
+            future.cancel()
+
+
+def _executer_lot(fonction, lot):
+    return [fonction(*args) for args in lot]
+
+
+def executer_taches(fonction, arguments, processus=None, taille_lot=256):
+    """
+    Exécute fonction(*args) pour chaque args sur un pool de processus, par lots de taille_lot
+    (un aller-retour entre processus par lot) ; génère les résultats dans l'ordre des arguments.
+    fonction doit être définie au niveau d'un module (elle est transmise aux processus).
+    """
+    processus = processus or os.cpu_count() or 1
+    arguments = iter(arguments)
+    lots = iter(lambda: list(itertools.islice(arguments, taille_lot)), [])
+    with _pool(processus) as executeur:
+        for resultats in resultats_ordonnes(executeur, _executer_lot, ((fonction, lot) for lot in lots),
+                                            processus * TACHES_EN_VOL_PAR_PROCESSUS):
+            yield from resultats
+
+
+class PlanParallele:
+    """
+    Enveloppe un plan (PlanDecoupe, PlanVLSM) : même interface pour enregistrements() et
+    lignes_par_blocs(), mais calculée par tranches sur plusieurs processus. Le reste
+    (ligne, index_de, bornes...) est délégué au plan.
+    """
+
+    def __init__(self, plan, processus=None, taille_tranche=TAILLE_TRANCHE):
+        self.plan = plan
+        self.processus = processus or os.cpu_count() or 1
+        self.taille_tranche = taille_tranche
+
+    def __len__(self):
+        return len(self.plan)
+
+    def __getattr__(self, nom):
+        return getattr(self.plan, nom)
+
+    def tranches(self, nature, debut=0, fin=None, format_sortie=None, colonnes=None):
+        """Génère les résultats de _tranche pour [debut, fin), tranche par tranche et dans l'ordre"""
+        fin = len(self.plan) if fin is None else min(fin, len(self.plan))
+        bornes = ((nature, d, min(d + self.taille_tranche, fin), format_sortie, colonnes)
+                  for d in range(max(debut, 0), fin, self.taille_tranche))
+        with _pool(self.processus, initializer=_initialiser, initargs=(self.plan,)) as executeur:
+            yield from resultats_ordonnes(executeur, _tranche, bornes,
+                                          self.processus * TACHES_EN_VOL_PAR_PROCESSUS)
+
+    def enregistrements(self, debut=0):
+        for bloc in self.tranches("enregistrements", debut):
+            yield from bloc
+
+    def lignes_par_blocs(self, debut=0, fin=None, taille_bloc=None):
+        """Un bloc par tranche (taille_bloc est ignoré : c'est taille_tranche qui compte)"""
+        yield from self.tranches("lignes", debut, fin)
+
+    def blocs_texte(self, nature, format_sortie, colonnes, debut=0, fin=None):
+        """Génère (texte, nombre de lignes) déjà mis en forme par les processus : il ne reste qu'à l'écrire"""
+        yield from self.tranches(nature, debut, fin, format_sortie, colonnes)
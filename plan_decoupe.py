@@ -0,0 +1,336 @@
+import ipaddress
+import socket
+
+_np = False  # NumPy pas encore chargé (voir numpy_ou_none)
+
+
+def numpy_ou_none():
+    """
+    NumPy s'il est installé, sinon None (les lignes sont alors calculées une par une).
+    Importé au premier besoin seulement : son import coûte une centaine de ms au démarrage.
+    """
+    global _np
+    if _np is False:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:
+            _np = None
+    return _np
+
+
+def entier_vers_ip(valeur: int) -> str:
+    """Convertit un entier 32 bits en adresse pointée (ex: 3232235776 -> '192.168.1.0')"""
+    return socket.inet_ntoa(valeur.to_bytes(4, "big"))
+
+
+def _octets(valeurs) -> list[list[int]]:
+    """Sépare un tableau uint32 d'adresses en 4 listes d'octets"""
+    np = numpy_ou_none()
+    valeurs = np.asarray(valeurs, dtype=np.uint32)
+    return [((valeurs >> decalage) & 0xFF).tolist() for decalage in (24, 16, 8, 0)]
+
+
+def formater_ips(valeurs) -> list[str]:
+    """Formate un tableau uint32 d'adresses en chaînes pointées"""
+    return ["%d.%d.%d.%d" % octets for octets in zip(*_octets(valeurs))]
+
+
+def colonnes_depuis_debuts(debuts, prefixes) -> dict:
+    """
+    Calcule en une fois, en tableaux uint32, les colonnes d'un ensemble de sous-réseaux :
+    reseau, broadcast, premier, dernier (hôtes) et nb_hotes.
+    """
+    np = numpy_ou_none()
+    debuts = np.asarray(debuts, dtype=np.uint32)
+    tailles = np.left_shift(np.uint64(1), (32 - np.asarray(prefixes, dtype=np.int64)).astype(np.uint64))
+    broadcast = (debuts + (tailles - 1)).astype(np.uint32)
+    avec_hotes = tailles >= 4
+    return {
+        "reseau": debuts,
+        "broadcast": broadcast,
+        "premier": np.where(avec_hotes, debuts + np.uint32(1), 0).astype(np.uint32),
+        "dernier": np.where(avec_hotes, broadcast - np.uint32(1), 0).astype(np.uint32),
+        "nb_hotes": np.where(avec_hotes, tailles - 2, 0).astype(np.uint32),
+    }
+
+
+def lignes_depuis_colonnes(colonnes: dict, noms) -> list[list[str]]:
+    """Formate en lignes d'affichage (voir ligne_sous_reseau) des colonnes déjà calculées"""
+    reseaux = formater_ips(colonnes["reseau"])
+    broadcasts = formater_ips(colonnes["broadcast"])
+    plages = ["%d.%d.%d.%d - %d.%d.%d.%d" % octets
+              for octets in zip(*_octets(colonnes["premier"]), *_octets(colonnes["dernier"]))]
+    nb_hotes = colonnes["nb_hotes"].tolist()
+    return [
+        [nom, reseau, broadcast, plage if hotes else "Aucun", str(hotes)]
+        for nom, reseau, broadcast, plage, hotes in zip(noms, reseaux, broadcasts, plages, nb_hotes)
+    ]
+
+
+def backend_vectoriel_disponible() -> bool:
+    return numpy_ou_none() is not None
+
+
+def masque_de_prefixe(prefixe: int) -> str:
+    """Ex: 24 -> '255.255.255.0'"""
+    return entier_vers_ip((0xFFFFFFFF << (32 - prefixe)) & 0xFFFFFFFF)
+
+
+def ligne_sous_reseau(nom: str, reseau: int, prefixe: int) -> list[str]:
+    """
+    Ligne prête pour l'affichage :
+    [Nom, Adresse réseau, Broadcast, Plage utilisable, Nb hôtes]
+    """
+    taille = 1 << (32 - prefixe)
+    broadcast = reseau + taille - 1
+    if taille >= 4:
+        plage = f"{entier_vers_ip(reseau + 1)} - {entier_vers_ip(broadcast - 1)}"
+        nb_hotes = taille - 2
+    else:
+        plage = "Aucun"
+        nb_hotes = 0
+    return [nom, entier_vers_ip(reseau), entier_vers_ip(broadcast), plage, str(nb_hotes)]
+
+
+def enregistrement_sous_reseau(reseau: int, prefixe: int, masque: str | None = None) -> tuple:
+    """
+    Tuple à insérer dans sous_reseau :
+    (ip_reseau, masque, ip_debut, ip_fin, ip_broadcast, nb_ips, debut, fin, prefixe)
+    """
+    taille = 1 << (32 - prefixe)
+    broadcast = reseau + taille - 1
+    if taille >= 4:
+        ip_debut, ip_fin = entier_vers_ip(reseau + 1), entier_vers_ip(broadcast - 1)
+        nb_ips = taille - 2
+    else:
+        ip_debut, ip_fin = "", ""
+        nb_ips = 0
+    return (entier_vers_ip(reseau), masque or masque_de_prefixe(prefixe), ip_debut, ip_fin,
+            entier_vers_ip(broadcast), nb_ips, reseau, broadcast, prefixe)
+
+
+class PlanDecoupe:
+    """
+    Découpe classique d'un réseau en sous-réseaux de même taille.
+    Aucun sous-réseau n'est stocké : le k-ième est recalculé à partir de son
+    index (adresse = début + k * taille), la mémoire reste donc constante
+    quelle que soit la taille de la découpe.
+    """
+
+    def __init__(self, net: ipaddress.IPv4Network, new_prefix: int, nombre: int | None = None):
+        if not net.prefixlen <= new_prefix <= 32:
+            raise ValueError(f"Préfixe /{new_prefix} invalide pour {net.with_prefixlen}.")
+
+        self.net = net
+        self.new_prefix = new_prefix
+        self.debut = int(net.network_address)
+        self.taille = 1 << (32 - new_prefix)
+        self.masque = masque_de_prefixe(new_prefix)
+
+        total = 1 << (new_prefix - net.prefixlen)
+        self.nombre = total if nombre is None else min(nombre, total)
+
+    def __len__(self):
+        return self.nombre
+
+    def _index(self, k: int) -> int:
+        """Normalise un index (les index négatifs partent de la fin)"""
+        if k < 0:
+            k += self.nombre
+        if not 0 <= k < self.nombre:
+            raise IndexError(f"Sous-réseau {k + 1} hors de la découpe ({self.nombre} SR).")
+        return k
+
+    def bornes(self, k: int) -> tuple[int, int]:
+        """Retourne (adresse réseau, broadcast) du k-ième sous-réseau sous forme d'entiers"""
+        reseau = self.debut + self._index(k) * self.taille
+        return reseau, reseau + self.taille - 1
+
+    def __getitem__(self, k: int) -> ipaddress.IPv4Network:
+        reseau, _ = self.bornes(k)
+        return ipaddress.IPv4Network((reseau, self.new_prefix))
+
+    def __iter__(self):
+        for k in range(self.nombre):
+            yield self[k]
+
+    def index_de(self, ip: str | int) -> int:
+        """Retourne l'index du sous-réseau contenant l'IP (ex: pour sauter directement à lui)"""
+        valeur = int(ipaddress.IPv4Address(ip))
+        k = (valeur - self.debut) // self.taille
+        if valeur < self.debut or k >= self.nombre:
+            raise ValueError(f"{ipaddress.IPv4Address(valeur)} n'appartient à aucun sous-réseau de la découpe.")
+        return k
+
+    def ligne(self, k: int) -> list[str]:
+        """Ligne d'affichage du k-ième sous-réseau (voir ligne_sous_reseau)"""
+        k = self._index(k)
+        return ligne_sous_reseau(f"Sous-réseau {k + 1}", self.debut + k * self.taille, self.new_prefix)
+
+    def lignes(self, debut: int = 0, fin: int | None = None):
+        """Génère les lignes d'affichage de l'index debut (inclus) à fin (exclu)"""
+        fin = self.nombre if fin is None else min(fin, self.nombre)
+        for k in range(max(debut, 0), fin):
+            yield self.ligne(k)
+
+    def colonnes(self, debut: int = 0, fin: int | None = None) -> dict:
+        """
+        Colonnes uint32 (reseau, broadcast, premier, dernier, nb_hotes) des sous-réseaux
+        d'index debut à fin, calculées en une fois avec NumPy (aucune chaîne n'est formatée).
+        """
+        np = numpy_ou_none()
+        if np is None:
+            raise RuntimeError("NumPy n'est pas installé : backend vectoriel indisponible.")
+        fin = self.nombre if fin is None else min(fin, self.nombre)
+        debuts = self.debut + np.arange(max(debut, 0), fin, dtype=np.uint64) * np.uint64(self.taille)
+        return colonnes_depuis_debuts(debuts, np.full(len(debuts), self.new_prefix, dtype=np.uint8))
+
+    def lignes_par_blocs(self, debut: int = 0, fin: int | None = None, taille_bloc: int = 65536):
+        """
+        Comme lignes(), mais par blocs de taille_bloc lignes : avec NumPy chaque bloc est
+        calculé de façon vectorisée, sinon on retombe sur le calcul ligne par ligne.
+        """
+        fin = self.nombre if fin is None else min(fin, self.nombre)
+        for bloc in range(max(debut, 0), fin, taille_bloc):
+            bloc_fin = min(bloc + taille_bloc, fin)
+            if numpy_ou_none() is None:
+                yield list(self.lignes(bloc, bloc_fin))
+            else:
+                noms = (f"Sous-réseau {k + 1}" for k in range(bloc, bloc_fin))
+                yield lignes_depuis_colonnes(self.colonnes(bloc, bloc_fin), noms)
+
+    def nombre_pages(self, taille_page: int) -> int:
+        return -(-self.nombre // taille_page)
+
+    def page(self, numero: int, taille_page: int = 100) -> list[list[str]]:
+        """Retourne la page numero (à partir de 0) de taille_page lignes"""
+        debut = numero * taille_page
+        return list(self.lignes(debut, debut + taille_page))
+
+    def enregistrements(self, debut: int = 0):
+        """Génère les tuples à insérer dans sous_reseau (voir enregistrement_sous_reseau)"""
+        for k in range(debut, self.nombre):
+            yield enregistrement_sous_reseau(self.debut + k * self.taille, self.new_prefix, self.masque)
+
+    def empreinte(self) -> str:
+        """Empreinte du contenu (mêmes sous-réseaux <=> même empreinte), pour la reprise d'un enregistrement"""
+        import hashlib  # seulement à l'enregistrement : hashlib coûte quelques ms au démarrage
+
+        return hashlib.sha256(f"{self.debut}/{self.new_prefix}x{self.nombre}".encode()).hexdigest()
+
+
+# =========================
+#   CALCUL DE LA DÉCOUPE
+# =========================
+def parser_reseau(reseau_de_base: str, masque_str: str | None) -> ipaddress.IPv4Network:
+    """
+    Accepte :
+      - '192.168.1.0/24' (CIDR)
+      - '192.168.1.0' + masque '/24' ou '255.255.255.0'
+    Retourne un IPv4Network (strict=False pour tolérer une IP d'hôte).
+    """
+    if not reseau_de_base or not reseau_de_base.strip():  # strip supprime les espaces
+        raise ValueError("Réseau de base manquant.")
+
+    reseau_de_base = reseau_de_base.strip()
+
+    # Si CIDR déjà fourni
+    if "/" in reseau_de_base:
+        net = ipaddress.ip_network(reseau_de_base, strict=False)
+    else:
+        if masque_str is None or not masque_str.strip():
+            raise ValueError("Masque manquant. Fournis un masque (ex: 255.255.255.0 ou /24).")
+        masque_str = masque_str.strip()
+
+        if masque_str.startswith("/"):
+            try:
+                prefix = int(masque_str[1:])
+            except ValueError:
+                raise ValueError("Préfixe invalide. Exemple : /24")
+        else:
+            # Convertir un masque pointé en préfixe
+            try:
+                prefix = ipaddress.IPv4Network(f"0.0.0.0/{masque_str}").prefixlen
+            except Exception:
+                raise ValueError("Masque invalide. Exemples valides : 255.255.255.0 ou /24")
+
+        if not (0 <= prefix <= 32):
+            raise ValueError("Préfixe invalide : doit être entre /0 et /32.")
+
+        net = ipaddress.ip_network(f"{reseau_de_base}/{prefix}", strict=False)
+
+    if net.version != 4:
+        raise NotImplementedError("Seul IPv4 est géré dans cette version.")
+    return net
+
+
+def reseau_classful(reseau_de_base: str) -> str:
+    """Retourne 'ip/8', 'ip/16' ou 'ip/24' selon la classe A/B/C de l'IP (le masque saisi est ignoré)"""
+    ip_obj = ipaddress.IPv4Address(reseau_de_base.split("/")[0].strip())
+    premier_octet = int(ip_obj) >> 24
+    if 1 <= premier_octet <= 126:
+        prefix = 8
+    elif 128 <= premier_octet <= 191:
+        prefix = 16
+    elif 192 <= premier_octet <= 223:
+        prefix = 24
+    else:
+        raise ValueError("IP non classée dans A/B/C.")
+    return f"{ip_obj}/{prefix}"
+
+
+def calculer_sous_reseaux(
+        reseau_de_base: str,
+        nb_sous_reseaux: int | None = None,
+        masque: str | None = None,
+        nb_ips_utilisables: int | None = None
+):
+    """
+    Calcule des sous-réseaux en respectant :
+      - nb_sous_reseaux (optionnel)
+      - nb_ips_utilisables par SR (optionnel)
+    Retourne (PlanDecoupe paresseux, nouveau préfixe, réseau de base).
+    """
+    net = parser_reseau(reseau_de_base, masque if "/" not in reseau_de_base else None)
+    p = net.prefixlen
+
+    # Normaliser les entrées
+    s_bits = 0
+    if nb_sous_reseaux is not None:
+        if nb_sous_reseaux <= 0:
+            raise ValueError("Le nombre de sous-réseaux doit être strictement positif.")
+        s_bits = (nb_sous_reseaux - 1).bit_length()  # ceil(log2(n))
+    prefix_from_subnets = p + s_bits  # borne inférieure sur le /xx
+
+    prefix_from_hosts_max = 32  # pas de contrainte par défaut
+    if nb_ips_utilisables is not None:
+        if nb_ips_utilisables <= 0:
+            raise ValueError("Le nombre d'IP utilisables / SR doit être strictement positif.")
+        required_total = nb_ips_utilisables + 2  # règle IPv4 classique
+        if required_total < 4:
+            required_total = 4
+        h = (required_total - 1).bit_length()  # ceil(log2(required_total))
+        prefix_from_hosts_max = 32 - h  # /xx max autorisé pour respecter le nb d'IP
+
+        if prefix_from_hosts_max < p:
+            raise ValueError(
+                f"Incompatible : {net.with_prefixlen} ne peut pas fournir {nb_ips_utilisables} IP utilisables "
+                f"par sous-réseau."
+            )
+
+    if nb_sous_reseaux is not None and nb_ips_utilisables is not None:
+        if prefix_from_subnets > prefix_from_hosts_max:
+            raise ValueError(
+                f"Incompatible : impossible de créer {nb_sous_reseaux} sous-réseau(x) avec "
+                f"{nb_ips_utilisables} IP utilisables chacun dans {net.with_prefixlen}."
+            )
+
+    if nb_sous_reseaux is not None:
+        new_prefix = prefix_from_subnets
+    elif nb_ips_utilisables is not None:
+        new_prefix = max(p, prefix_from_hosts_max)
+    else:
+        new_prefix = p  # pas de découpe
+
+    return PlanDecoupe(net, new_prefix, nb_sous_reseaux), new_prefix, net
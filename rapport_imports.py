@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+# =========================
+#   RAPPORT DES IMPORTS
+# =========================
+# Mesure le coût d'import de chaque module (équivalent de python -X importtime),
+# pour vérifier que l'écran de connexion ne charge pas les fenêtres du menu.
+
+
+def mesurer_imports(module="main"):
+    """
+    Importe module dans un interpréteur neuf avec -X importtime.
+    Retourne une liste de (cumul_us, propre_us, nom) triée du plus coûteux au moins coûteux.
+    """
+    resultat = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    if resultat.returncode != 0:
+        raise RuntimeError(f"Import de {module} impossible :\n{resultat.stderr.strip()}")
+
+    mesures = []
+    for ligne in resultat.stderr.splitlines():
+        if not ligne.startswith("import time:") or "imported package" in ligne:
+            continue
+        propre, cumul, nom = ligne[len("import time:"):].split("|", 2)
+        mesures.append((int(cumul), int(propre), nom.rstrip()))
+    mesures.sort(reverse=True)
+    return mesures
+
+
+def afficher_rapport(module="main", limite=25):
+    mesures = mesurer_imports(module)
+    total = max((cumul for cumul, _, nom in mesures if nom.strip() == module), default=0)
+    print(f"Import de {module} : {total / 1000:.1f} ms")
+    print(f"{'cumul (ms)':>11} {'propre (ms)':>12}  module")
+    for cumul, propre, nom in mesures[:limite]:
+        print(f"{cumul / 1000:11.1f} {propre / 1000:12.1f}  {nom}")
+
+
+if __name__ == "__main__":
+    afficher_rapport(*sys.argv[1:2])
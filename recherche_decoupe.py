@@ -1,9 +1,11 @@
-import sqlite3
 import customtkinter as ctk
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
 import session
-
-DB_NAME = "reseau.db"
+from database import rechercher_decoupe, rechercher_decoupes, page_sous_reseaux, debut_sous_reseau_contenant
+from export_decoupe import exporter_decoupe
+from analyse_conflits import conflits_decoupe
+from tableau_virtuel import TableauVirtuel
+from mesures import mesure, CALCUL, AFFICHAGE, EXPORT
 
 # === Couleurs et style du thème ===
 THEME_BLUE = "#2D89EF"
@@ -13,11 +15,12 @@ THEME_GREY_HOVER = "#3a3a3c"
 THEME_TEXT_WHITE = "white"
 THEME_BACKGROUND = "#1c1c1e"
 
-def get_connection():
-    return sqlite3.connect(DB_NAME)
-
-
-
+# Découpes proposées par page dans la liste de résultats
+TAILLE_PAGE_RESULTATS = 6
+# Sous-réseaux chargés à la fois (une seule page en mémoire)
+TAILLE_PAGE_SOUS_RESEAUX = 100
+# Délai après la dernière touche avant de lancer la recherche (ms)
+DELAI_RECHERCHE_MS = 150
 
 def ouvrir_fenetre_recherche_decoupe():
     ctk.set_appearance_mode("dark")
@@ -25,78 +28,36 @@ def ouvrir_fenetre_recherche_decoupe():
 
     app = ctk.CTk()
     app.title("🔍 Recherche de Découpe Réseau")
-    app.geometry("900x600")
+    app.geometry("1040x750")
     app.configure(fg_color=THEME_BACKGROUND)
 
     # --- Zone de recherche ---
     frame = ctk.CTkFrame(app, fg_color=THEME_GREY_BUTTON, corner_radius=15)
-    frame.pack(pady=30, padx=30, fill="x")
+    frame.pack(pady=(30, 10), padx=30, fill="x")
 
     label_nom = ctk.CTkLabel(frame, text="Nom de la découpe :",
                              text_color=THEME_TEXT_WHITE, font=("Segoe UI", 16, "bold"))
     label_nom.grid(row=0, column=0, padx=20, pady=20, sticky="w")
 
-    entry_nom = ctk.CTkEntry(frame, placeholder_text="Ex: Réseau Bureau",
+    entry_nom = ctk.CTkEntry(frame, placeholder_text="Ex: Réseau Bureau ou 192.168.",
                              width=300, height=40, font=("Segoe UI", 14))
     entry_nom.grid(row=0, column=1, padx=10)
 
-    def rechercher_decoupe(nom_decoupe):
-        conn = get_connection()
-        cur = conn.cursor()
-
-        cur.execute("SELECT id_decoupe, id_responsable FROM decoupe WHERE nom_decoupe = ?", (nom_decoupe,))
-        row = cur.fetchone()
-        if not row:
-            conn.close()
-            return None, []
-
-        id_decoupe, id_responsable = row
-        if id_responsable != session.utilisateur_connecte_id:
-            conn.close()
-            messagebox.showerror("Erreur", "Vous n'avez pas les droits pour consulter cette découpe.", parent=app)
-            return None, []
-
-        cur.execute("""
-                    SELECT ip_reseau, masque, ip_debut, ip_fin, ip_broadcast, nb_ips
-                    FROM sous_reseau
-                    WHERE id_decoupe = ?
-                    """, (id_decoupe,))
-        sous_reseaux = cur.fetchall()
-        conn.close()
-        return id_decoupe, sous_reseaux
-
-    def afficher_decoupe():
+    def afficher_decoupe(id_decoupe=None):
         nom = entry_nom.get().strip()
-        if not nom:
-            messagebox.showerror("Erreur", "Veuillez entrer un nom de découpe.", parent=app)
-            return
+        if id_decoupe is None:
+            if not nom:
+                messagebox.showerror("Erreur", "Veuillez entrer un nom de découpe.", parent=app)
+                return
+            id_decoupe = rechercher_decoupe(nom, session.utilisateur_connecte_id)
 
-        _, sous_reseaux = rechercher_decoupe(nom)
-        for widget in tableau_frame.winfo_children():
-            widget.destroy()
-
-        if not sous_reseaux:
+        pages["id_decoupe"] = id_decoupe
+        if id_decoupe is None:
+            tableau.definir_source(None)
+            label_sous_reseaux.configure(text="")
             messagebox.showinfo("Résultat", "Aucune découpe trouvée avec ce nom.", parent=app)
             return
-
-        colonnes = ["IP Réseau", "Masque", "IP Début", "IP Fin", "Broadcast", "Nb IPs"]
-
-        # Entêtes
-        for j, col in enumerate(colonnes):
-            ctk.CTkLabel(tableau_frame, text=col, font=("Segoe UI", 16, "bold"),
-                         fg_color=THEME_BLUE, text_color="white", corner_radius=8).grid(
-                row=0, column=j, padx=5, pady=8, sticky="nsew"
-            )
-
-        # Données
-        for i, sr in enumerate(sous_reseaux, start=1):
-            bg_color = THEME_GREY_HOVER if i % 2 == 0 else THEME_GREY_BUTTON
-            for j, val in enumerate(sr):
-                ctk.CTkLabel(tableau_frame, text=str(val),
-                             font=("Segoe UI", 14), text_color=THEME_TEXT_WHITE,
-                             fg_color=bg_color, corner_radius=6).grid(
-                    row=i, column=j, padx=5, pady=5, sticky="nsew"
-                )
+        charger_sous_reseaux(depuis=0)
 
     btn_rechercher = ctk.CTkButton(frame, text="Rechercher", width=150, height=40,
                                    fg_color=THEME_BLUE, hover_color=THEME_BLUE_HOVER,
@@ -104,9 +65,229 @@ def ouvrir_fenetre_recherche_decoupe():
                                    command=afficher_decoupe)
     btn_rechercher.grid(row=0, column=2, padx=20)
 
+    def exporter():
+        nom = entry_nom.get().strip()
+        if not nom:
+            messagebox.showerror("Erreur", "Veuillez entrer un nom de découpe.", parent=app)
+            return
+        chemin = filedialog.asksaveasfilename(parent=app, title="Exporter la découpe", defaultextension=".csv",
+                                              filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")])
+        if not chemin:
+            return
+        try:
+            # Lecture du curseur par blocs : mémoire constante quelle que soit la taille de la découpe
+            with mesure("export_decoupe", EXPORT) as m:
+                nombre = exporter_decoupe(nom, chemin, id_utilisateur=session.utilisateur_connecte_id)
+                m.taille = nombre
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Erreur", str(e), parent=app)
+            return
+        messagebox.showinfo("Export", f"{nombre} sous-réseau(x) exporté(s) dans {chemin}", parent=app)
+
+    btn_exporter = ctk.CTkButton(frame, text="Exporter", width=150, height=40,
+                                 fg_color=THEME_GREY_HOVER, hover_color=THEME_BLUE_HOVER,
+                                 text_color="white", font=("Segoe UI", 14, "bold"),
+                                 command=exporter)
+    btn_exporter.grid(row=0, column=3, padx=(0, 20))
+
+    def afficher_conflits():
+        """Chevauchements avec les autres découpes, trous et sous-réseaux hors bornes de la découpe affichée"""
+        id_decoupe = pages["id_decoupe"]
+        if id_decoupe is None:
+            nom = entry_nom.get().strip()
+            id_decoupe = rechercher_decoupe(nom, session.utilisateur_connecte_id) if nom else None
+        if id_decoupe is None:
+            messagebox.showerror("Erreur", "Veuillez d'abord choisir une découpe.", parent=app)
+            return
+
+        fenetre = ctk.CTkToplevel(app)
+        fenetre.title("⚠ Conflits de la découpe")
+        fenetre.geometry("950x500")
+        fenetre.configure(fg_color=THEME_BACKGROUND)
+        tableau_conflits = TableauVirtuel(fenetre,
+                                          colonnes=["Type", "Découpe", "Réseau", "Autre découpe", "Autre réseau"],
+                                          couleur_entete=THEME_BLUE,
+                                          couleurs_lignes=(THEME_GREY_BUTTON, THEME_GREY_HOVER),
+                                          couleur_texte=THEME_TEXT_WHITE, corner_radius=12,
+                                          fg_color=THEME_GREY_BUTTON)
+        tableau_conflits.pack(padx=20, pady=20, fill="both", expand=True)
+        # Les conflits sont calculés au fil du défilement du tableau : seule la première page est mesurée
+        with mesure("conflits_decoupe", AFFICHAGE):
+            tableau_conflits.definir_source(conflits_decoupe(id_decoupe))
+
+    btn_conflits = ctk.CTkButton(frame, text="⚠ Conflits", width=120, height=40,
+                                 fg_color=THEME_GREY_HOVER, hover_color=THEME_BLUE_HOVER,
+                                 text_color="white", font=("Segoe UI", 14, "bold"),
+                                 command=afficher_conflits)
+    btn_conflits.grid(row=0, column=4, padx=(0, 20))
+
+    # --- Liste des découpes correspondantes (mise à jour pendant la saisie) ---
+    frame_resultats = ctk.CTkFrame(app, fg_color=THEME_GREY_BUTTON, corner_radius=15)
+    frame_resultats.pack(padx=30, fill="x")
+    frame_resultats.grid_columnconfigure(0, weight=1)
+
+    boutons_resultats = []
+    for i in range(TAILLE_PAGE_RESULTATS):
+        bouton = ctk.CTkButton(frame_resultats, text="", height=30, anchor="w",
+                               fg_color="transparent", hover_color=THEME_GREY_HOVER,
+                               text_color=THEME_TEXT_WHITE, font=("Segoe UI", 13))
+        bouton.grid(row=i, column=0, columnspan=3, padx=10, pady=1, sticky="ew")
+        boutons_resultats.append(bouton)
+
+    label_page = ctk.CTkLabel(frame_resultats, text="", text_color=THEME_TEXT_WHITE, font=("Segoe UI", 12))
+    label_page.grid(row=TAILLE_PAGE_RESULTATS, column=0, padx=20, pady=8, sticky="w")
+
+    # Pagination par clé : cles_pages[i] est la clé de départ de la page i
+    etat = {"texte": "", "cles_pages": [None], "page": 0, "suivante": None, "minuteur": None}
+
+    def choisir(ligne):
+        id_decoupe, nom_decoupe = ligne[0], ligne[1]
+        entry_nom.delete(0, "end")
+        entry_nom.insert(0, nom_decoupe)
+        etat["texte"] = nom_decoupe
+        afficher_decoupe(id_decoupe)
+
+    def charger_page():
+        with mesure("recherche_decoupes", CALCUL):
+            lignes, etat["suivante"] = rechercher_decoupes(session.utilisateur_connecte_id, etat["texte"],
+                                                            etat["cles_pages"][etat["page"]], TAILLE_PAGE_RESULTATS)
+        with mesure("recherche_decoupes", AFFICHAGE, len(lignes)):
+            for i, bouton in enumerate(boutons_resultats):
+                if i < len(lignes):
+                    ligne = lignes[i]
+                    _, nom_decoupe, ip_reseau, masque, type_decoupe, nombre = ligne
+                    bouton.configure(
+                        text=f"{nom_decoupe}   —   {ip_reseau} / {masque}   ({type_decoupe}, {nombre} SR)",
+                        command=lambda l=ligne: choisir(l), state="normal")
+                else:
+                    bouton.configure(text="", command=None, state="disabled")
+
+        if not lignes:
+            label_page.configure(text="Aucune découpe correspondante.")
+        else:
+            label_page.configure(text=f"Page {etat['page'] + 1}")
+        btn_precedent.configure(state="normal" if etat["page"] > 0 else "disabled")
+        btn_suivant.configure(state="normal" if etat["suivante"] else "disabled")
+
+    def nouvelle_recherche():
+        etat["minuteur"] = None
+        etat["cles_pages"] = [None]
+        etat["page"] = 0
+        charger_page()
+
+    def saisie(_event=None):
+        texte = entry_nom.get().strip()
+        if texte == etat["texte"]:
+            return
+        etat["texte"] = texte
+        if etat["minuteur"] is not None:
+            app.after_cancel(etat["minuteur"])
+        etat["minuteur"] = app.after(DELAI_RECHERCHE_MS, nouvelle_recherche)
+
+    def page_suivante():
+        if etat["suivante"] is None:
+            return
+        del etat["cles_pages"][etat["page"] + 1:]
+        etat["cles_pages"].append(etat["suivante"])
+        etat["page"] += 1
+        charger_page()
+
+    def page_precedente():
+        if etat["page"] > 0:
+            etat["page"] -= 1
+            charger_page()
+
+    btn_precedent = ctk.CTkButton(frame_resultats, text="◀", width=40, height=30,
+                                  fg_color=THEME_GREY_HOVER, hover_color=THEME_BLUE_HOVER,
+                                  command=page_precedente)
+    btn_precedent.grid(row=TAILLE_PAGE_RESULTATS, column=1, pady=8)
+    btn_suivant = ctk.CTkButton(frame_resultats, text="▶", width=40, height=30,
+                                fg_color=THEME_GREY_HOVER, hover_color=THEME_BLUE_HOVER,
+                                command=page_suivante)
+    btn_suivant.grid(row=TAILLE_PAGE_RESULTATS, column=2, padx=(5, 20), pady=8)
+
+    entry_nom.bind("<KeyRelease>", saisie)
+    entry_nom.bind("<Return>", lambda _: afficher_decoupe())
+
+    # --- Navigation dans les sous-réseaux (pagination par clé : (debut, id_sous_reseau), voir page_sous_reseaux) ---
+    pages = {"id_decoupe": None, "premier": None, "dernier": None, "avant": False, "apres": False}
+
+    def charger_sous_reseaux(depuis=0, avant=None):
+        id_decoupe = pages["id_decoupe"]
+        if id_decoupe is None:
+            return
+        with mesure("page_sous_reseaux", CALCUL):
+            lignes, suite = page_sous_reseaux(id_decoupe, depuis, avant, TAILLE_PAGE_SOUS_RESEAUX)
+            if not lignes and avant is None and depuis:
+                # Au-delà du dernier sous-réseau : on affiche la dernière page
+                lignes, suite = page_sous_reseaux(id_decoupe, avant=depuis, limite=TAILLE_PAGE_SOUS_RESEAUX)
+                avant = depuis
+
+            if lignes:
+                pages["premier"], pages["dernier"] = tuple(lignes[0][-2:]), tuple(lignes[-1][-2:])
+            if avant is not None:
+                pages["avant"], pages["apres"] = suite, True
+            else:
+                # Y a-t-il des sous-réseaux avant cette page ? (une seule lecture d'index)
+                pages["avant"] = depuis != 0 and bool(lignes) and bool(
+                    page_sous_reseaux(id_decoupe, avant=pages["premier"], limite=1)[0])
+                pages["apres"] = suite
+
+        with mesure("page_sous_reseaux", AFFICHAGE, len(lignes)):
+            tableau.definir_source([ligne[:-2] for ligne in lignes])
+            if lignes:
+                label_sous_reseaux.configure(text=f"Sous-réseaux {lignes[0][0]} → {lignes[-1][0]}")
+            else:
+                label_sous_reseaux.configure(text="Aucun sous-réseau enregistré.")
+            btn_debut.configure(state="normal" if pages["avant"] else "disabled")
+            btn_page_precedente.configure(state="normal" if pages["avant"] else "disabled")
+            btn_page_suivante.configure(state="normal" if pages["apres"] else "disabled")
+
+    def aller_a_ip():
+        ip = entry_ip.get().strip()
+        if pages["id_decoupe"] is None or not ip:
+            return
+        try:
+            depuis = debut_sous_reseau_contenant(pages["id_decoupe"], ip)
+        except ValueError:
+            messagebox.showerror("Erreur", "Adresse IP invalide.", parent=app)
+            return
+        charger_sous_reseaux(depuis=depuis)
+
+    frame_navigation = ctk.CTkFrame(app, fg_color="transparent")
+    frame_navigation.pack(padx=30, pady=(15, 0), fill="x")
+
+    label_sous_reseaux = ctk.CTkLabel(frame_navigation, text="", text_color=THEME_TEXT_WHITE,
+                                      font=("Segoe UI", 13, "bold"))
+    label_sous_reseaux.pack(side="left")
+
+    btn_aller_ip = ctk.CTkButton(frame_navigation, text="Aller", width=60, height=30,
+                                 fg_color=THEME_BLUE, hover_color=THEME_BLUE_HOVER, command=aller_a_ip)
+    btn_aller_ip.pack(side="right")
+    entry_ip = ctk.CTkEntry(frame_navigation, placeholder_text="IP", width=140, height=30)
+    entry_ip.pack(side="right", padx=5)
+    entry_ip.bind("<Return>", lambda _: aller_a_ip())
+
+    btn_page_suivante = ctk.CTkButton(frame_navigation, text="Suivante ▶", width=100, height=30,
+                                      fg_color=THEME_GREY_HOVER, hover_color=THEME_BLUE_HOVER,
+                                      command=lambda: charger_sous_reseaux(depuis=pages["dernier"]),
+                                      state="disabled")
+    btn_page_suivante.pack(side="right", padx=(5, 20))
+    btn_page_precedente = ctk.CTkButton(frame_navigation, text="◀ Précédente", width=100, height=30,
+                                        fg_color=THEME_GREY_HOVER, hover_color=THEME_BLUE_HOVER,
+                                        command=lambda: charger_sous_reseaux(avant=pages["premier"]),
+                                        state="disabled")
+    btn_page_precedente.pack(side="right", padx=5)
+    btn_debut = ctk.CTkButton(frame_navigation, text="⏮ Début", width=80, height=30,
+                              fg_color=THEME_GREY_HOVER, hover_color=THEME_BLUE_HOVER,
+                              command=lambda: charger_sous_reseaux(depuis=0), state="disabled")
+    btn_debut.pack(side="right", padx=5)
+
     # --- Tableau des résultats ---
-    tableau_frame = ctk.CTkScrollableFrame(app, corner_radius=12, fg_color=THEME_GREY_BUTTON)
-    tableau_frame.pack(padx=30, pady=20, fill="both", expand=True)
+    tableau = TableauVirtuel(app, colonnes=["IP Réseau", "Masque", "IP Début", "IP Fin", "Broadcast", "Nb IPs"],
+                             couleur_entete=THEME_BLUE, couleurs_lignes=(THEME_GREY_BUTTON, THEME_GREY_HOVER),
+                             couleur_texte=THEME_TEXT_WHITE, corner_radius=12, fg_color=THEME_GREY_BUTTON)
+    tableau.pack(padx=30, pady=20, fill="both", expand=True)
 
     # --- Bouton de fermeture ---
     btn_quitter = ctk.CTkButton(app, text="Fermer", width=120, height=40,
@@ -115,4 +296,7 @@ def ouvrir_fenetre_recherche_decoupe():
                                 command=app.destroy)
     btn_quitter.pack(pady=10)
 
+    # Découpes de l'utilisateur dès l'ouverture
+    nouvelle_recherche()
+
     app.mainloop()
@@ -0,0 +1,139 @@
+"""
+Rétention de historique_tests et connexion_log.
+
+Les lignes antérieures à RETENTION_JOURS jours sont, par lots de TAILLE_LOT_RETENTION :
+  1. copiées dans la base d'archive attachée (reseau_archive.db à côté de reseau.db),
+     dans une première transaction ;
+  2. ajoutées aux agrégats quotidiens (historique_quotidien, connexion_quotidienne) puis
+     supprimées de la base principale, dans une seconde transaction.
+Chaque lot est suivi d'une pause : lancée en fond au démarrage (demarrer_en_fond), la
+rétention ne bloque ni l'interface ni le journal de l'historique.
+
+Une validation qui porte sur deux fichiers n'est pas atomique en mode WAL, d'où les deux
+transactions : les lignes ne quittent la base principale qu'une fois l'archive validée.
+Après une interruption entre les deux, le lot est repris depuis la base principale et la
+copie, qui ignore les lignes déjà archivées, est sans effet.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+import database
+from database import (get_connection, fermer_connexion, REQ_AGREGER_CONNEXIONS, REQ_AGREGER_HISTORIQUE,
+                      REQ_ARCHIVER_CONNEXIONS, REQ_ARCHIVER_HISTORIQUE, REQ_CONNEXIONS_ANCIENNES,
+                      REQ_HISTORIQUE_ANCIEN, REQ_SUPPRIMER_CONNEXIONS, REQ_SUPPRIMER_HISTORIQUE)
+
+RETENTION_JOURS = 90            # lignes détaillées gardées dans la base principale
+TAILLE_LOT_RETENTION = 500      # lignes archivées par transaction
+PAUSE_RETENTION_S = 0.05        # pause entre deux lots (laisse passer les écritures de l'interface)
+
+# table -> (lignes anciennes, agrégat, copie dans l'archive, suppression)
+TABLES_RETENTION = {
+    "historique_tests": (REQ_HISTORIQUE_ANCIEN, REQ_AGREGER_HISTORIQUE, REQ_ARCHIVER_HISTORIQUE,
+                         REQ_SUPPRIMER_HISTORIQUE),
+    "connexion_log": (REQ_CONNEXIONS_ANCIENNES, REQ_AGREGER_CONNEXIONS, REQ_ARCHIVER_CONNEXIONS,
+                      REQ_SUPPRIMER_CONNEXIONS),
+}
+
+_arret = threading.Event()
+_thread = None
+
+
+def chemin_archive(db_name=None) -> str:
+    """Base d'archive de db_name (base courante par défaut) : reseau.db -> reseau_archive.db"""
+    racine, extension = os.path.splitext(db_name or database.DB_NAME)
+    return f"{racine}_archive{extension or '.db'}"
+
+
+def attacher_archive(conn, chemin=None):
+    """Attache la base d'archive sous le nom 'archive' (créée au besoin) ; sans effet si elle l'est déjà"""
+    if any(row[1] == "archive" for row in conn.execute("PRAGMA database_list")):
+        return
+    conn.execute("ATTACH DATABASE ? AS archive", (chemin or chemin_archive(),))
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS archive.historique_tests (
+        id_test INTEGER PRIMARY KEY,
+        type_test TEXT NOT NULL,
+        entree TEXT NOT NULL,
+        resultat TEXT,
+        est_valide BOOLEAN,
+        date_test TIMESTAMP,
+        id_utilisateur INTEGER
+    )""")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS archive.connexion_log (
+        id_log INTEGER PRIMARY KEY,
+        id_utilisateur INTEGER,
+        statut TEXT,
+        date_connexion TIMESTAMP,
+        adresse_ip_client TEXT
+    )""")
+    conn.commit()
+
+
+def archiver_lot(conn, table, jours=RETENTION_JOURS, taille_lot=TAILLE_LOT_RETENTION) -> int:
+    """Archive, agrège puis supprime au plus taille_lot lignes anciennes de table ; retourne leur nombre"""
+    req_anciennes, req_agreger, req_archiver, req_supprimer = TABLES_RETENTION[table]
+    ids = [row[0] for row in conn.execute(req_anciennes, (f"-{jours} days", taille_lot))]
+    if not ids:
+        return 0
+    marques = ",".join("?" * len(ids))
+    try:
+        # L'archive d'abord : une ligne n'est jamais supprimée sans copie validée
+        conn.execute(req_archiver.format(marques=marques), ids)
+        conn.commit()
+        conn.execute(req_agreger.format(marques=marques), ids)
+        conn.execute(req_supprimer.format(marques=marques), ids)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return len(ids)
+
+
+def appliquer_retention(jours=RETENTION_JOURS, chemin=None, taille_lot=TAILLE_LOT_RETENTION,
+                        pause=PAUSE_RETENTION_S, arret=None) -> dict:
+    """
+    Archive toutes les lignes anciennes, lot par lot, jusqu'à épuisement ou arret.set().
+    Retourne {table: nombre de lignes archivées}.
+    """
+    conn = get_connection()
+    attacher_archive(conn, chemin)
+    archivees = {}
+    for table in TABLES_RETENTION:
+        archivees[table] = 0
+        while not (arret and arret.is_set()):
+            nombre = archiver_lot(conn, table, jours, taille_lot)
+            archivees[table] += nombre
+            if nombre < taille_lot:
+                break
+            time.sleep(pause)
+    return archivees
+
+
+def demarrer_en_fond(**options):
+    """Lance appliquer_retention(**options) dans un thread de fond (une seule fois à la fois)"""
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    _arret.clear()
+    _thread = threading.Thread(target=_executer, kwargs=options, name="retention-historique", daemon=True)
+    _thread.start()
+
+
+def arreter(timeout=5.0):
+    """Interrompt la rétention après le lot en cours"""
+    _arret.set()
+    if _thread is not None:
+        _thread.join(timeout)
+
+
+def _executer(**options):
+    try:
+        appliquer_retention(arret=_arret, **options)
+    except sqlite3.Error as e:
+        print(f"Erreur lors de l'archivage de l'historique : {e}")
+    finally:
+        # La connexion de ce thread est la seule à avoir l'archive attachée
+        fermer_connexion()
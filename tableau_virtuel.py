@@ -0,0 +1,174 @@
+import itertools
+import customtkinter as ctk
+
+
+class _SourceIndexee:
+    """Source à accès direct : liste, ou objet avec ligne(k) (ex: PlanDecoupe)"""
+
+    def __init__(self, source):
+        self.source = source
+        self._ligne = getattr(source, "ligne", None) or source.__getitem__
+
+    def nombre(self):
+        return len(self.source)
+
+    def ligne(self, k):
+        return self._ligne(k) if 0 <= k < len(self.source) else None
+
+
+class _SourceIterable:
+    """
+    Source séquentielle : itérateur ou curseur SQLite.
+    Les lignes sont tirées par blocs (fetchmany si disponible) au fil du défilement.
+    """
+
+    def __init__(self, source, taille_bloc=200):
+        self.taille_bloc = taille_bloc
+        self.cache = []
+        self.epuisee = False
+        if hasattr(source, "fetchmany"):
+            self._tirer = source.fetchmany
+        else:
+            iterateur = iter(source)
+            self._tirer = lambda n: list(itertools.islice(iterateur, n))
+
+    def _charger_jusqua(self, k):
+        while not self.epuisee and len(self.cache) <= k:
+            bloc = self._tirer(self.taille_bloc)
+            if len(bloc) < self.taille_bloc:
+                self.epuisee = True
+            self.cache.extend(bloc)
+
+    def nombre(self):
+        # Tant que la source n'est pas épuisée, on annonce une ligne de plus pour pouvoir défiler
+        self._charger_jusqua(0)
+        return len(self.cache) + (0 if self.epuisee else 1)
+
+    def ligne(self, k):
+        self._charger_jusqua(k)
+        return self.cache[k] if 0 <= k < len(self.cache) else None
+
+
+class TableauVirtuel(ctk.CTkFrame):
+    """
+    Tableau de résultats virtualisé : seules les lignes visibles ont des widgets,
+    recyclés au défilement. Les lignes sont lues dans une source indexée (liste,
+    PlanDecoupe) ou séquentielle (itérateur, curseur SQLite).
+    """
+
+    def __init__(self, master, colonnes, hauteur_ligne=40, police_entete=("Segoe UI", 16, "bold"),
+                 police=("Segoe UI", 14), couleur_entete="#2D89EF", couleurs_lignes=("#2c2c2e", "#3a3a3c"),
+                 couleur_texte="white", couleur_cellule=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.colonnes = colonnes
+        self.hauteur_ligne = hauteur_ligne
+        self.police = police
+        self.couleurs_lignes = couleurs_lignes
+        self.couleur_texte = couleur_texte
+        # couleur_cellule(valeur, colonne) -> couleur du texte ou None
+        self.couleur_cellule = couleur_cellule
+
+        self._source = None
+        self._premiere = 0
+        self._lignes_widgets = []
+
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        entetes = ctk.CTkFrame(self, fg_color="transparent")
+        entetes.grid(row=0, column=0, sticky="ew")
+        for j, col in enumerate(colonnes):
+            entetes.grid_columnconfigure(j, weight=1, uniform="colonne")
+            ctk.CTkLabel(entetes, text=col, font=police_entete, fg_color=couleur_entete,
+                         text_color="white", corner_radius=8).grid(row=0, column=j, padx=5, pady=8, sticky="nsew")
+
+        self._corps = ctk.CTkFrame(self, fg_color="transparent")
+        self._corps.grid(row=1, column=0, sticky="nsew")
+        for j in range(len(colonnes)):
+            self._corps.grid_columnconfigure(j, weight=1, uniform="colonne")
+
+        self._barre = ctk.CTkScrollbar(self, command=self._defiler)
+        self._barre.grid(row=1, column=1, sticky="ns")
+
+        self._corps.bind("<Configure>", lambda _: self._rafraichir())
+        self._lier_molette(self._corps)
+
+    # --- Source de données ---
+    def definir_source(self, source):
+        """Remplace les lignes affichées par celles de source et revient en haut"""
+        if source is None:
+            self._source = None
+        elif hasattr(source, "__len__") and (hasattr(source, "ligne") or hasattr(source, "__getitem__")):
+            self._source = _SourceIndexee(source)
+        else:
+            self._source = _SourceIterable(source)
+        self._premiere = 0
+        self._rafraichir()
+
+    def nombre_lignes(self):
+        return self._source.nombre() if self._source else 0
+
+    def aller_a(self, k):
+        """Fait défiler le tableau pour que la ligne k soit la première visible"""
+        self._premiere = max(0, min(k, self.nombre_lignes() - self._nb_visibles()))
+        self._rafraichir()
+
+    # --- Défilement ---
+    def _nb_visibles(self):
+        return max(1, self._corps.winfo_height() // self.hauteur_ligne)
+
+    def _defiler(self, action, valeur, unite=None):
+        total = self.nombre_lignes()
+        if action == "moveto":
+            self.aller_a(int(float(valeur) * total))
+        elif action == "scroll":
+            pas = self._nb_visibles() if unite == "pages" else 1
+            self.aller_a(self._premiere + int(valeur) * pas)
+
+    def _molette(self, event):
+        if getattr(event, "num", None) == 4 or event.delta > 0:
+            self.aller_a(self._premiere - 3)
+        else:
+            self.aller_a(self._premiere + 3)
+
+    def _lier_molette(self, widget):
+        widget.bind("<MouseWheel>", self._molette)
+        widget.bind("<Button-4>", self._molette)
+        widget.bind("<Button-5>", self._molette)
+
+    # --- Rendu ---
+    def _creer_ligne(self, i):
+        cellules = []
+        for j in range(len(self.colonnes)):
+            cellule = ctk.CTkLabel(self._corps, text="", font=self.police, text_color=self.couleur_texte,
+                                   corner_radius=6, height=self.hauteur_ligne - 10)
+            cellule.grid(row=i, column=j, padx=5, pady=5, sticky="nsew")
+            self._lier_molette(cellule)
+            cellules.append(cellule)
+        return cellules
+
+    def _rafraichir(self):
+        nb_visibles = self._nb_visibles()
+        # Le pool de widgets ne grandit qu'avec la hauteur de la fenêtre, jamais avec les données
+        while len(self._lignes_widgets) < nb_visibles:
+            self._lignes_widgets.append(self._creer_ligne(len(self._lignes_widgets)))
+
+        for i, cellules in enumerate(self._lignes_widgets):
+            k = self._premiere + i
+            ligne = self._source.ligne(k) if self._source and i < nb_visibles else None
+            if ligne is None:
+                for cellule in cellules:
+                    cellule.grid_remove()
+                continue
+
+            bg_color = self.couleurs_lignes[k % 2]
+            for j, (cellule, valeur) in enumerate(zip(cellules, ligne)):
+                couleur = self.couleur_cellule(valeur, j) if self.couleur_cellule else None
+                cellule.configure(text=str(valeur), fg_color=bg_color, text_color=couleur or self.couleur_texte)
+                cellule.grid()
+
+        total = self.nombre_lignes()
+        if total:
+            self._barre.set(self._premiere / total, min(1.0, (self._premiere + nb_visibles) / total))
+        else:
+            self._barre.set(0.0, 1.0)
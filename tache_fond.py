@@ -0,0 +1,103 @@
+import queue
+import threading
+from tkinter import TclError
+
+from database import fermer_connexion
+
+
+class TacheAnnulee(Exception):
+    """Levée dans le thread de fond quand l'utilisateur a demandé l'annulation"""
+
+
+class TacheDeFond:
+    """
+    Exécute fonction(tache) dans un thread de fond sans bloquer Tk.
+    Le thread signale son avancement par tache.progression(fait, total) et publie des
+    résultats partiels par tache.publier(valeur) ; le thread Tk relève ces messages toutes
+    les delai_ms (after()) et appelle les callbacks. Après annuler(), le prochain appel à
+    progression() ou verifier() lève TacheAnnulee dans le thread de fond.
+    """
+
+    def __init__(self, widget, fonction, sur_progression=None, sur_resultat=None, sur_fin=None,
+                 sur_erreur=None, sur_annulation=None, delai_ms=50):
+        self.widget = widget
+        self.fonction = fonction
+        self.sur_progression = sur_progression
+        self.sur_resultat = sur_resultat
+        self.sur_fin = sur_fin
+        self.sur_erreur = sur_erreur
+        self.sur_annulation = sur_annulation
+        self.delai_ms = delai_ms
+        self._file = queue.SimpleQueue()
+        self._annulation = threading.Event()
+        self._thread = None
+        self.terminee = False
+
+    # --- Côté Tk ---
+    def demarrer(self):
+        self._thread = threading.Thread(target=self._executer, name="tache-fond", daemon=True)
+        self._thread.start()
+        self.widget.after(self.delai_ms, self._relever)
+        return self
+
+    def annuler(self):
+        self._annulation.set()
+
+    @property
+    def annulee(self) -> bool:
+        return self._annulation.is_set()
+
+    def _relever(self):
+        """Traite les messages du thread de fond ; les avancements sont regroupés (seul le dernier compte)"""
+        avancement = None
+        while True:
+            try:
+                message, valeur = self._file.get_nowait()
+            except queue.Empty:
+                break
+            if message == "progression":
+                avancement = valeur
+                continue
+            if message == "resultat":
+                if self.sur_resultat:
+                    self.sur_resultat(valeur)
+                continue
+            if avancement and self.sur_progression:
+                self.sur_progression(*avancement)
+            avancement = None
+            self.terminee = True
+            rappel = {"fin": self.sur_fin, "erreur": self.sur_erreur, "annulee": self.sur_annulation}[message]
+            if rappel:
+                rappel(valeur)
+            return
+
+        if avancement and self.sur_progression:
+            self.sur_progression(*avancement)
+        try:
+            self.widget.after(self.delai_ms, self._relever)
+        except TclError:
+            # Fenêtre fermée pendant le calcul : plus rien à afficher
+            self.annuler()
+
+    # --- Côté thread de fond ---
+    def verifier(self):
+        if self._annulation.is_set():
+            raise TacheAnnulee()
+
+    def progression(self, fait, total):
+        self.verifier()
+        self._file.put(("progression", (fait, total)))
+
+    def publier(self, valeur):
+        self._file.put(("resultat", valeur))
+
+    def _executer(self):
+        try:
+            self._file.put(("fin", self.fonction(self)))
+        except TacheAnnulee:
+            self._file.put(("annulee", None))
+        except Exception as e:
+            self._file.put(("erreur", e))
+        finally:
+            # Chaque thread a sa propre connexion SQLite
+            fermer_connexion()
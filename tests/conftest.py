@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Les modules de l'application sont à la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def base(tmp_path):
+    """Base SQLite vide (schéma à jour) dans un dossier temporaire"""
+    import database
+
+    ancienne = database.DB_NAME
+    database.configurer_connexion(db_name=str(tmp_path / "reseau.db"))
+    database.init_db()
+    yield database
+    database.configurer_connexion(db_name=ancienne)
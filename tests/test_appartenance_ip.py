@@ -0,0 +1,51 @@
+from allocateur_buddy import allouer_sous_reseau, liberer_sous_reseau
+from appartenance_ip import MoteurAppartenance
+from plan_decoupe import calculer_sous_reseaux
+
+
+def _decoupe(base, nom, reseau):
+    id_utilisateur = base.get_user_id("alice") or base.ajouter_utilisateur("alice", "motdepasse")
+    plan, _, net = calculer_sous_reseaux(reseau_de_base=reseau, nb_sous_reseaux=4, masque=None,
+                                         nb_ips_utilisables=None)
+    return base.enregistrer_decoupe(nom, "classless", str(net.network_address), str(net.netmask), None,
+                                    "classique", id_utilisateur, plan)
+
+
+def _resultats(moteur, ip):
+    moteur.rafraichir()
+    return [(nom, str(reseau)) for nom, reseau in moteur.chercher(ip)]
+
+
+def test_rafraichir_suit_materialisation_et_liberation(base):
+    id_decoupe = _decoupe(base, "lan", "10.0.0.0/24")
+    moteur = MoteurAppartenance()
+    assert _resultats(moteur, "10.0.0.70") == [("lan", "10.0.0.64/26")]
+
+    # Matérialisation : les lignes remplacent le nœud du plan, sans doublon
+    base.materialiser_decoupe(id_decoupe)
+    assert _resultats(moteur, "10.0.0.70") == [("lan", "10.0.0.64/26")]
+
+    liberer_sous_reseau(id_decoupe, "10.0.0.64/26")
+    assert _resultats(moteur, "10.0.0.70") == []
+    assert _resultats(moteur, "10.0.0.10") == [("lan", "10.0.0.0/26")]
+
+    assert str(allouer_sous_reseau(id_decoupe, 27)) == "10.0.0.64/27"
+    assert _resultats(moteur, "10.0.0.70") == [("lan", "10.0.0.64/27")]
+    assert _resultats(moteur, "10.0.0.100") == []
+
+
+def test_rafraichir_suit_suppression_et_renommage(base):
+    _decoupe(base, "lan", "10.0.0.0/24")
+    id_wan = _decoupe(base, "wan", "10.1.0.0/24")
+    base.materialiser_decoupe(id_wan)
+    moteur = MoteurAppartenance()
+    assert _resultats(moteur, "10.1.0.1") == [("wan", "10.1.0.0/26")]
+
+    conn = base.get_connection()
+    conn.execute("UPDATE decoupe SET nom_decoupe = 'lan-siege' WHERE nom_decoupe = 'lan'")
+    conn.execute("DELETE FROM sous_reseau WHERE id_decoupe = ?", (id_wan,))
+    conn.execute("DELETE FROM decoupe WHERE id_decoupe = ?", (id_wan,))
+    conn.commit()
+    assert _resultats(moteur, "10.1.0.1") == []
+    assert _resultats(moteur, "10.0.0.1") == [("lan-siege", "10.0.0.0/26")]
+    assert moteur.trie.nombre == 1
@@ -0,0 +1,29 @@
+import pytest
+
+import cli
+
+
+def test_vlsm_enregistrer_sans_allouer_refuse(capsys):
+    with pytest.raises(SystemExit) as sortie:
+        cli.main(["vlsm", "192.168.1.0/24", "100,50", "--enregistrer", "lan", "--utilisateur", "alice"])
+    assert sortie.value.code == 2
+    assert "--allouer" in capsys.readouterr().err
+
+
+def test_sous_reseau_en_echec_n_ecrit_rien(base, capsys):
+    id_utilisateur = base.ajouter_utilisateur("alice", "motdepasse")
+    plan, _, net = cli._plan_depuis_args("10.0.0.0/24", None, 4, None, False)
+    base.enregistrer_decoupe("lan", "classless", str(net.network_address), str(net.netmask), None, "classique",
+                             id_utilisateur, plan)
+    options = ["--utilisateur", "alice", "--base", base.DB_NAME]
+
+    assert cli.main(["sous-reseau", "lan", "--prefixe", "26", *options]) == 1
+    sortie = capsys.readouterr()
+    assert sortie.out == "" and "Plus d'espace libre" in sortie.err
+
+    assert cli.main(["sous-reseau", "lan", "--liberer", "10.0.0.64/26", *options]) == 0
+    assert cli.main(["sous-reseau", "lan", "--prefixe", "27", *options]) == 0
+    assert capsys.readouterr().out.splitlines() == [
+        "decoupe,sous_reseau,action", "lan,10.0.0.64/26,libéré",
+        "decoupe,sous_reseau,action", "lan,10.0.0.64/27,alloué",
+    ]
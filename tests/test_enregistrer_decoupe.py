@@ -0,0 +1,92 @@
+import pytest
+
+from plan_decoupe import calculer_sous_reseaux
+from verification_vlsm import allouer_vlsm, enregistrer_vlsm
+
+
+class Interruption(Exception):
+    pass
+
+
+def _interrompre_apres_premier_lot(nombre, total):
+    raise Interruption
+
+
+def _classique(base, nom, id_utilisateur, **options):
+    plan, _, net = calculer_sous_reseaux(reseau_de_base="10.0.0.0/24", nb_sous_reseaux=4, masque=None,
+                                         nb_ips_utilisables=None)
+    return base.enregistrer_decoupe(nom_decoupe=nom, mode="classless", ip_reseau=str(net.network_address),
+                                    masque=str(net.netmask), nb_ips_par_sr=None, type_decoupe="classique",
+                                    id_utilisateur=id_utilisateur, plan=plan, **options)
+
+
+def _nombre_lignes(base, id_decoupe):
+    return base.get_connection().execute("SELECT COUNT(*) FROM sous_reseau WHERE id_decoupe = ?",
+                                         (id_decoupe,)).fetchone()[0]
+
+
+def test_nom_d_une_decoupe_parametrique_refuse(base):
+    id_utilisateur = base.ajouter_utilisateur("alice", "motdepasse")
+    id_decoupe = _classique(base, "lan", id_utilisateur)
+
+    # Même réseau, même nombre de sous-réseaux : ce n'est pas pour autant une reprise
+    with pytest.raises(ValueError, match="existe déjà"):
+        enregistrer_vlsm("lan", allouer_vlsm("10.0.0.0/24", None, [100, 20, 10, 2]), id_utilisateur)
+    assert _nombre_lignes(base, id_decoupe) == 0
+
+
+def test_reprise_du_meme_plan(base):
+    id_utilisateur = base.ajouter_utilisateur("alice", "motdepasse")
+    plan = allouer_vlsm("10.0.0.0/24", None, [100, 20, 10, 2])
+    with pytest.raises(Interruption):
+        base.enregistrer_decoupe("lan", "classless", "10.0.0.0", "255.255.255.0", None, "vlsm", id_utilisateur,
+                                 plan, taille_lot=2, progression=_interrompre_apres_premier_lot)
+
+    id_decoupe = enregistrer_vlsm("lan", plan, id_utilisateur)
+    assert _nombre_lignes(base, id_decoupe) == 4
+    with pytest.raises(ValueError, match="existe déjà"):
+        enregistrer_vlsm("lan", plan, id_utilisateur)
+
+
+def test_reprise_d_une_autre_allocation_refusee(base):
+    id_utilisateur = base.ajouter_utilisateur("alice", "motdepasse")
+    with pytest.raises(Interruption):
+        base.enregistrer_decoupe("lan", "classless", "10.0.0.0", "255.255.255.0", None, "vlsm", id_utilisateur,
+                                 allouer_vlsm("10.0.0.0/24", None, [100, 20, 10, 2]), taille_lot=2,
+                                 progression=_interrompre_apres_premier_lot)
+
+    with pytest.raises(ValueError, match="existe déjà"):
+        enregistrer_vlsm("lan", allouer_vlsm("10.0.0.0/24", None, [50, 50, 10, 2]), id_utilisateur)
+
+
+def _inserer(base, id_decoupe, enregistrements):
+    conn = base.get_connection()
+    conn.executemany("""
+        INSERT INTO sous_reseau (id_decoupe, ip_reseau, masque, ip_debut, ip_fin, ip_broadcast, nb_ips,
+                                 debut, fin, prefixe)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, ((id_decoupe, *e) for e in enregistrements))
+    conn.commit()
+
+
+def test_materialisation_reprend_apres_les_lignes_du_plan(base):
+    id_utilisateur = base.ajouter_utilisateur("alice", "motdepasse")
+    id_decoupe = _classique(base, "lan", id_utilisateur)
+    plan = base.plan_parametrique(id_decoupe)
+    _inserer(base, id_decoupe, list(plan.enregistrements())[:2])
+
+    base.materialiser_decoupe(id_decoupe)
+    assert base.plan_parametrique(id_decoupe) is None
+    lignes = base.get_connection().execute(base.REQ_INTERVALLES_DECOUPE, (id_decoupe,)).fetchall()
+    assert lignes == [plan.bornes(k) for k in range(len(plan))]
+
+
+def test_materialisation_refuse_des_lignes_etrangeres(base):
+    id_utilisateur = base.ajouter_utilisateur("alice", "motdepasse")
+    id_decoupe = _classique(base, "lan", id_utilisateur)
+    _inserer(base, id_decoupe, allouer_vlsm("10.0.0.0/24", None, [100, 20]).enregistrements())
+
+    with pytest.raises(ValueError, match="ne correspondent pas"):
+        base.materialiser_decoupe(id_decoupe)
+    assert base.plan_parametrique(id_decoupe) is not None
+    assert _nombre_lignes(base, id_decoupe) == 2
@@ -0,0 +1,29 @@
+from analyse_conflits import CHEVAUCHEMENT
+from import_decoupe import importer_decoupes
+
+
+def _csv(tmp_path, lignes):
+    chemin = tmp_path / "plans.csv"
+    chemin.write_text("nom_decoupe,reseau,sous_reseau\n" + "\n".join(lignes) + "\n", encoding="utf-8")
+    return str(chemin)
+
+
+def test_import_signale_les_chevauchements(base, tmp_path):
+    id_utilisateur = base.ajouter_utilisateur("alice", "motdepasse")
+    chemin = _csv(tmp_path, [
+        "siege,10.0.0.0/16,10.0.0.0/24",
+        "siege,10.0.0.0/16,10.0.1.0/24",
+        "agence,10.0.0.0/16,10.0.1.128/25",
+        "labo,10.1.0.0/16,10.1.0.0/24",
+    ])
+
+    resume = importer_decoupes(chemin, id_utilisateur, taille_lot=2)
+
+    assert (resume.importees, resume.decoupes, resume.rejets) == (4, 3, [])
+    assert resume.conflits == [[CHEVAUCHEMENT, "agence", "10.0.1.128/25", "siege", "10.0.1.0/24"]]
+
+
+def test_import_sans_chevauchement(base, tmp_path):
+    id_utilisateur = base.ajouter_utilisateur("alice", "motdepasse")
+    resume = importer_decoupes(_csv(tmp_path, ["siege,10.0.0.0/16,10.0.0.0/24"]), id_utilisateur)
+    assert resume.conflits == []
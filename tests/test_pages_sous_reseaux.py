@@ -0,0 +1,60 @@
+from plan_decoupe import calculer_sous_reseaux, enregistrement_sous_reseau
+
+
+def _decoupe(base, nom, parametrique=True):
+    id_utilisateur = base.get_user_id("alice") or base.ajouter_utilisateur("alice", "motdepasse")
+    plan, _, net = calculer_sous_reseaux(reseau_de_base="10.0.0.0/24", nb_sous_reseaux=8, masque=None,
+                                         nb_ips_utilisables=None)
+    return base.enregistrer_decoupe(nom, "classless", str(net.network_address), str(net.netmask), None,
+                                    "classique", id_utilisateur, plan, parametrique=parametrique)
+
+
+def _toutes_les_pages(base, id_decoupe, limite):
+    lignes, suite = base.page_sous_reseaux(id_decoupe, 0, limite=limite)
+    vues = list(lignes)
+    while suite:
+        lignes, suite = base.page_sous_reseaux(id_decoupe, tuple(lignes[-1][-2:]), limite=limite)
+        vues.extend(lignes)
+    return vues
+
+
+def _toutes_les_pages_a_rebours(base, id_decoupe, limite):
+    lignes, suite = base.page_sous_reseaux(id_decoupe, avant=1 << 32, limite=limite)
+    vues = list(lignes)
+    while suite:
+        lignes, suite = base.page_sous_reseaux(id_decoupe, avant=tuple(lignes[0][-2:]), limite=limite)
+        vues[:0] = lignes
+    return vues
+
+
+def test_debuts_en_double_ni_sautes_ni_repetes(base):
+    id_decoupe = _decoupe(base, "lan", parametrique=False)
+    conn = base.get_connection()
+    # Trois lignes de plus au même début que des lignes existantes, dont une à cheval sur deux pages
+    for debut in (167772160 + 32, 167772160 + 64, 167772160 + 64):
+        conn.execute("""
+            INSERT INTO sous_reseau (id_decoupe, ip_reseau, masque, ip_debut, ip_fin, ip_broadcast, nb_ips,
+                                     debut, fin, prefixe)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (id_decoupe, *enregistrement_sous_reseau(debut, 27)))
+    conn.commit()
+
+    for limite in (1, 2, 3, 100):
+        vues = _toutes_les_pages(base, id_decoupe, limite)
+        assert len(vues) == 11 and len({ligne[-1] for ligne in vues}) == 11
+        assert vues == sorted(vues, key=lambda ligne: ligne[-2:])
+        assert _toutes_les_pages_a_rebours(base, id_decoupe, limite) == vues
+
+
+def test_plan_et_lignes_stockees_meme_pagination(base):
+    parametrique = _decoupe(base, "lan")
+    stockee = _decoupe(base, "lan-stockee", parametrique=False)
+
+    for limite in (3, 100):
+        assert ([ligne[:-1] for ligne in _toutes_les_pages(base, parametrique, limite)]
+                == [ligne[:-1] for ligne in _toutes_les_pages(base, stockee, limite)])
+        assert ([ligne[:-1] for ligne in _toutes_les_pages_a_rebours(base, parametrique, limite)]
+                == [ligne[:-1] for ligne in _toutes_les_pages_a_rebours(base, stockee, limite)])
+    # Depuis une adresse : à partir du sous-réseau qui y commence
+    assert base.page_sous_reseaux(parametrique, 167772160 + 64, limite=1)[0][0][0] == "10.0.0.64"
+    assert base.page_sous_reseaux(stockee, 167772160 + 64, limite=1)[0][0][0] == "10.0.0.64"
@@ -0,0 +1,36 @@
+from plan_decoupe import calculer_sous_reseaux
+
+
+def _enregistrer(database, nom, reseau, id_utilisateur):
+    plan, _, net = calculer_sous_reseaux(reseau_de_base=reseau, nb_sous_reseaux=4, masque=None,
+                                         nb_ips_utilisables=None)
+    return database.enregistrer_decoupe(nom_decoupe=nom, mode="classless", ip_reseau=str(net.network_address),
+                                        masque=str(net.netmask), nb_ips_par_sr=None, type_decoupe="classique",
+                                        id_utilisateur=id_utilisateur, plan=plan)
+
+
+def test_requete_plein_texte_sans_mot():
+    from database import _requete_plein_texte
+
+    assert _requete_plein_texte('bureau lyo') == '"bureau"* "lyo"*'
+    assert _requete_plein_texte('"') == ""
+    assert _requete_plein_texte('" "  "') == ""
+
+
+def test_recherche_par_mots(base):
+    id_utilisateur = base.ajouter_utilisateur("alice", "motdepasse")
+    _enregistrer(base, "Bureau Lyon", "10.1.0.0/16", id_utilisateur)
+    _enregistrer(base, "Entrepôt", "10.2.0.0/16", id_utilisateur)
+
+    lignes, suivante = base.rechercher_decoupes(id_utilisateur, "lyo")
+    assert [ligne[1] for ligne in lignes] == ["Bureau Lyon"]
+    assert suivante is None
+
+
+def test_recherche_guillemets_seuls(base):
+    id_utilisateur = base.ajouter_utilisateur("alice", "motdepasse")
+    _enregistrer(base, "Bureau Lyon", "10.1.0.0/16", id_utilisateur)
+
+    # Sans aucun mot, pas de requête FTS5 (MATCH vide = erreur de syntaxe) : recherche par préfixe du nom
+    for texte in ['"', '""', ' " " ']:
+        assert base.rechercher_decoupes(id_utilisateur, texte) == ([], None)
@@ -0,0 +1,16 @@
+import pytest
+
+from verification_vlsm import allouer_vlsm, verifier_possibilite_vlsm
+
+
+@pytest.mark.parametrize("reseau, masque", [("2001:db8::/64", None), ("2001:db8::", "64")])
+def test_reseau_ipv6_refuse(reseau, masque):
+    with pytest.raises(ValueError, match="IPv4"):
+        allouer_vlsm(reseau, masque, [100, 50])
+    with pytest.raises(ValueError, match="IPv4"):
+        verifier_possibilite_vlsm(reseau, masque, [100, 50])
+
+
+def test_allocation_ipv4():
+    plan = allouer_vlsm("192.168.1.0/24", None, [100, 50, 2])
+    assert [str(net) for net in plan] == ["192.168.1.0/25", "192.168.1.128/26", "192.168.1.192/30"]
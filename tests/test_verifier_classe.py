@@ -0,0 +1,30 @@
+from ipaddress import IPv4Network
+
+import pytest
+
+from verifier_classe import ClasseIPV4, classifier_en_masse, verifie_classfull
+
+ENTREES = [
+    "10.0.0.0/8", "10.1.2.3", "10.1.2.3/32", "172.16.0.0/12", "172.16.0.0/255.255.0.0", "192.168.1.0/24",
+    "192.168.1.7/0", "127.0.0.1", "169.254.1.1/16", "224.0.0.1", "240.0.0.0/4", "255.255.255.255",
+    "0.0.0.0/0", "100.64.0.0/10", "8.8.8.8/08",
+    # invalides
+    "1.2.3.4/", "1.2.3.4//", "/24", "", "1.2.3.4/33", "1.2.3.4/123", "1.2.3.4/-1", "1.2.3.4/٣",
+    "1.2.3.4/255.0.255.0", "256.1.1.1", "1.2.3", "01.2.3.4", "a.b.c.d/8",
+]
+
+
+def _reference(entree):
+    try:
+        return verifie_classfull(IPv4Network(entree, strict=False))
+    except ValueError:
+        return ClasseIPV4.PAS_DE_CLASSE
+
+
+@pytest.mark.parametrize("entree", ENTREES)
+def test_classifier_en_masse_equivaut_a_verifie_classfull(entree):
+    assert classifier_en_masse([entree]) == [_reference(entree)]
+
+
+def test_barre_sans_prefixe():
+    assert classifier_en_masse(["1.2.3.4/"]) == [ClasseIPV4.PAS_DE_CLASSE]
@@ -1,4 +1,11 @@
+import hashlib
 import ipaddress
+from array import array
+
+from database import enregistrer_decoupe
+from moteur_parallele import PlanParallele, nombre_processus
+from plan_decoupe import (ligne_sous_reseau, enregistrement_sous_reseau, colonnes_depuis_debuts,
+                          lignes_depuis_colonnes, numpy_ou_none)
 
 def calculer_bloc_ip(nb_ips_utilisables: int) -> int:
     """
@@ -23,11 +30,8 @@ def calculer_bloc_ip(nb_ips_utilisables: int) -> int:
     return taille_bloc
 
 
-def verifier_possibilite_vlsm(reseau_de_base_str: str, masque_str: str | None, besoins_list: list[int]):
-    """
-    Vérifie si une liste de besoins (nb d'IP) peut tenir dans un réseau de base.
-    besoins_list: une liste d'entiers [100, 50, 30]
-    """
+def _parser_reseau_base(reseau_de_base_str: str, masque_str: str | None) -> ipaddress.IPv4Network:
+    """Parse le réseau de base (CIDR dans l'IP OU masque séparé, pas les deux)"""
     # 1 parse le réseau de base
     try:
         net_str = reseau_de_base_str.strip()
@@ -55,12 +59,24 @@ def verifier_possibilite_vlsm(reseau_de_base_str: str, masque_str: str | None, b
 
         # 'net_str' est maintenant propre on peut parser
         net = ipaddress.ip_network(net_str, strict=False)
-        total_ips_disponibles = net.num_addresses
+        if net.version != 4:
+            raise ValueError(f"{net.with_prefixlen} n'est pas un réseau IPv4 (IPv6 non pris en charge).")
+        return net
 
     except Exception as e:
 
         raise ValueError(f"Réseau de base ou masque invalide : {e}")
 
+
+def verifier_possibilite_vlsm(reseau_de_base_str: str, masque_str: str | None, besoins_list: list[int]):
+    """
+    Vérifie si une liste de besoins (nb d'IP) peut tenir dans un réseau de base.
+    besoins_list: une liste d'entiers [100, 50, 30]
+    """
+    # 1 parse le réseau de base
+    net = _parser_reseau_base(reseau_de_base_str, masque_str)
+    total_ips_disponibles = net.num_addresses
+
     #  parse la liste des besoins
     if not besoins_list:
         raise ValueError("La liste des besoins ne peut être vide.")
@@ -88,4 +104,133 @@ def verifier_possibilite_vlsm(reseau_de_base_str: str, masque_str: str | None, b
         f"--------------------------------------------------"
     )
 
-    return possible, message
\ No newline at end of file
+    return possible, message
+
+
+class PlanVLSM:
+    """
+    Sous-réseaux alloués par allouer_vlsm, du plus grand au plus petit.
+    Stockés en tableaux compacts (début, préfixe, besoin) ; mêmes accès que PlanDecoupe
+    (len, bornes, ligne, lignes, enregistrements) pour l'affichage et l'enregistrement.
+    """
+
+    def __init__(self, net: ipaddress.IPv4Network, debuts: array, prefixes: array, besoins: array):
+        self.net = net
+        self.debuts = debuts
+        self.prefixes = prefixes
+        self.besoins = besoins
+
+    def __len__(self):
+        return len(self.debuts)
+
+    def bornes(self, k: int) -> tuple[int, int]:
+        """Retourne (adresse réseau, broadcast) du k-ième sous-réseau sous forme d'entiers"""
+        debut = self.debuts[k]
+        return debut, debut + (1 << (32 - self.prefixes[k])) - 1
+
+    def __getitem__(self, k: int) -> ipaddress.IPv4Network:
+        return ipaddress.IPv4Network((self.debuts[k], self.prefixes[k]))
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self[k]
+
+    def ligne(self, k: int) -> list[str]:
+        if k < 0:
+            k += len(self)
+        return ligne_sous_reseau(f"Sous-réseau {k + 1} ({self.besoins[k]} IP)", self.debuts[k], self.prefixes[k])
+
+    def lignes(self, debut: int = 0, fin: int | None = None):
+        fin = len(self) if fin is None else min(fin, len(self))
+        for k in range(max(debut, 0), fin):
+            yield self.ligne(k)
+
+    def colonnes(self, debut: int = 0, fin: int | None = None) -> dict:
+        """Colonnes uint32 calculées avec NumPy (voir PlanDecoupe.colonnes)"""
+        np = numpy_ou_none()
+        if np is None:
+            raise RuntimeError("NumPy n'est pas installé : backend vectoriel indisponible.")
+        fin = len(self) if fin is None else min(fin, len(self))
+        return colonnes_depuis_debuts(np.frombuffer(self.debuts, dtype=np.uint32)[debut:fin],
+                                      np.frombuffer(self.prefixes, dtype=np.uint8)[debut:fin])
+
+    def lignes_par_blocs(self, debut: int = 0, fin: int | None = None, taille_bloc: int = 65536):
+        """Lignes par blocs, vectorisées si NumPy est disponible (voir PlanDecoupe.lignes_par_blocs)"""
+        fin = len(self) if fin is None else min(fin, len(self))
+        for bloc in range(max(debut, 0), fin, taille_bloc):
+            bloc_fin = min(bloc + taille_bloc, fin)
+            if numpy_ou_none() is None:
+                yield list(self.lignes(bloc, bloc_fin))
+            else:
+                noms = (f"Sous-réseau {k + 1} ({self.besoins[k]} IP)" for k in range(bloc, bloc_fin))
+                yield lignes_depuis_colonnes(self.colonnes(bloc, bloc_fin), noms)
+
+    def enregistrements(self, debut: int = 0):
+        for k in range(debut, len(self)):
+            yield enregistrement_sous_reseau(self.debuts[k], self.prefixes[k])
+
+    def empreinte(self) -> str:
+        """Empreinte des sous-réseaux alloués (voir PlanDecoupe.empreinte)"""
+        return hashlib.sha256(self.debuts.tobytes() + self.prefixes.tobytes()).hexdigest()
+
+
+def allouer_vlsm(reseau_de_base_str: str, masque_str: str | None, besoins_list: list[int]) -> PlanVLSM:
+    """
+    Alloue un sous-réseau aligné par besoin (nb d'IP utilisables), du plus grand au plus petit.
+    Les blocs étant des puissances de 2 traitées par taille décroissante, les placer bout à bout
+    depuis le début du réseau garantit leur alignement : un tri (O(n log n)) puis un seul passage.
+    """
+    net = _parser_reseau_base(reseau_de_base_str, masque_str)
+    if not besoins_list:
+        raise ValueError("La liste des besoins ne peut être vide.")
+
+    tailles = []
+    for besoin in besoins_list:
+        try:
+            tailles.append(calculer_bloc_ip(besoin))
+        except ValueError as e:
+            raise ValueError(f"Besoin invalide ({besoin}) : {e}")
+
+    total_ips_requises = sum(tailles)
+    if total_ips_requises > net.num_addresses:
+        raise ValueError(
+            f"Découpe VLSM impossible : {total_ips_requises} IPs requises pour "
+            f"{net.num_addresses} disponibles dans {net.with_prefixlen}."
+        )
+
+    ordre = sorted(range(len(tailles)), key=tailles.__getitem__, reverse=True)
+
+    debuts = array("I")
+    prefixes = array("B")
+    besoins = array("I")
+    adresse = int(net.network_address)
+    for i in ordre:
+        taille = tailles[i]
+        debuts.append(adresse)
+        prefixes.append(33 - taille.bit_length())
+        besoins.append(besoins_list[i])
+        adresse += taille
+
+    return PlanVLSM(net, debuts, prefixes, besoins)
+
+
+def enregistrer_vlsm(nom_decoupe: str, plan: PlanVLSM, id_utilisateur: int, progression=None,
+                     processus: int | None = None) -> int:
+    """
+    Enregistre une allocation VLSM comme découpe de type 'vlsm' (insertion par lots).
+    Pour une grande allocation, les lignes sont calculées par plusieurs processus pendant
+    que ce processus les insère (voir moteur_parallele.nombre_processus).
+    """
+    processus = nombre_processus(len(plan), processus)
+    return enregistrer_decoupe(
+        nom_decoupe=nom_decoupe,
+        mode="classless",
+        ip_reseau=str(plan.net.network_address),
+        masque=str(plan.net.netmask),
+        nb_ips_par_sr=None,
+        type_decoupe="vlsm",
+        id_utilisateur=id_utilisateur,
+        plan=plan if processus == 1 else PlanParallele(plan, processus),
+        progression=progression,
+    )
+
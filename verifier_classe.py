@@ -1,3 +1,4 @@
+import socket
 from ipaddress import IPv4Network, IPv4Address
 from enum import Enum
 
@@ -10,6 +11,15 @@ class ClasseIPV4(Enum):
     CLASSE_B = "classe B"
     CLASSE_C = "classe C"
 
+# Bornes des classes (calculées une seule fois)
+_IP_1 = IPv4Address("1.0.0.0")
+_IP_127 = IPv4Address("127.0.0.0")
+_IP_128 = IPv4Address("128.0.0.0")
+_IP_192 = IPv4Address("192.0.0.0")
+_IP_224 = IPv4Address("224.0.0.0")
+_IP_240 = IPv4Address("240.0.0.0")
+_IP_BROADCAST = IPv4Address("255.255.255.255")
+
 # Fonctions
 def ipv4_valide(ip: str) -> bool:
     try:
@@ -25,17 +35,133 @@ def verifie_classfull(reseau: IPv4Network) -> ClasseIPV4:
     ip = reseau.network_address
     prefix = reseau.prefixlen
 
-    if ip < IPv4Address("1.0.0.0") or (IPv4Address("127.0.0.0") <= ip < IPv4Address("128.0.0.0")):
+    if ip < _IP_1 or (_IP_127 <= ip < _IP_128):
         return ClasseIPV4.CLASSE_RESERVE
-    elif IPv4Address("1.0.0.0") <= ip < IPv4Address("127.0.0.0") and prefix == 8:
+    elif _IP_1 <= ip < _IP_127 and prefix == 8:
         return ClasseIPV4.CLASSE_A
-    elif IPv4Address("128.0.0.0") <= ip < IPv4Address("192.0.0.0") and prefix == 16:
+    elif _IP_128 <= ip < _IP_192 and prefix == 16:
         return ClasseIPV4.CLASSE_B
-    elif IPv4Address("192.0.0.0") <= ip < IPv4Address("224.0.0.0") and prefix == 24:
+    elif _IP_192 <= ip < _IP_224 and prefix == 24:
         return ClasseIPV4.CLASSE_C
-    elif IPv4Address("224.0.0.0") <= ip < IPv4Address("240.0.0.0") and prefix == 8:
+    elif _IP_224 <= ip < _IP_240 and prefix == 8:
         return ClasseIPV4.CLASSE_RESERVE
-    elif IPv4Address("240.0.0.0") <= ip < IPv4Address("255.255.255.255") and prefix == 8:
+    elif _IP_240 <= ip < _IP_BROADCAST and prefix == 8:
         return ClasseIPV4.CLASSE_RESERVE
     else:
-        return ClasseIPV4.CLASSE_CLASSLESS
\ No newline at end of file
+        return ClasseIPV4.CLASSE_CLASSLESS
+
+
+# =========================
+#   CLASSIFICATION EN MASSE
+# =========================
+# Codes entiers des classes (index dans CODES_CLASSES), utilisés par les tableaux NumPy
+CODES_CLASSES = list(ClasseIPV4)
+_CODE = {classe: code for code, classe in enumerate(CODES_CLASSES)}
+
+
+def _construire_table():
+    """
+    Table indexée par le premier octet de l'adresse réseau : (classe, préfixe attendu).
+    Préfixe attendu None = classe obtenue quel que soit le préfixe ; sinon, un autre
+    préfixe donne CLASSE_CLASSLESS. Équivalent exact de la chaîne de verifie_classfull.
+    """
+    table = []
+    for octet in range(256):
+        if octet == 0 or octet == 127:
+            table.append((ClasseIPV4.CLASSE_RESERVE, None))
+        elif octet < 127:
+            table.append((ClasseIPV4.CLASSE_A, 8))
+        elif octet < 192:
+            table.append((ClasseIPV4.CLASSE_B, 16))
+        elif octet < 224:
+            table.append((ClasseIPV4.CLASSE_C, 24))
+        else:
+            # 224-239 et 240-255 en /8 : l'adresse réseau X.0.0.0 est toujours < 255.255.255.255
+            table.append((ClasseIPV4.CLASSE_RESERVE, 8))
+    return table
+
+
+_TABLE_PREMIER_OCTET = _construire_table()
+
+
+def classe_entier(reseau: int, prefixe: int) -> ClasseIPV4:
+    """Classe d'un réseau donné en entiers (adresse quelconque du réseau, préfixe)"""
+    reseau &= (0xFFFFFFFF << (32 - prefixe)) & 0xFFFFFFFF
+    classe, prefixe_attendu = _TABLE_PREMIER_OCTET[reseau >> 24]
+    if prefixe_attendu is None or prefixe == prefixe_attendu:
+        return classe
+    return ClasseIPV4.CLASSE_CLASSLESS
+
+
+def _classe_texte(entree: str) -> ClasseIPV4:
+    """Classe d'une entrée texte 'a.b.c.d', 'a.b.c.d/p' ou 'a.b.c.d/masque' ; invalide -> PAS_DE_CLASSE"""
+    ip, separateur, suffixe = entree.strip().partition("/")
+    try:
+        if suffixe.isascii() and suffixe.isdigit() and len(suffixe) <= 2:
+            prefixe = int(suffixe)
+            if prefixe > 32:
+                return ClasseIPV4.PAS_DE_CLASSE
+            # inet_pton est aussi strict qu'IPv4Address (4 octets décimaux) mais bien plus rapide
+            return classe_entier(int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big"), prefixe)
+        if not separateur:
+            return classe_entier(int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big"), 32)
+        return verifie_classfull(IPv4Network(entree.strip(), strict=False))
+    except (OSError, ValueError):
+        return ClasseIPV4.PAS_DE_CLASSE
+
+
+def classifier_en_masse(entrees) -> list[ClasseIPV4]:
+    """
+    Classe un itérable d'entrées : IPv4Network, None, ou texte ('10.0.0.0/8', '10.1.2.3',
+    '172.16.0.0/255.255.0.0'). Même résultat que verifie_classfull(IPv4Network(e, strict=False)),
+    les entrées invalides donnant PAS_DE_CLASSE.
+    """
+    resultats = []
+    for entree in entrees:
+        if isinstance(entree, str):
+            resultats.append(_classe_texte(entree))
+        elif entree is None:
+            resultats.append(ClasseIPV4.PAS_DE_CLASSE)
+        else:
+            resultats.append(classe_entier(int(entree.network_address), entree.prefixlen))
+    return resultats
+
+
+def classifier_fichier(chemin, taille_bloc=65536):
+    """Génère (entrée, classe) pour chaque ligne non vide d'un fichier, lu en flux"""
+    with open(chemin, encoding="utf-8") as fichier:
+        bloc = []
+        for ligne in fichier:
+            ligne = ligne.strip()
+            if ligne:
+                bloc.append(ligne)
+            if len(bloc) >= taille_bloc:
+                yield from zip(bloc, classifier_en_masse(bloc))
+                bloc = []
+        yield from zip(bloc, classifier_en_masse(bloc))
+
+
+def classifier_entiers(adresses, prefixes=None):
+    """
+    Version vectorisée (NumPy) : adresses en uint32, prefixes en entiers (32 par défaut).
+    Retourne un tableau uint8 de codes, à convertir avec CODES_CLASSES[code].
+    """
+    try:
+        import numpy as np  # optionnel, importé seulement ici
+    except ImportError:
+        raise RuntimeError("NumPy n'est pas installé : classification vectorisée indisponible.")
+
+    adresses = np.asarray(adresses, dtype=np.uint64)
+    if prefixes is None:
+        prefixes = np.full(adresses.shape, 32, dtype=np.int64)
+    prefixes = np.asarray(prefixes, dtype=np.int64)
+
+    masques = (np.uint64(0xFFFFFFFF) << (32 - prefixes).astype(np.uint64)) & np.uint64(0xFFFFFFFF)
+    octets = ((adresses & masques) >> np.uint64(24)).astype(np.intp)
+
+    codes_table = np.array([_CODE[classe] for classe, _ in _TABLE_PREMIER_OCTET], dtype=np.uint8)
+    prefixes_table = np.array([-1 if p is None else p for _, p in _TABLE_PREMIER_OCTET], dtype=np.int64)
+
+    attendus = prefixes_table[octets]
+    ok = (attendus == -1) | (attendus == prefixes)
+    return np.where(ok, codes_table[octets], np.uint8(_CODE[ClasseIPV4.CLASSE_CLASSLESS])).astype(np.uint8)